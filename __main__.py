@@ -1,19 +1,77 @@
 # __main__.py
+import argparse
+
+from instrumentation.metrics import metrics
+from instrumentation.profiling import PROFILE_MODES, profile_run
 from src.config.config import Config
 from src.clients.lastfm_client import LastfmClient
+from src.database.mysql_manager import MysqlManager
+from src.database.state_store import StateStore
+from src.etl.ingest_scrobbles.multi_user_ingest import ingest_users
+from src.etl.ingest_scrobbles.pipeline import ingest_scrobbles
 import os  # Necesario para construir la ruta al .env
 
 
-def run():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta de scrobbles")
+    parser.add_argument("--metrics-json", help="anade las metricas a este log JSON")
+    parser.add_argument("--metrics-prom", help="fichero de texto para Prometheus")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None)
+    parser.add_argument("--profile-dir", default="profiles")
+    parser.add_argument(
+        "--users", nargs="+", default=None, help="usuarios de Last.fm a ingerir"
+    )
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
     """
     Punto de entrada principal para ejecutar el proceso.
     """
+    args = parse_args(argv)
+    if args.metrics_json or args.metrics_prom:
+        metrics.enable()
+    with profile_run(args.profile, args.profile_dir) as profile_report:
+        result = ingest(args.users)
+    if profile_report is not None:
+        print(f"Perfil guardado en {profile_report['report_path']}")
+    if args.metrics_json:
+        metrics.write_json_log(args.metrics_json, rows=result["rows"])
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
+
+
+def ingest(users=None):
     dotenv_path = os.path.join(os.path.dirname(__file__), ".env")
     config = Config(dotenv_path=dotenv_path)
-    client = LastfmClient(config=config)
-    tracks = client.get_recenttracks()
+    # msgspec u orjson si estan instalados; json de la libreria estandar si no
+    client = LastfmClient(config=config, json_decoder="auto")
+    state_path = os.path.join(os.path.dirname(__file__), ".ingest_state.json")
+    state_store = StateStore(state_path)
+    # Solo se piden los scrobbles posteriores al ultimo watermark y, si una
+    # ejecucion anterior fallo, se reanuda desde la ultima pagina completada.
+    # Descarga, transformacion y carga se solapan en un pipeline con colas
+    with MysqlManager(config) as database_manager:
+        database_manager.create_tables()
+        if users is None or len(users) == 1:
+            if users is not None:
+                client = client.for_user(users[0])
+            result = ingest_scrobbles(client, state_store, database_manager)
+        else:
+            # Varios usuarios comparten el pool y el rate limit de la api key
+            result = ingest_users(client, users, state_store, database_manager)
+            for user, user_report in result["users"].items():
+                status = user_report["error"] or "ok"
+                print(f"{user}: {user_report['rows']} scrobbles ({status})")
+            result["rows"] = sum(
+                user_report["rows"] for user_report in result["users"].values()
+            )
 
-    print(f"Proceso finalizado. Se encontraron {len(tracks)} tracks.")
+    print(
+        f"Proceso finalizado. Se cargaron {result['rows']} scrobbles "
+        f"en {result['seconds']:.1f} s."
+    )
+    return result
 
 
 # --- Punto de arranque ---
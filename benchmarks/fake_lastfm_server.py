@@ -0,0 +1,245 @@
+# Servidor HTTP local que imita la API de Last.fm para pruebas de carga sin red.
+# Uso: python -m benchmarks.fake_lastfm_server --history-size 1000000 --latency 0.05
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import random
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+MAX_LIMIT = 200
+DEFAULT_LIMIT = 50
+
+
+class FakeLastfmServer:
+    def __init__(
+        self,
+        history_size=10_000,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        error_rate=0.0,
+        rate_limit=None,
+        now_playing=True,
+        start_uts=1_100_000_000,
+        interval_seconds=180,
+        user="sinatxester",
+        seed=None,
+    ):
+        # El historico no se guarda: el scrobble i se genera a partir de su
+        # indice, asi millones de scrobbles no ocupan memoria
+        self.history_size = history_size
+        self.latency = latency
+        self.error_rate = error_rate
+        # Peticiones por segundo permitidas; por encima se responde error 29
+        self.rate_limit = rate_limit
+        self.now_playing = now_playing
+        self.start_uts = start_uts
+        self.interval_seconds = interval_seconds
+        self.user = user
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float(rate_limit or 0)
+        self._last_refill = time.monotonic()
+        self.stats = {"requests": 0, "errors": 0, "throttled": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def uri(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/2.0/"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-lastfm", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {
+                    key: values[-1]
+                    for key, values in parse_qs(urlparse(self.path).query).items()
+                }
+                status_code, body = server.handle(params)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _throttled(self) -> bool:
+        if self.rate_limit is None:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.rate_limit,
+                self._tokens + (now - self._last_refill) * self.rate_limit,
+            )
+            self._last_refill = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            return False
+
+    def handle(self, params: dict) -> tuple[int, dict]:
+        with self._lock:
+            self.stats["requests"] += 1
+            failed = self._random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if self._throttled():
+            with self._lock:
+                self.stats["throttled"] += 1
+            return 429, {"error": 29, "message": "Rate Limit Exceeded"}
+        if failed:
+            with self._lock:
+                self.stats["errors"] += 1
+            return 503, {
+                "error": 16,
+                "message": "There was a temporary error processing your request.",
+            }
+        method = params.get("method")
+        if method == "user.getrecenttracks":
+            return 200, self.recenttracks(params)
+        if method == "user.getinfo":
+            return 200, self.userinfo()
+        return 400, {"error": 3, "message": "Invalid Method"}
+
+    def _uts(self, index: int) -> int:
+        return self.start_uts + index * self.interval_seconds
+
+    def _index_range(self, from_uts, to_uts) -> tuple[int, int]:
+        # Indices [first, last) de los scrobbles con from <= uts <= to
+        first = 0
+        last = self.history_size
+        if from_uts is not None:
+            first = max(
+                first, math.ceil((from_uts - self.start_uts) / self.interval_seconds)
+            )
+        if to_uts is not None:
+            last = min(last, (to_uts - self.start_uts) // self.interval_seconds + 1)
+        return first, max(first, last)
+
+    def track(self, index: int) -> dict:
+        uts = self._uts(index)
+        return {
+            "artist": {
+                "url": f"https://www.last.fm/music/Artist+{index % 5000}",
+                "name": f"Artist {index % 5000}",
+                "image": [],
+                "mbid": "",
+            },
+            "date": {
+                "uts": str(uts),
+                "#text": time.strftime("%d %b %Y, %H:%M", time.gmtime(uts)),
+            },
+            "mbid": "",
+            "name": f"Title {index % 100000}",
+            "image": [],
+            "url": f"https://www.last.fm/music/Artist+{index % 5000}/_/Title",
+            "streamable": "0",
+            "album": {"mbid": "", "#text": f"Album {index % 20000}"},
+            "loved": "0",
+        }
+
+    def now_playing_track(self) -> dict:
+        track = self.track(self.history_size)
+        del track["date"]
+        track["@attr"] = {"nowplaying": "true"}
+        return track
+
+    def recenttracks(self, params: dict) -> dict:
+        limit = min(int(params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        page = int(params.get("page", 1))
+        from_uts = int(params["from"]) if "from" in params else None
+        to_uts = int(params["to"]) if "to" in params else None
+        first, last = self._index_range(from_uts, to_uts)
+        total = last - first
+        # Last.fm devuelve primero los mas recientes
+        newest = last - (page - 1) * limit
+        indexes = range(newest - 1, max(first, newest - limit) - 1, -1)
+        tracks = [self.track(index) for index in indexes]
+        if self.now_playing and page == 1:
+            tracks.insert(0, self.now_playing_track())
+        return {
+            "recenttracks": {
+                "track": tracks,
+                "@attr": {
+                    "user": self.user,
+                    "totalPages": str(math.ceil(total / limit)),
+                    "page": str(page),
+                    "perPage": str(limit),
+                    "total": str(total),
+                },
+            }
+        }
+
+    def userinfo(self) -> dict:
+        return {
+            "user": {
+                "name": self.user,
+                "playcount": str(self.history_size),
+                "registered": {
+                    "unixtime": str(self.start_uts),
+                    "#text": self.start_uts,
+                },
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Last.fm API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--history-size", type=int, default=10_000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--no-now-playing", action="store_true")
+    args = parser.parse_args()
+    server = FakeLastfmServer(
+        history_size=args.history_size,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        now_playing=not args.no_now_playing,
+    )
+    print(f"Fake Last.fm escuchando en {server.uri}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
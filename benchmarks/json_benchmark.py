@@ -0,0 +1,54 @@
+# Tiempo y memoria de decodificar paginas extended=1 de 200 tracks por decoder.
+# Uso: python -m benchmarks.json_benchmark 1000
+import json
+import sys
+import time
+import tracemalloc
+
+from benchmarks.fake_lastfm_server import FakeLastfmServer
+from clients.json_decoders import JSON_DECODERS, get_json_decoder
+
+
+def create_page_content(limit=200) -> bytes:
+    server = FakeLastfmServer(history_size=limit)
+    try:
+        page = server.recenttracks({"limit": str(limit), "page": "1"})
+    finally:
+        server._server.server_close()
+    # Imagenes como en la API real: son la mayor parte del documento
+    for track in page["recenttracks"]["track"]:
+        track["image"] = [
+            {
+                "size": size,
+                "#text": f"https://lastfm.freetls.fastly.net/i/u/{size}/x.jpg",
+            }
+            for size in ("small", "medium", "large", "extralarge")
+        ]
+        track["artist"]["image"] = track["image"]
+    return json.dumps(page).encode("utf-8")
+
+
+def run(n_pages: int):
+    content = create_page_content()
+    print(f"pagina de {len(content) / 1024:.0f} KB, {n_pages} paginas")
+    print(f"{'decoder':>8} {'ms/pagina':>10} {'KB/pagina':>10}")
+    for name in JSON_DECODERS:
+        try:
+            decoder = get_json_decoder(name)
+        except ValueError:
+            print(f"{name:>8} {'no instalado':>21}")
+            continue
+        start = time.perf_counter()
+        for _ in range(n_pages):
+            decoder.decode(content, "user.getrecenttracks")
+        milliseconds = (time.perf_counter() - start) / n_pages * 1000
+        tracemalloc.start()
+        page = decoder.decode(content, "user.getrecenttracks")
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del page
+        print(f"{name:>8} {milliseconds:>10.3f} {allocated / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,57 @@
+# Memoria por registro y velocidad de construccion de Scrobble y ScrobbleRecord.
+# Uso: python -m benchmarks.scrobble_benchmark 1000000
+import sys
+import time
+import tracemalloc
+
+from models.scrobble import Scrobble, ScrobbleRecord
+
+
+def create_rows(n_rows: int) -> list[dict]:
+    return [
+        {
+            "uts": 1100000000 + i,
+            "artist": f"Artist {i % 5000}",
+            "artist_mbid": "",
+            "album": f"Album {i % 20000}",
+            "album_mbid": "",
+            "title": f"Title {i % 100000}",
+            "track_mbid": "2f04902e-2ffd-4fc2-b988-f9aaf36a029a",
+        }
+        for i in range(n_rows)
+    ]
+
+
+BUILDERS = {
+    "Scrobble(**row)": lambda row: Scrobble(**row),
+    "Scrobble.model_construct": lambda row: Scrobble.model_construct(**row),
+    "ScrobbleRecord": lambda row: ScrobbleRecord(**row),
+}
+
+
+def measure(builder, rows: list[dict]) -> tuple[float, float]:
+    start = time.perf_counter()
+    records = [builder(row) for row in rows]
+    seconds = time.perf_counter() - start
+    del records
+
+    # tracemalloc ralentiza la ejecucion: la memoria se mide en otra pasada.
+    # Las cadenas ya existen en rows, solo se mide el coste del contenedor
+    tracemalloc.start()
+    records = [builder(row) for row in rows]
+    allocated_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return len(rows) / seconds, allocated_bytes / len(rows)
+
+
+def run(n_rows: int):
+    rows = create_rows(n_rows)
+    print(f"{'builder':<26} {'records/s':>12} {'bytes/record':>13}")
+    for name, builder in BUILDERS.items():
+        records_per_second, bytes_per_record = measure(builder, rows)
+        print(f"{name:<26} {records_per_second:>12,.0f} {bytes_per_record:>13.0f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,260 @@
+# Benchmarks de cada etapa del ETL con historico en JSON y deteccion de regresiones.
+# Uso:
+#   python -m benchmarks.suite run --sizes 1000 100000 1000000
+#   python -m benchmarks.suite compare --threshold 0.1
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import sqlalchemy
+
+from benchmarks.fake_lastfm_server import FakeLastfmServer
+from benchmarks.transform_benchmark import create_raw_tracks
+from clients.lastfm_client import LastfmClient
+from clients.rate_limiter import RateLimiter
+from config.config import Config
+from database.mysql_manager import MysqlManager
+from etl.ingest_scrobbles.enricher import EnrichScrobble
+from etl.ingest_scrobbles.transformer import TransformScrobble
+
+STAGES = ("client", "transform", "enrich", "load")
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_HISTORY = os.path.join(os.path.dirname(__file__), "history.json")
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Metricas donde mas es mejor; en el resto (memoria) menos es mejor
+HIGHER_IS_BETTER = ("pages_per_sec", "rows_per_sec")
+
+
+class _StaticConfig:
+    def __init__(self, credentials: dict):
+        self.credentials = credentials
+
+    def get_credentials(self, key_name):
+        return self.credentials.get(key_name, "")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss es el maximo del proceso: en Linux en KB, en macOS en bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def rate(count: int, seconds: float) -> float:
+    return count / seconds if seconds else 0.0
+
+
+def bench_client(n_rows: int, limit=200, max_workers=4) -> dict:
+    client_config = _StaticConfig({"LASTFM_KEY": "benchmark"})
+    with FakeLastfmServer(history_size=n_rows) as server:
+        client = LastfmClient(
+            client_config,
+            uri=server.uri,
+            rate_limiter=RateLimiter(rate=1_000_000, capacity=1_000_000),
+        )
+        start = time.perf_counter()
+        tracks_list = client.get_recenttracks(limit=limit, max_workers=max_workers)
+        seconds = time.perf_counter() - start
+        client.session.close()
+    return {
+        "pages_per_sec": rate(server.stats["requests"], seconds),
+        "rows_per_sec": rate(len(tracks_list), seconds),
+    }
+
+
+def bench_transform(tracks_list: list) -> tuple[dict, object]:
+    start = time.perf_counter()
+    scrobble_df = TransformScrobble().transform_tracks_to_dataframe(tracks_list)
+    seconds = time.perf_counter() - start
+    return {"rows_per_sec": rate(len(scrobble_df), seconds)}, scrobble_df
+
+
+def bench_enrich(scrobble_df) -> tuple[dict, object]:
+    start = time.perf_counter()
+    enriched_df = EnrichScrobble(scrobble_df).enrich_scrobble()
+    seconds = time.perf_counter() - start
+    return {"rows_per_sec": rate(len(enriched_df), seconds)}, enriched_df
+
+
+def bench_load(enriched_df, mysql_env=None) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        if mysql_env is None:
+            database_manager = MysqlManager(_StaticConfig({}))
+            database_manager.engine = sqlalchemy.create_engine(
+                f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+            )
+        else:
+            database_manager = MysqlManager(Config(dotenv_path=mysql_env))
+        with database_manager:
+            database_manager.create_tables()
+            result = database_manager.save_scrobbles(
+                enriched_df, user="benchmark", mode="upsert"
+            )
+    return {"rows_per_sec": result["rows_per_sec"]}
+
+
+def run_size(n_rows: int, stages=STAGES, mysql_env=None) -> dict:
+    size_results = {}
+    if "client" in stages:
+        size_results["client"] = bench_client(n_rows)
+    tracks_list = create_raw_tracks(n_rows)
+    transform_result, scrobble_df = bench_transform(tracks_list)
+    del tracks_list
+    if "transform" in stages:
+        size_results["transform"] = transform_result
+    enrich_result, enriched_df = bench_enrich(scrobble_df)
+    if "enrich" in stages:
+        size_results["enrich"] = enrich_result
+    if "load" in stages:
+        size_results["load"] = bench_load(enriched_df, mysql_env)
+    size_results["peak_rss_mb"] = peak_rss_mb()
+    return size_results
+
+
+def run_size_in_subprocess(n_rows: int, stages=STAGES, mysql_env=None) -> dict:
+    # Un proceso por tamano: ru_maxrss es el maximo de todo el proceso y
+    # mezclaria la memoria de los tamanos anteriores con la de este
+    command = [sys.executable, "-m", "benchmarks.suite", "size", str(n_rows)]
+    command += ["--stages", *stages]
+    if mysql_env is not None:
+        command += ["--mysql-env", mysql_env]
+    completed = subprocess.run(
+        command, capture_output=True, text=True, check=True, cwd=REPO_DIR
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def run_suite(sizes: list[int], stages=STAGES, mysql_env=None) -> dict:
+    results = {}
+    for n_rows in sizes:
+        size_results = run_size_in_subprocess(n_rows, stages, mysql_env)
+        results[str(n_rows)] = size_results
+        print(f"{n_rows:>10} {json.dumps(size_results)}")
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(path) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def append_history(path, results: dict) -> dict:
+    history = read_history(path)
+    run = {
+        "timestamp": int(time.time()),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    history.append(run)
+    # Escritura atomica: un benchmark interrumpido no corrompe el historico
+    with tempfile.NamedTemporaryFile(
+        "w", dir=os.path.dirname(os.path.abspath(path)), delete=False
+    ) as f:
+        json.dump(history, f, indent=2)
+    os.replace(f.name, path)
+    return run
+
+
+def _flatten(results: dict, prefix="") -> dict:
+    metrics = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(_flatten(value, f"{name}."))
+        else:
+            metrics[name] = value
+    return metrics
+
+
+def compare_runs(baseline: dict, current: dict, threshold=0.1) -> list[dict]:
+    baseline_metrics = _flatten(baseline["results"])
+    current_metrics = _flatten(current["results"])
+    regressions = []
+    for name, current_value in current_metrics.items():
+        baseline_value = baseline_metrics.get(name)
+        if not baseline_value:
+            continue
+        change = (current_value - baseline_value) / baseline_value
+        if name.endswith(HIGHER_IS_BETTER):
+            regressed = change < -threshold
+        else:
+            regressed = change > threshold
+        if regressed:
+            regressions.append(
+                {
+                    "metric": name,
+                    "baseline": baseline_value,
+                    "current": current_value,
+                    "change": change,
+                }
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ETL benchmark suite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    run_parser.add_argument("--history", default=DEFAULT_HISTORY)
+    run_parser.add_argument("--mysql-env", default=None)
+    size_parser = subparsers.add_parser("size", help="un tamano, salida en JSON")
+    size_parser.add_argument("n_rows", type=int)
+    size_parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    size_parser.add_argument("--mysql-env", default=None)
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("--history", default=DEFAULT_HISTORY)
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    compare_parser.add_argument(
+        "--baseline", type=int, default=-2, help="indice del run de referencia"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_suite(args.sizes, args.stages, args.mysql_env)
+        run = append_history(args.history, results)
+        print(f"Guardado en {args.history} (commit {run['commit']})")
+        return 0
+    if args.command == "size":
+        print(json.dumps(run_size(args.n_rows, args.stages, args.mysql_env)))
+        return 0
+
+    history = read_history(args.history)
+    if len(history) < 2:
+        print("Hacen falta al menos dos ejecuciones en el historico")
+        return 1
+    regressions = compare_runs(history[args.baseline], history[-1], args.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESION {regression['metric']}: {regression['baseline']:.1f} -> "
+            f"{regression['current']:.1f} ({regression['change']:+.1%})"
+        )
+    if not regressions:
+        print(f"Sin regresiones por encima del {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
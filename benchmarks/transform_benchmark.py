@@ -0,0 +1,53 @@
+# Compara el transform por objeto (Scrobble + model_dump) con el columnar.
+# Uso: python -m benchmarks.transform_benchmark 10000 100000 1000000
+import sys
+import time
+
+from etl.ingest_scrobbles.enricher import EnrichScrobble
+from etl.ingest_scrobbles.transformer import TransformScrobble
+
+
+def create_raw_tracks(n_rows: int) -> list[dict]:
+    return [
+        {
+            "artist": {"name": f"Artist {i % 5000}", "mbid": ""},
+            "album": {"#text": f"Album {i % 20000}", "mbid": ""},
+            "name": f"Title {i % 100000}",
+            "mbid": "2f04902e-2ffd-4fc2-b988-f9aaf36a029a",
+            "date": {"uts": str(1100000000 + i), "#text": ""},
+            "image": [{"size": "small", "#text": "https://lastfm.freetls.fastly.net"}],
+            "loved": "0",
+        }
+        for i in range(n_rows)
+    ]
+
+
+def per_object_path(tracks_list):
+    scrobbles_list = TransformScrobble().transform_tracks_list(tracks_list)
+    return EnrichScrobble(scrobbles_list)._create_dataframe(scrobbles_list)
+
+
+def columnar_path(tracks_list):
+    return TransformScrobble().transform_tracks_to_dataframe(tracks_list)
+
+
+def measure(function, tracks_list) -> float:
+    start = time.perf_counter()
+    function(tracks_list)
+    return time.perf_counter() - start
+
+
+def run(sizes: list[int]):
+    print(f"{'rows':>10} {'per_object_s':>13} {'columnar_s':>11} {'speedup':>8}")
+    for n_rows in sizes:
+        tracks_list = create_raw_tracks(n_rows)
+        per_object_seconds = measure(per_object_path, tracks_list)
+        columnar_seconds = measure(columnar_path, tracks_list)
+        print(
+            f"{n_rows:>10} {per_object_seconds:>13.3f} {columnar_seconds:>11.3f} "
+            f"{per_object_seconds / columnar_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    run([int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
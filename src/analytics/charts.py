@@ -0,0 +1,124 @@
+import pandas as pd
+import pyarrow.dataset as ds
+
+from database.parquet_sink import ParquetSink
+
+CHART_COLUMNS = {
+    "artist": ["artist"],
+    "album": ["artist", "album"],
+    "track": ["artist", "title"],
+}
+PERIODS = {"year": "Y", "month": "M", "week": "W"}
+
+
+class Charts:
+    def __init__(self, source: pd.DataFrame | ParquetSink):
+        self.source = source
+
+    def _parquet_filter(self, from_uts, to_uts, user):
+        expression = None
+        conditions = []
+        if user is not None:
+            conditions.append(ds.field("user") == user)
+        # year es columna de particion: se descartan directorios enteros. Sale
+        # de fechahora en hora local, asi que el margen de un anio cubre
+        # cualquier zona horaria; el filtro exacto lo hace uts
+        if from_uts is not None:
+            from_year = pd.Timestamp(from_uts, unit="s").year - 1
+            conditions += [ds.field("year") >= from_year, ds.field("uts") >= from_uts]
+        if to_uts is not None:
+            to_year = pd.Timestamp(to_uts, unit="s").year + 1
+            conditions += [ds.field("year") <= to_year, ds.field("uts") <= to_uts]
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def load(self, columns, from_uts=None, to_uts=None, user=None) -> pd.DataFrame:
+        columns = list(dict.fromkeys(["uts", *columns]))
+        # Se pregunta por DataFrame: ParquetSink se importa tambien como
+        # src.database.parquet_sink y esa clase es otra para isinstance
+        if not isinstance(self.source, pd.DataFrame):
+            return self.source.read(
+                columns=columns, filter=self._parquet_filter(from_uts, to_uts, user)
+            ).to_pandas()
+        scrobble_df = self.source
+        mask = pd.Series(True, index=scrobble_df.index)
+        if user is not None:
+            mask &= scrobble_df["user"] == user
+        if from_uts is not None:
+            mask &= scrobble_df["uts"] >= from_uts
+        if to_uts is not None:
+            mask &= scrobble_df["uts"] <= to_uts
+        return scrobble_df.loc[mask, columns]
+
+    def top(
+        self, chart, n=10, period=None, from_uts=None, to_uts=None, user=None
+    ) -> pd.DataFrame:
+        if chart not in CHART_COLUMNS:
+            raise ValueError(f"chart must be one of {list(CHART_COLUMNS)}")
+        if period is not None and period not in PERIODS:
+            raise ValueError(f"period must be one of {list(PERIODS)}")
+        keys = CHART_COLUMNS[chart]
+        scrobble_df = self.load([*keys, "fechahora"], from_uts, to_uts, user)
+        if period is None:
+            plays = scrobble_df.groupby(keys, sort=False).size()
+            return (
+                plays.sort_values(ascending=False, kind="stable")
+                .head(n)
+                .rename("plays")
+                .reset_index()
+            )
+        scrobble_df = scrobble_df.assign(
+            period=scrobble_df["fechahora"].dt.to_period(PERIODS[period])
+        )
+        plays = scrobble_df.groupby(["period", *keys], sort=False).size()
+        plays = plays.rename("plays").reset_index()
+        # Top n dentro de cada periodo, periodos en orden cronologico
+        plays = plays.sort_values(
+            ["period", "plays"], ascending=[True, False], kind="stable"
+        )
+        return plays.groupby("period", sort=False).head(n).reset_index(drop=True)
+
+    def top_artists(self, n=10, **kwargs) -> pd.DataFrame:
+        return self.top("artist", n, **kwargs)
+
+    def top_albums(self, n=10, **kwargs) -> pd.DataFrame:
+        return self.top("album", n, **kwargs)
+
+    def top_tracks(self, n=10, **kwargs) -> pd.DataFrame:
+        return self.top("track", n, **kwargs)
+
+    def streaks(self, n=10, from_uts=None, to_uts=None, user=None) -> pd.DataFrame:
+        scrobble_df = self.load(["fechahora"], from_uts, to_uts, user)
+        days = pd.Series(scrobble_df["fechahora"].dt.normalize().unique()).sort_values()
+        # Una racha nueva empieza cuando el dia anterior no tiene escuchas
+        streak_id = (days.diff() != pd.Timedelta(days=1)).cumsum()
+        streaks = days.groupby(streak_id).agg(["min", "max", "size"])
+        streaks.columns = ["start", "end", "days"]
+        return (
+            streaks.sort_values(["days", "start"], ascending=[False, True])
+            .head(n)
+            .reset_index(drop=True)
+        )
+
+    def hour_of_week_heatmap(self, from_uts=None, to_uts=None, user=None):
+        scrobble_df = self.load(["fechahora"], from_uts, to_uts, user)
+        fechahora = scrobble_df["fechahora"].dt
+        # Matriz 7x24: filas lunes(0)..domingo(6), columnas hora 0..23
+        heatmap = pd.crosstab(fechahora.dayofweek, fechahora.hour)
+        heatmap = heatmap.reindex(index=range(7), columns=range(24), fill_value=0)
+        heatmap.index.name = "dayofweek"
+        heatmap.columns.name = "hour"
+        return heatmap
+
+    def first_listens(
+        self, chart="artist", from_uts=None, to_uts=None, user=None
+    ) -> pd.DataFrame:
+        if chart not in CHART_COLUMNS:
+            raise ValueError(f"chart must be one of {list(CHART_COLUMNS)}")
+        keys = CHART_COLUMNS[chart]
+        scrobble_df = self.load([*keys, "fechahora"], from_uts, to_uts, user)
+        first = scrobble_df.groupby(keys, sort=False).agg(
+            uts=("uts", "min"), fechahora=("fechahora", "min")
+        )
+        return first.sort_values("uts", kind="stable").reset_index()
@@ -0,0 +1,119 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+JSON_DECODERS = ("stdlib", "orjson", "msgspec")
+
+
+class StdlibDecoder:
+    name = "stdlib"
+
+    def decode(self, content: bytes, method: str | None = None) -> dict:
+        return json.loads(content)
+
+
+class OrjsonDecoder:
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ValueError("orjson is not installed")
+
+    def decode(self, content: bytes, method: str | None = None) -> dict:
+        return orjson.loads(content)
+
+
+if msgspec is not None:
+    # Solo los campos que usa TransformScrobble: imagenes, urls, loved, etc.
+    # se saltan durante el parseo sin llegar a crear objetos Python
+    class _Artist(msgspec.Struct):
+        # extended=1 trae "name"; sin extended, "#text"
+        name: str | msgspec.UnsetType = msgspec.UNSET
+        text: str | msgspec.UnsetType = msgspec.field(
+            name="#text", default=msgspec.UNSET
+        )
+        mbid: str = ""
+
+    class _Album(msgspec.Struct):
+        text: str = msgspec.field(name="#text")
+        mbid: str = ""
+
+    class _Date(msgspec.Struct):
+        uts: str
+
+    class _NowPlaying(msgspec.Struct):
+        nowplaying: str = ""
+
+    class _Track(msgspec.Struct):
+        artist: _Artist
+        album: _Album
+        name: str
+        mbid: str = ""
+        # UNSET no aparece al convertir a dict: igual que en la respuesta real
+        date: _Date | msgspec.UnsetType = msgspec.UNSET
+        attr: _NowPlaying | msgspec.UnsetType = msgspec.field(
+            name="@attr", default=msgspec.UNSET
+        )
+
+    class _PageAttr(msgspec.Struct):
+        totalPages: str
+        page: str = ""
+        perPage: str = ""
+        total: str = ""
+        user: str = ""
+
+    class _RecentTracks(msgspec.Struct):
+        track: list[_Track]
+        attr: _PageAttr = msgspec.field(name="@attr")
+
+    class _RecentTracksResponse(msgspec.Struct):
+        recenttracks: _RecentTracks | msgspec.UnsetType = msgspec.UNSET
+        error: int | msgspec.UnsetType = msgspec.UNSET
+        message: str | msgspec.UnsetType = msgspec.UNSET
+
+
+class MsgspecDecoder:
+    name = "msgspec"
+
+    def __init__(self):
+        if msgspec is None:
+            raise ValueError("msgspec is not installed")
+        self._recenttracks_decoder = msgspec.json.Decoder(_RecentTracksResponse)
+        self._decoder = msgspec.json.Decoder()
+
+    def decode(self, content: bytes, method: str | None = None) -> dict:
+        try:
+            if method == "user.getrecenttracks":
+                # Se devuelven dicts con la misma forma que response.json()
+                return msgspec.to_builtins(self._recenttracks_decoder.decode(content))
+            return self._decoder.decode(content)
+        except msgspec.DecodeError as error:
+            raise ValueError(str(error)) from error
+
+
+DECODER_CLASSES = {
+    "stdlib": StdlibDecoder,
+    "orjson": OrjsonDecoder,
+    "msgspec": MsgspecDecoder,
+}
+
+
+def get_json_decoder(name="auto"):
+    # auto: el mas rapido de los instalados, json de la libreria estandar si no
+    if name == "auto":
+        if msgspec is not None:
+            return MsgspecDecoder()
+        if orjson is not None:
+            return OrjsonDecoder()
+        return StdlibDecoder()
+    if name not in DECODER_CLASSES:
+        raise ValueError(f"json decoder must be one of {JSON_DECODERS} or auto")
+    return DECODER_CLASSES[name]()
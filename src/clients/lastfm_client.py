@@ -1,60 +1,230 @@
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import random
+import time
+
+from instrumentation.metrics import metrics
+from src.clients.json_decoders import get_json_decoder
 from traitlets import Bool
+from src.clients.rate_limiter import RateLimiter, get_rate_limiter
+from src.clients.response_cache import ResponseCache
 from src.config.config import Config
 import requests
+from requests.adapters import HTTPAdapter
 
 LAST_FM_URI = "http://ws.audioscrobbler.com/2.0/"
+# 429 y 5xx transitorios; 501 (Not Implemented) no se reintenta
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# 11: Service Offline, 16: Temporary error, 29: Rate limit exceeded
+RETRY_LASTFM_ERROR_CODES = {11, 16, 29}
 
 
 class LastfmClient:
-    def __init__(self, config: Config):
+    def __init__(
+        self,
+        config: Config,
+        pool_size=10,
+        max_retries=5,
+        backoff_factor=0.5,
+        backoff_max=60,
+        timeout=30,
+        rate_limiter: RateLimiter | None = None,
+        cache: ResponseCache | None = None,
+        uri=LAST_FM_URI,
+        json_decoder=None,
+        user="sinatxester",
+    ):
         self.LASTFM_KEY = config.get_credentials("LASTFM_KEY")
-        self.uri = LAST_FM_URI
+        # Se puede apuntar a otro servidor, p.ej. benchmarks.fake_lastfm_server
+        self.uri = uri
         self.params = {
-            "user": "sinatxester",
+            "user": user,
             "api_key": self.LASTFM_KEY,
             "format": "json",
             "extended": "1",
         }
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.session = self._create_session(pool_size)
+        # compartido por api key entre todos los clientes e hilos
+        self.rate_limiter = rate_limiter or get_rate_limiter(self.LASTFM_KEY)
+        self.cache = cache
+        # None: response.json(); si no, un decoder o su nombre (orjson, msgspec...)
+        if isinstance(json_decoder, str):
+            json_decoder = get_json_decoder(json_decoder)
+        self.json_decoder = json_decoder
+
+    def _create_session(self, pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def for_user(self, user: str) -> "LastfmClient":
+        # Copia que comparte sesion, rate limiter, cache y decoder: varios
+        # usuarios consumen el mismo presupuesto de la api key
+        client = copy.copy(self)
+        client.params = {**self.params, "user": user}
+        return client
 
     def run(self):
         lista = self.get_recenttracks()
         print(lista)
 
+    @metrics.timed("lastfm_request_seconds")
     def _make_request(self, method: str, **kwargs):
         params = self.params.copy()
         params.update({"method": method})
         params.update(kwargs)
 
-        response = requests.get(self.uri, params)
+        if self.cache is not None:
+            cached_response = self.cache.get(params)
+            if cached_response is not None:
+                metrics.inc("lastfm_cache_hits_total", method=method)
+                return cached_response
 
-        if response.status_code == 200:
-            return response.json()
-        else:
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                with metrics.timer("lastfm_http_seconds", method=method):
+                    response = self.session.get(
+                        self.uri, params=params, timeout=self.timeout
+                    )
+            except (requests.ConnectionError, requests.Timeout):
+                metrics.inc("lastfm_connection_errors_total", method=method)
+                if attempt == self.max_retries:
+                    raise
+                self._wait_before_retry(attempt)
+                continue
+            metrics.inc(
+                "lastfm_responses_total", method=method, status=response.status_code
+            )
+
+            response_json = self._read_response_json(response, method)
+            if response.status_code == 200 and "error" not in response_json:
+                if self.cache is not None:
+                    self.cache.set(params, response_json)
+                return response_json
+            if attempt < self.max_retries and self._is_transient_error(
+                response.status_code, response_json
+            ):
+                metrics.inc("lastfm_retries_total", method=method)
+                self._wait_before_retry(attempt)
+                continue
             raise ValueError(
-                f"status_code: {response.status_code}, message: {response.json()["message"]}"
+                f"status_code: {response.status_code}, message: {response_json["message"]}"
+            )
+
+    @metrics.timed("lastfm_json_decode_seconds")
+    def _read_response_json(self, response, method: str | None = None) -> dict:
+        try:
+            if self.json_decoder is None:
+                return response.json()
+            return self.json_decoder.decode(response.content, method)
+        except (requests.JSONDecodeError, ValueError) as error:
+            if response.status_code == 200:
+                # Un 200 que el decoder rechaza (p.ej. validacion de msgspec)
+                # no es una respuesta valida: ni se devuelve ni se cachea
+                raise ValueError(
+                    f"status_code: 200, invalid {method} response: {error}"
+                ) from error
+            # p.ej. paginas html de error del proxy en un 502
+            return {"message": response.text}
+
+    def _is_transient_error(self, status_code: int, response_json: dict) -> bool:
+        if status_code in RETRY_STATUS_CODES:
+            return True
+        return response_json.get("error") in RETRY_LASTFM_ERROR_CODES
+
+    def _wait_before_retry(self, attempt: int):
+        # backoff exponencial con "full jitter"
+        backoff = min(self.backoff_max, self.backoff_factor * 2**attempt)
+        time.sleep(random.uniform(0, backoff))
+
+    def get_recenttracks(self, limit=200, from_uts=None, to_uts=None, max_workers=1):
+        if max_workers > 1:
+            return self._get_recenttracks_concurrently(
+                max_workers, limit=limit, **{"from": from_uts, "to": to_uts}
             )
+        tracks_list = []
+        for page_tracks in self.iter_recenttracks(limit, from_uts, to_uts):
+            tracks_list.extend(page_tracks)
+        return tracks_list
 
-    def get_recenttracks(self, limit=200, from_uts=None, to_uts=None):
-        total_pages_attribute = self._make_request(
+    def iter_recenttracks(self, limit=200, from_uts=None, to_uts=None, batch_size=None):
+        first_response = self._make_request(
             "user.getrecenttracks", limit=limit, **{"from": from_uts, "to": to_uts}
-        )["recenttracks"]["@attr"]["totalPages"]
+        )
+        total_pages = self._get_total_pages(first_response)
+        pages_tracks = (
+            self._get_page_tracks(page, limit=limit, **{"from": from_uts, "to": to_uts})
+            for page in range(1, total_pages + 1)
+        )
+        if batch_size is None:
+            yield from pages_tracks
+        else:
+            yield from self._split_in_batches(pages_tracks, batch_size)
+
+    def get_registered_uts(self) -> int:
+        return int(self._make_request("user.getinfo")["user"]["registered"]["unixtime"])
+
+    def get_recenttracks_total_pages(
+        self, limit=200, from_uts=None, to_uts=None
+    ) -> int:
+        return int(
+            self._make_request(
+                "user.getrecenttracks", limit=limit, **{"from": from_uts, "to": to_uts}
+            )["recenttracks"]["@attr"]["totalPages"]
+        )
+
+    def get_recenttracks_page(
+        self, page, limit=200, from_uts=None, to_uts=None
+    ) -> list:
+        return self._get_page_tracks(
+            page, limit=limit, **{"from": from_uts, "to": to_uts}
+        )
+
+    def _get_total_pages(self, response: dict) -> int:
+        total_pages_attribute = response["recenttracks"]["@attr"]["totalPages"]
         if total_pages_attribute == "0":
             raise ValueError("No new scrobbles to add")
-        else:
-            total_pages_list = range(1, int(total_pages_attribute) + 1)
-            tracks_list = []
-            for i in total_pages_list:
-                tracks_list_request = self._make_request(
-                    "user.getrecenttracks",
-                    page=i,
-                    limit=limit,
-                    **{"from": from_uts, "to": to_uts},
-                )["recenttracks"]["track"]
-                tracks_list_request = self._drop_first_element_if_attr_in_keys(
-                    tracks_list_request
-                )
-                tracks_list = tracks_list + tracks_list_request
-            return tracks_list
+        return int(total_pages_attribute)
+
+    def _get_page_tracks(self, page: int, **kwargs) -> list:
+        tracks_list_request = self._make_request(
+            "user.getrecenttracks", page=page, **kwargs
+        )["recenttracks"]["track"]
+        return self._drop_first_element_if_attr_in_keys(tracks_list_request)
+
+    def _split_in_batches(self, pages_tracks, batch_size: int):
+        batch = []
+        for page_tracks in pages_tracks:
+            batch.extend(page_tracks)
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+        if batch:
+            yield batch
+
+    def _get_recenttracks_concurrently(self, max_workers: int, **kwargs) -> list:
+        first_response = self._make_request("user.getrecenttracks", **kwargs)
+        total_pages = self._get_total_pages(first_response)
+
+        # La primera respuesta ya es la pagina 1, no se vuelve a pedir
+        tracks_list = self._drop_first_element_if_attr_in_keys(
+            first_response["recenttracks"]["track"]
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # executor.map devuelve los resultados en el orden de las paginas
+            for page_tracks in executor.map(
+                lambda page: self._get_page_tracks(page, **kwargs),
+                range(2, total_pages + 1),
+            ):
+                tracks_list.extend(page_tracks)
+        return tracks_list
 
     def _check_first_element_tracks_list(self, first_element: dict) -> Bool:
         if "@attr" in first_element.keys():
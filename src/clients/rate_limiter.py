@@ -0,0 +1,87 @@
+import asyncio
+from collections import deque
+import threading
+import time
+
+# Last.fm permite 5 peticiones por segundo de media por api key
+DEFAULT_RATE = 5
+DEFAULT_CAPACITY = 5
+
+_RATE_LIMITERS = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+class RateLimiter:
+    def __init__(self, rate: float, capacity: int = 1, throughput_window: float = 60):
+        self.rate = rate
+        self.capacity = capacity
+        self.throughput_window = throughput_window
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._queue_depth = 0
+        self._acquired_at = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._leave_queue()
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._leave_queue()
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return self._queue_depth
+
+    @property
+    def throughput(self) -> float:
+        # peticiones por segundo servidas en la ultima ventana
+        with self._lock:
+            now = time.monotonic()
+            self._drop_old_acquisitions(now)
+            served = sum(1 for acquired_at in self._acquired_at if acquired_at <= now)
+            return served / self.throughput_window
+
+    def _reserve(self) -> float:
+        # Cada llamada reserva un token aunque el cubo quede en negativo,
+        # asi las esperas se reparten por orden de llegada entre hilos y tareas
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last_refill) * self.rate
+            )
+            self._last_refill = now
+            self._tokens -= 1
+            wait = 0 if self._tokens >= 0 else -self._tokens / self.rate
+            if wait > 0:
+                self._queue_depth += 1
+            self._acquired_at.append(now + wait)
+            self._drop_old_acquisitions(now)
+            return wait
+
+    def _leave_queue(self):
+        with self._lock:
+            self._queue_depth -= 1
+
+    def _drop_old_acquisitions(self, now: float):
+        while (
+            self._acquired_at and self._acquired_at[0] <= now - self.throughput_window
+        ):
+            self._acquired_at.popleft()
+
+
+def get_rate_limiter(api_key: str, rate=DEFAULT_RATE, capacity=DEFAULT_CAPACITY):
+    with _RATE_LIMITERS_LOCK:
+        if api_key not in _RATE_LIMITERS:
+            _RATE_LIMITERS[api_key] = RateLimiter(rate=rate, capacity=capacity)
+        return _RATE_LIMITERS[api_key]
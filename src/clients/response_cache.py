@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+# Last.fm acepta scrobbles con fecha de hasta 14 dias atras: una ventana
+# cerrada hace mas tiempo ya no puede cambiar
+DEFAULT_IMMUTABLE_AFTER = 14 * 24 * 60 * 60
+IGNORED_PARAMS = {"api_key"}
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        directory,
+        ttl=3600,
+        max_bytes=512 * 1024 * 1024,
+        immutable_after=DEFAULT_IMMUTABLE_AFTER,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.immutable_after = immutable_after
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._cached_paths())
+
+    def make_key(self, params: dict) -> str:
+        normalized_params = {
+            key: str(value)
+            for key, value in params.items()
+            if value is not None and key not in IGNORED_PARAMS
+        }
+        params_json = json.dumps(normalized_params, sort_keys=True)
+        return hashlib.sha256(params_json.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _cached_paths(self) -> list[str]:
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".json")
+        ]
+
+    def _is_immutable(self, params: dict) -> bool:
+        to_uts = params.get("to")
+        return to_uts is not None and int(to_uts) <= time.time() - self.immutable_after
+
+    def get(self, params: dict) -> dict | None:
+        path = self._path(self.make_key(params))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        if not entry["immutable"] and entry["stored_at"] + self.ttl < time.time():
+            self._remove(path)
+            return None
+        # mtime marca el ultimo uso para la expulsion LRU
+        os.utime(path)
+        return entry["response"]
+
+    def set(self, params: dict, response: dict):
+        path = self._path(self.make_key(params))
+        entry = {
+            "stored_at": time.time(),
+            "immutable": self._is_immutable(params),
+            "response": response,
+        }
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        with self._lock:
+            if os.path.exists(path):
+                self._size -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+            self._size += os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path: str):
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                return
+            self._size -= size
+
+    def _evict(self):
+        paths_by_last_use = sorted(self._cached_paths(), key=os.path.getmtime)
+        for path in paths_by_last_use:
+            if self._size <= self.max_bytes:
+                break
+            self._size -= os.path.getsize(path)
+            os.remove(path)
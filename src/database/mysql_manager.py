@@ -1,18 +1,529 @@
-from src.config.config import Config
+from contextlib import contextmanager
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
 import sqlalchemy
+from sqlalchemy.dialects import mysql, sqlite
+
+from instrumentation.metrics import metrics
+from src.config.config import Config
+from src.database.tables import (
+    LEGACY_NATURAL_KEY_INDEXES,
+    SCROBBLES_NATURAL_KEY,
+    SOURCE_COLUMNS,
+    daily_plays_table,
+    metadata,
+    monthly_plays_table,
+    scrobbles_natural_key_index,
+    scrobbles_user_fechahora_index,
+    scrobbles_table,
+    songs_table,
+)
+
+LOAD_METHODS = ("executemany", "load_data_infile")
+LOAD_MODES = ("insert", "upsert")
+
+# Un engine por proceso y configuracion: {clave: (pid, engine)}
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
 
 
 class MysqlManager:
-    def __init__(self, config: Config):
+    def __init__(
+        self,
+        config: Config,
+        local_infile=False,
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_recycle=3600,
+        pool_pre_ping=True,
+    ):
         self.HOST = config.get_credentials("MYSQL_HOST")
         self.PORT = config.get_credentials("MYSQL_PORT")
         self.USER = config.get_credentials("MYSQL_USER")
         self.PASSWORD = config.get_credentials("MYSQL_PASSWORD")
         self.DATABASE = config.get_credentials("MYSQL_DATABASE")
+        self.local_infile = local_infile
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self.pool_pre_ping = pool_pre_ping
+        # Permite inyectar otro engine (p.ej. SQLite) en lugar del de MySQL
+        self.engine = None
+        self._instrumented_engine = None
+        self._metrics_lock = threading.Lock()
+        self._pool_counters = {
+            "connects": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.dispose()
 
     def _create_mysql_uri(self):
         return f"mysql+pymysql://{self.USER}:{self.PASSWORD}@{self.HOST}:{self.PORT}/{self.DATABASE}"
 
-    def create_mysql_engine(self):
+    def create_mysql_engine(self, **engine_kwargs):
         uri = self._create_mysql_uri()
-        return sqlalchemy.create_engine(uri)
+        return sqlalchemy.create_engine(
+            uri,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle,
+            pool_pre_ping=self.pool_pre_ping,
+            **engine_kwargs,
+        )
+
+    def _engine_key(self) -> tuple:
+        return (
+            self._create_mysql_uri(),
+            self.local_infile,
+            self.pool_size,
+            self.max_overflow,
+            self.pool_timeout,
+            self.pool_recycle,
+            self.pool_pre_ping,
+        )
+
+    def get_engine(self):
+        if self.engine is not None:
+            engine = self.engine
+        else:
+            engine = self._get_process_engine()
+        self._instrument_pool(engine)
+        return engine
+
+    def _get_process_engine(self):
+        engine_key = self._engine_key()
+        with _ENGINES_LOCK:
+            pid, engine = _ENGINES.get(engine_key, (None, None))
+            if engine is not None and pid != os.getpid():
+                # Proceso hijo tras un fork: las conexiones heredadas son del
+                # padre, se abandonan sin cerrarlas y se crea un pool nuevo
+                engine.dispose(close=False)
+                engine = None
+            if engine is None:
+                engine_kwargs = {}
+                if self.local_infile:
+                    engine_kwargs["connect_args"] = {"local_infile": True}
+                engine = self.create_mysql_engine(**engine_kwargs)
+                _ENGINES[engine_key] = (os.getpid(), engine)
+            return engine
+
+    def dispose(self):
+        if self.engine is not None:
+            self.engine.dispose()
+            return
+        with _ENGINES_LOCK:
+            pid, engine = _ENGINES.pop(self._engine_key(), (None, None))
+        if engine is not None:
+            engine.dispose(close=pid == os.getpid())
+
+    def _instrument_pool(self, engine):
+        if engine is self._instrumented_engine or not isinstance(
+            engine, sqlalchemy.engine.Engine
+        ):
+            return
+        self._instrumented_engine = engine
+        for event_name, counter in (
+            ("connect", "connects"),
+            ("checkout", "checkouts"),
+            ("checkin", "checkins"),
+        ):
+            sqlalchemy.event.listen(engine, event_name, self._counter_listener(counter))
+
+    def _counter_listener(self, counter: str):
+        def increment_counter(*args):
+            with self._metrics_lock:
+                self._pool_counters[counter] += 1
+
+        return increment_counter
+
+    @contextmanager
+    def begin(self):
+        # Mide cuanto se espera por una conexion libre del pool
+        start = time.perf_counter()
+        with self.get_engine().begin() as connection:
+            wait_seconds = time.perf_counter() - start
+            with self._metrics_lock:
+                self._pool_counters["wait_seconds_total"] += wait_seconds
+                self._pool_counters["wait_seconds_max"] = max(
+                    self._pool_counters["wait_seconds_max"], wait_seconds
+                )
+            yield connection
+
+    def get_pool_metrics(self) -> dict:
+        pool = self.get_engine().pool
+        with self._metrics_lock:
+            pool_metrics = dict(self._pool_counters)
+        for metric in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, metric):
+                pool_metrics[metric] = getattr(pool, metric)()
+        return pool_metrics
+
+    def create_tables(self):
+        metadata.create_all(self.get_engine())
+
+    def create_natural_key_index(self):
+        # Para tablas scrobbles anteriores a la clave actual: se anaden las
+        # columnas source_* copiando artist y title y se sustituyen los
+        # indices unicos anteriores
+        engine = self.get_engine()
+        inspector = sqlalchemy.inspect(engine)
+        column_names = {
+            column["name"] for column in inspector.get_columns(scrobbles_table.name)
+        }
+        index_names = {
+            index["name"] for index in inspector.get_indexes(scrobbles_table.name)
+        }
+        with engine.begin() as connection:
+            for column, source_column in SOURCE_COLUMNS.items():
+                if column in column_names:
+                    continue
+                connection.execute(
+                    sqlalchemy.text(
+                        f"ALTER TABLE {scrobbles_table.name} ADD COLUMN {column} "
+                        "VARCHAR(255) NOT NULL DEFAULT ''"
+                    )
+                )
+                connection.execute(
+                    sqlalchemy.text(
+                        f"UPDATE {scrobbles_table.name} SET {column} = {source_column}"
+                    )
+                )
+            for index_name in LEGACY_NATURAL_KEY_INDEXES:
+                if index_name not in index_names:
+                    continue
+                drop_index_sql = f"DROP INDEX {index_name}"
+                if engine.dialect.name == "mysql":
+                    drop_index_sql += f" ON {scrobbles_table.name}"
+                connection.execute(sqlalchemy.text(drop_index_sql))
+        scrobbles_natural_key_index.create(engine, checkfirst=True)
+
+    def create_rollup_index(self):
+        # Para tablas scrobbles creadas antes de existir los rollups
+        scrobbles_user_fechahora_index.create(self.get_engine(), checkfirst=True)
+
+    def get_songs(self, since_id_can=0) -> pd.DataFrame:
+        # Solo las canciones nuevas: permite refrescar el indice en memoria
+        statement = (
+            sqlalchemy.select(songs_table)
+            .where(songs_table.c.id_can > since_id_can)
+            .order_by(songs_table.c.id_can)
+        )
+        with self.begin() as connection:
+            return pd.read_sql(statement, connection)
+
+    def insert_songs(self, songs_df: pd.DataFrame, chunk_size=1000):
+        columns = [column for column in songs_df.columns if column in songs_table.c]
+        with self.begin() as connection:
+            for start in range(0, len(songs_df), chunk_size):
+                chunk = songs_df.iloc[start : start + chunk_size][columns]
+                connection.execute(songs_table.insert(), chunk.to_dict("records"))
+
+    def _to_dataframe(self, scrobbles) -> pd.DataFrame:
+        if isinstance(scrobbles, (pa.Table, pa.RecordBatch)):
+            return scrobbles.to_pandas()
+        return scrobbles
+
+    def _table_columns(self, scrobbles_df: pd.DataFrame) -> list[str]:
+        return [
+            column.name
+            for column in scrobbles_table.columns
+            if column.name in scrobbles_df.columns
+        ]
+
+    def _prepare_scrobbles(self, scrobbles_df: pd.DataFrame, user) -> pd.DataFrame:
+        if user is not None:
+            scrobbles_df = scrobbles_df.assign(user=user)
+        if "user" not in scrobbles_df.columns:
+            raise ValueError("scrobbles need a user column or the user argument")
+        # Sin valores de origen (p.ej. sin pasar por el enricher) se usan los
+        # de artist y title
+        missing_sources = {
+            column: scrobbles_df[source_column]
+            for column, source_column in SOURCE_COLUMNS.items()
+            if column not in scrobbles_df.columns
+        }
+        if missing_sources:
+            scrobbles_df = scrobbles_df.assign(**missing_sources)
+        scrobbles_df = scrobbles_df[self._table_columns(scrobbles_df)].copy()
+        # El driver enlaza datetime de forma nativa
+        scrobbles_df["fechahora"] = pd.to_datetime(scrobbles_df["fechahora"])
+        return scrobbles_df
+
+    def save_scrobbles(
+        self,
+        scrobbles,
+        user=None,
+        chunk_size=1000,
+        method="executemany",
+        mode="insert",
+        update_rollups=False,
+    ) -> dict:
+        if method not in LOAD_METHODS:
+            raise ValueError(f"method must be one of {LOAD_METHODS}")
+        if mode not in LOAD_MODES:
+            raise ValueError(f"mode must be one of {LOAD_MODES}")
+        scrobbles_df = self._prepare_scrobbles(self._to_dataframe(scrobbles), user)
+
+        start = time.perf_counter()
+        with metrics.timer("load_seconds", method=method, mode=mode):
+            if method == "executemany":
+                self._insert_executemany(scrobbles_df, chunk_size, mode)
+            else:
+                self._insert_load_data_infile(scrobbles_df, chunk_size, mode)
+        if update_rollups:
+            with metrics.timer("rollup_seconds"):
+                self.update_rollups(scrobbles_df)
+        seconds = time.perf_counter() - start
+        metrics.inc("load_rows_total", len(scrobbles_df), method=method, mode=mode)
+
+        return {
+            "rows": len(scrobbles_df),
+            "seconds": seconds,
+            "rows_per_sec": len(scrobbles_df) / seconds if seconds else 0.0,
+        }
+
+    def _update_columns(self, columns: list[str]) -> list[str]:
+        return [column for column in columns if column not in SCROBBLES_NATURAL_KEY]
+
+    def _insert_statement(self, columns: list[str], mode: str):
+        if mode == "insert":
+            return scrobbles_table.insert()
+        # Upsert sobre el indice unico (user, uts, source_artist, source_title)
+        update_columns = self._update_columns(columns)
+        dialect_name = self.get_engine().dialect.name
+        if dialect_name == "mysql":
+            statement = mysql.insert(scrobbles_table)
+            return statement.on_duplicate_key_update(
+                {column: statement.inserted[column] for column in update_columns}
+            )
+        if dialect_name == "sqlite":
+            statement = sqlite.insert(scrobbles_table)
+            return statement.on_conflict_do_update(
+                index_elements=SCROBBLES_NATURAL_KEY,
+                set_={column: statement.excluded[column] for column in update_columns},
+            )
+        raise ValueError(f"upsert is not supported for {dialect_name}")
+
+    def _insert_executemany(
+        self, scrobbles_df: pd.DataFrame, chunk_size: int, mode: str
+    ):
+        statement = self._insert_statement(list(scrobbles_df.columns), mode)
+        # Una lista de diccionarios por chunk: el driver la envia como
+        # INSERT multi-fila en lugar de una sentencia por scrobble
+        with self.begin() as connection:
+            for start in range(0, len(scrobbles_df), chunk_size):
+                chunk = scrobbles_df.iloc[start : start + chunk_size]
+                connection.execute(statement, chunk.to_dict("records"))
+
+    def _insert_load_data_infile(
+        self, scrobbles_df: pd.DataFrame, chunk_size: int, mode: str
+    ):
+        if not self.local_infile:
+            raise ValueError(
+                "load_data_infile requires MysqlManager(local_infile=True)"
+            )
+        columns = list(scrobbles_df.columns)
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", encoding="utf-8", newline="", delete=False
+        ) as csv_file:
+            # El csv se escribe por chunks para no duplicar el DataFrame en memoria
+            for start in range(0, len(scrobbles_df), chunk_size):
+                scrobbles_df.iloc[start : start + chunk_size].to_csv(
+                    csv_file,
+                    header=False,
+                    index=False,
+                    lineterminator="\n",
+                    date_format="%Y-%m-%d %H:%M:%S",
+                )
+        try:
+            with self.begin() as connection:
+                if mode == "insert":
+                    self._load_data_infile(
+                        connection, csv_file.name, scrobbles_table.name, columns
+                    )
+                else:
+                    self._merge_from_staging(connection, csv_file.name, columns)
+        finally:
+            os.remove(csv_file.name)
+
+    def _load_data_infile(self, connection, path: str, table_name: str, columns):
+        statement = sqlalchemy.text(
+            f"LOAD DATA LOCAL INFILE :path INTO TABLE {table_name} "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            "LINES TERMINATED BY '\\n' "
+            f"({self._columns_sql(columns)})"
+        )
+        connection.execute(statement, {"path": path})
+
+    def _columns_sql(self, columns: list[str]) -> str:
+        return ", ".join(f"`{column}`" for column in columns)
+
+    def _merge_from_staging(self, connection, path: str, columns: list[str]):
+        # La tabla temporal solo existe en esta conexion: se carga el csv en
+        # bloque y se fusiona con un unico INSERT ... SELECT
+        staging_table_name = f"{scrobbles_table.name}_staging"
+        columns_sql = self._columns_sql(columns)
+        updates_sql = ", ".join(
+            f"`{column}` = VALUES(`{column}`)"
+            for column in self._update_columns(columns)
+        )
+        connection.execute(
+            sqlalchemy.text(
+                f"CREATE TEMPORARY TABLE {staging_table_name} "
+                f"LIKE {scrobbles_table.name}"
+            )
+        )
+        self._load_data_infile(connection, path, staging_table_name, columns)
+        connection.execute(
+            sqlalchemy.text(
+                f"INSERT INTO {scrobbles_table.name} ({columns_sql}) "
+                f"SELECT {columns_sql} FROM {staging_table_name} "
+                f"ON DUPLICATE KEY UPDATE {updates_sql}"
+            )
+        )
+        connection.execute(
+            sqlalchemy.text(f"DROP TEMPORARY TABLE {staging_table_name}")
+        )
+
+    def _affected_months(self, scrobbles_df: pd.DataFrame) -> dict:
+        # {(user, year, month): [dias del mes presentes en el lote]}
+        days = scrobbles_df[["user"]].assign(
+            day=scrobbles_df["fechahora"].dt.normalize()
+        )
+        days = days.drop_duplicates().sort_values(["user", "day"])
+        affected_months = {}
+        for user, day in days.itertuples(index=False):
+            key = (user, day.year, day.month)
+            affected_months.setdefault(key, []).append(day.date())
+        return affected_months
+
+    def _rollup_source(self, user, month_start, month_end):
+        return sqlalchemy.and_(
+            scrobbles_table.c.user == user,
+            scrobbles_table.c.fechahora >= month_start,
+            scrobbles_table.c.fechahora < month_end,
+        )
+
+    def _refresh_daily_plays(self, connection, user, month_start, month_end, days):
+        day = sqlalchemy.func.date(scrobbles_table.c.fechahora, type_=sqlalchemy.Date)
+        connection.execute(
+            daily_plays_table.delete().where(
+                daily_plays_table.c.user == user, daily_plays_table.c.day.in_(days)
+            )
+        )
+        plays = (
+            sqlalchemy.select(
+                scrobbles_table.c.user,
+                day,
+                scrobbles_table.c.artist,
+                scrobbles_table.c.album,
+                scrobbles_table.c.title,
+                sqlalchemy.func.count(),
+            )
+            .where(self._rollup_source(user, month_start, month_end), day.in_(days))
+            .group_by(
+                scrobbles_table.c.user,
+                day,
+                scrobbles_table.c.artist,
+                scrobbles_table.c.album,
+                scrobbles_table.c.title,
+            )
+        )
+        connection.execute(
+            daily_plays_table.insert().from_select(
+                ["user", "day", "artist", "album", "title", "plays"], plays
+            )
+        )
+
+    def _refresh_monthly_plays(
+        self, connection, user, year, month, month_start, month_end
+    ):
+        connection.execute(
+            monthly_plays_table.delete().where(
+                monthly_plays_table.c.user == user,
+                monthly_plays_table.c.year == year,
+                monthly_plays_table.c.month == month,
+            )
+        )
+        plays = (
+            sqlalchemy.select(
+                scrobbles_table.c.user,
+                sqlalchemy.literal(year),
+                sqlalchemy.literal(month),
+                scrobbles_table.c.artist,
+                scrobbles_table.c.album,
+                scrobbles_table.c.title,
+                sqlalchemy.func.count(),
+            )
+            .where(self._rollup_source(user, month_start, month_end))
+            .group_by(
+                scrobbles_table.c.user,
+                scrobbles_table.c.artist,
+                scrobbles_table.c.album,
+                scrobbles_table.c.title,
+            )
+        )
+        connection.execute(
+            monthly_plays_table.insert().from_select(
+                ["user", "year", "month", "artist", "album", "title", "plays"], plays
+            )
+        )
+
+    def update_rollups(self, scrobbles, user=None) -> dict:
+        scrobbles_df = self._prepare_scrobbles(self._to_dataframe(scrobbles), user)
+        affected_months = self._affected_months(scrobbles_df)
+        # Se recalculan desde scrobbles los dias y meses del lote: volver a
+        # cargar el mismo lote deja los rollups igual
+        with self.begin() as connection:
+            for (month_user, year, month), days in affected_months.items():
+                month_start = pd.Timestamp(year=year, month=month, day=1)
+                month_end = month_start + pd.offsets.MonthBegin()
+                month_start, month_end = (
+                    month_start.to_pydatetime(),
+                    month_end.to_pydatetime(),
+                )
+                self._refresh_daily_plays(
+                    connection, month_user, month_start, month_end, days
+                )
+                self._refresh_monthly_plays(
+                    connection, month_user, year, month, month_start, month_end
+                )
+        return {
+            "months": len(affected_months),
+            "days": sum(len(days) for days in affected_months.values()),
+        }
+
+    def get_daily_plays(self, user, from_day, to_day) -> pd.DataFrame:
+        statement = sqlalchemy.select(daily_plays_table).where(
+            daily_plays_table.c.user == user,
+            daily_plays_table.c.day >= from_day,
+            daily_plays_table.c.day <= to_day,
+        )
+        with self.begin() as connection:
+            return pd.read_sql(statement, connection)
+
+    def get_monthly_plays(self, user, year, month=None) -> pd.DataFrame:
+        statement = sqlalchemy.select(monthly_plays_table).where(
+            monthly_plays_table.c.user == user, monthly_plays_table.c.year == year
+        )
+        if month is not None:
+            statement = statement.where(monthly_plays_table.c.month == month)
+        with self.begin() as connection:
+            return pd.read_sql(statement, connection)
@@ -0,0 +1,169 @@
+import os
+import threading
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+SCROBBLES_SCHEMA = pa.schema(
+    [
+        ("uts", pa.int64()),
+        ("artist", pa.string()),
+        ("artist_mbid", pa.string()),
+        ("album", pa.string()),
+        ("album_mbid", pa.string()),
+        ("title", pa.string()),
+        ("track_mbid", pa.string()),
+        ("source_artist", pa.string()),
+        ("source_title", pa.string()),
+        ("fechahora", pa.timestamp("s")),
+        ("week", pa.int64()),
+        ("id_can", pa.int64()),
+        ("user", pa.string()),
+        ("year", pa.int64()),
+        ("month", pa.int64()),
+    ]
+)
+PARTITION_COLUMNS = ["user", "year", "month"]
+STRING_COLUMNS = [
+    field.name
+    for field in SCROBBLES_SCHEMA
+    if field.type == pa.string() and field.name not in PARTITION_COLUMNS
+]
+# Las columnas de particion viven en la ruta, no dentro de cada fichero
+FILE_SCHEMA = pa.schema(
+    [field for field in SCROBBLES_SCHEMA if field.name not in PARTITION_COLUMNS]
+)
+PARTITIONING = ds.partitioning(
+    pa.schema([SCROBBLES_SCHEMA.field(column) for column in PARTITION_COLUMNS]),
+    flavor="hive",
+)
+
+
+class ParquetSink:
+    def __init__(
+        self,
+        directory,
+        row_group_size=128 * 1024,
+        compression="zstd",
+    ):
+        self.directory = str(directory)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _file_options(self):
+        # Diccionario en las columnas de texto (artistas y albumes se repiten
+        # mucho) y estadisticas por row group para poder saltar row groups
+        return ds.ParquetFileFormat().make_write_options(
+            compression=self.compression,
+            use_dictionary=STRING_COLUMNS,
+            write_statistics=True,
+        )
+
+    def _to_table(self, scrobbles, user) -> pa.Table:
+        if isinstance(scrobbles, (pa.Table, pa.RecordBatch)):
+            scrobbles = scrobbles.to_pandas()
+        if user is not None:
+            scrobbles = scrobbles.assign(user=user)
+        if "user" not in scrobbles.columns:
+            raise ValueError("scrobbles need a user column or the user argument")
+        scrobbles = scrobbles.assign(fechahora=pd.to_datetime(scrobbles["fechahora"]))
+        fechahora = scrobbles["fechahora"].dt
+        # Las claves de particion las calcula el enricher; si faltan se derivan
+        defaults = {
+            "year": lambda: fechahora.year,
+            "month": lambda: fechahora.month,
+            "week": lambda: fechahora.isocalendar().week,
+            "id_can": lambda: pd.Series(pd.NA, index=scrobbles.index, dtype="Int64"),
+            "source_artist": lambda: scrobbles["artist"],
+            "source_title": lambda: scrobbles["title"],
+        }
+        for column, default in defaults.items():
+            if column not in scrobbles.columns:
+                scrobbles[column] = default()
+        return pa.Table.from_pandas(
+            scrobbles[SCROBBLES_SCHEMA.names],
+            schema=SCROBBLES_SCHEMA,
+            preserve_index=False,
+        )
+
+    def write(self, scrobbles, user=None) -> dict:
+        table = self._to_table(scrobbles, user)
+        if table.num_rows == 0:
+            return {"rows": 0, "files": []}
+        files = []
+        with self._lock:
+            # Cada lote escribe ficheros nuevos: nunca se reescribe uno existente
+            ds.write_dataset(
+                table,
+                self.directory,
+                format="parquet",
+                partitioning=PARTITIONING,
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+                file_options=self._file_options(),
+                min_rows_per_group=min(self.row_group_size, table.num_rows),
+                max_rows_per_group=self.row_group_size,
+                file_visitor=lambda written_file: files.append(written_file.path),
+            )
+        return {"rows": table.num_rows, "files": files}
+
+    def dataset(self) -> ds.Dataset:
+        return ds.dataset(
+            self.directory,
+            format="parquet",
+            schema=SCROBBLES_SCHEMA,
+            partitioning=PARTITIONING,
+        )
+
+    def read(self, columns=None, filter=None) -> pa.Table:
+        # El filtro se empuja a las particiones y a las estadisticas de row group.
+        # El lock evita leer en mitad de un compact de este mismo sink
+        with self._lock:
+            return self.dataset().to_table(columns=columns, filter=filter)
+
+    def _partition_directories(self):
+        for root, _, files in os.walk(self.directory):
+            parquet_files = sorted(
+                os.path.join(root, file) for file in files if file.endswith(".parquet")
+            )
+            if parquet_files:
+                yield root, parquet_files
+
+    def compact(self, min_files=2) -> dict:
+        compacted = {}
+        with self._lock:
+            for directory, parquet_files in self._partition_directories():
+                if len(parquet_files) < min_files:
+                    continue
+                table = (
+                    ds.dataset(parquet_files, format="parquet", schema=FILE_SCHEMA)
+                    .to_table()
+                    .sort_by("uts")
+                )
+                name = f"part-{uuid.uuid4().hex}-0.parquet"
+                target = os.path.join(directory, name)
+                # Se escribe a un temporal con prefijo "_", que el descubrimiento
+                # de pyarrow ignora, y se renombra: nunca se lee a medias. Entre
+                # el rename y el borrado de los originales un lector de otro
+                # proceso ve las filas dos veces; los de este sink esperan al lock
+                temporary = os.path.join(directory, f"_{name}.tmp")
+                pq.write_table(
+                    table,
+                    temporary,
+                    row_group_size=self.row_group_size,
+                    compression=self.compression,
+                    use_dictionary=STRING_COLUMNS,
+                    write_statistics=True,
+                )
+                os.replace(temporary, target)
+                for parquet_file in parquet_files:
+                    os.remove(parquet_file)
+                compacted[os.path.relpath(directory, self.directory)] = len(
+                    parquet_files
+                )
+        return compacted
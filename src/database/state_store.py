@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+
+
+class StateStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = self._read_state()
+
+    def _read_state(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_state(self):
+        # Escritura atomica: un fallo a mitad nunca deja el fichero corrupto
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _user_state(self, user: str) -> dict:
+        return self._state.setdefault(user, {"watermark": None, "backfill": None})
+
+    def get_watermark(self, user: str) -> int | None:
+        with self._lock:
+            return self._user_state(user)["watermark"]
+
+    def set_watermark(self, user: str, uts: int):
+        with self._lock:
+            self._user_state(user)["watermark"] = uts
+            self._write_state()
+
+    def get_backfill(self, user: str) -> dict | None:
+        with self._lock:
+            return self._user_state(user)["backfill"]
+
+    def start_backfill(self, user: str, from_uts, to_uts, total_pages: int):
+        with self._lock:
+            self._user_state(user)["backfill"] = {
+                "from": from_uts,
+                "to": to_uts,
+                "total_pages": total_pages,
+                "completed_pages": [],
+                "max_uts": None,
+            }
+            self._write_state()
+
+    def complete_page(self, user: str, page: int, max_uts: int | None):
+        with self._lock:
+            backfill = self._user_state(user)["backfill"]
+            backfill["completed_pages"].append(page)
+            if max_uts is not None:
+                backfill["max_uts"] = max(backfill["max_uts"] or max_uts, max_uts)
+            self._write_state()
+
+    def finish_backfill(self, user: str):
+        # El watermark solo avanza cuando se han cargado todas las paginas
+        with self._lock:
+            user_state = self._user_state(user)
+            max_uts = user_state["backfill"]["max_uts"]
+            if max_uts is not None:
+                user_state["watermark"] = max(
+                    user_state["watermark"] or max_uts, max_uts
+                )
+            user_state["backfill"] = None
+            self._write_state()
@@ -0,0 +1,89 @@
+import sqlalchemy
+
+metadata = sqlalchemy.MetaData()
+
+# En SQLite solo INTEGER PRIMARY KEY es autoincremental
+ID_TYPE = sqlalchemy.BigInteger().with_variant(sqlalchemy.Integer(), "sqlite")
+
+scrobbles_table = sqlalchemy.Table(
+    "scrobbles",
+    metadata,
+    sqlalchemy.Column("id", ID_TYPE, primary_key=True, autoincrement=True),
+    sqlalchemy.Column("user", sqlalchemy.String(64), nullable=False),
+    sqlalchemy.Column("uts", sqlalchemy.BigInteger, nullable=False),
+    sqlalchemy.Column("artist", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("artist_mbid", sqlalchemy.String(36), nullable=False),
+    sqlalchemy.Column("album", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("album_mbid", sqlalchemy.String(36), nullable=False),
+    sqlalchemy.Column("title", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("track_mbid", sqlalchemy.String(36), nullable=False),
+    sqlalchemy.Column("fechahora", sqlalchemy.DateTime, nullable=False),
+    sqlalchemy.Column("id_can", sqlalchemy.BigInteger, nullable=True),
+    # Artista y titulo tal como los envia Last.fm, antes de la limpieza
+    sqlalchemy.Column("source_artist", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("source_title", sqlalchemy.String(255), nullable=False),
+)
+# Columna source_* -> columna limpia de la que se copia si falta
+SOURCE_COLUMNS = {"source_artist": "artist", "source_title": "title"}
+
+# Clave natural de un scrobble: los reintentos y ventanas solapadas
+# vuelven a entregar las mismas filas y no deben duplicarse. Se usan los
+# valores de origen: si cambia una regla de limpieza o se reprocesa, la
+# recarga actualiza artist y title en lugar de insertar otra fila. El mbid
+# no sirve: suele venir vacio y Last.fm puede rellenarlo mas tarde
+SCROBBLES_NATURAL_KEY = ["user", "uts", "source_artist", "source_title"]
+# Indices de claves anteriores, sobre artist y title limpios o sobre el mbid
+LEGACY_NATURAL_KEY_INDEXES = [
+    "uq_scrobbles_user_uts_track",
+    "uq_scrobbles_user_uts_mbid",
+]
+scrobbles_natural_key_index = sqlalchemy.Index(
+    "uq_scrobbles_user_uts_source_track",
+    *(scrobbles_table.c[column] for column in SCROBBLES_NATURAL_KEY),
+    unique=True,
+)
+# Los rollups recalculan un mes de un usuario: sin este indice cada carga
+# recorreria todo su historico
+scrobbles_user_fechahora_index = sqlalchemy.Index(
+    "ix_scrobbles_user_fechahora", scrobbles_table.c.user, scrobbles_table.c.fechahora
+)
+
+# Dimension de canciones: cada scrobble apunta a su cancion mediante id_can
+songs_table = sqlalchemy.Table(
+    "songs",
+    metadata,
+    sqlalchemy.Column("id_can", ID_TYPE, primary_key=True, autoincrement=True),
+    sqlalchemy.Column("artist", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("album", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("title", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("track_mbid", sqlalchemy.String(36), nullable=False),
+)
+
+# Rollups de escuchas por cancion: se recalculan solo los dias y meses que
+# toca cada carga, asi los cuadros de mando no recorren todo el historico
+daily_plays_table = sqlalchemy.Table(
+    "daily_plays",
+    metadata,
+    sqlalchemy.Column("id", ID_TYPE, primary_key=True, autoincrement=True),
+    sqlalchemy.Column("user", sqlalchemy.String(64), nullable=False),
+    sqlalchemy.Column("day", sqlalchemy.Date, nullable=False),
+    sqlalchemy.Column("artist", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("album", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("title", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("plays", sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Index("ix_daily_plays_user_day", "user", "day"),
+)
+
+monthly_plays_table = sqlalchemy.Table(
+    "monthly_plays",
+    metadata,
+    sqlalchemy.Column("id", ID_TYPE, primary_key=True, autoincrement=True),
+    sqlalchemy.Column("user", sqlalchemy.String(64), nullable=False),
+    sqlalchemy.Column("year", sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column("month", sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column("artist", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("album", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("title", sqlalchemy.String(255), nullable=False),
+    sqlalchemy.Column("plays", sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Index("ix_monthly_plays_user_year_month", "user", "year", "month"),
+)
@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+# 30 dias por ventana
+DEFAULT_WINDOW_SECONDS = 30 * 24 * 60 * 60
+
+
+class BackfillPlanner:
+    def __init__(
+        self,
+        client,
+        window_seconds=DEFAULT_WINDOW_SECONDS,
+        max_workers=4,
+        max_attempts=3,
+        limit=200,
+    ):
+        self.client = client
+        self.window_seconds = window_seconds
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.limit = limit
+
+    def plan_windows(self, from_uts: int, to_uts: int) -> list[tuple[int, int]]:
+        # Ventanas de la mas reciente a la mas antigua, igual que la API.
+        # Ventanas contiguas comparten el segundo frontera para no dejar
+        # huecos; los duplicados se eliminan en merge_windows
+        windows = []
+        window_to = to_uts
+        while window_to > from_uts:
+            window_from = max(from_uts, window_to - self.window_seconds)
+            windows.append((window_from, window_to))
+            window_to = window_from
+        return windows
+
+    def fetch_window(self, window: tuple[int, int]) -> list:
+        window_from, window_to = window
+        total_pages = self.client.get_recenttracks_total_pages(
+            self.limit, window_from, window_to
+        )
+        tracks_list = []
+        for page in range(1, total_pages + 1):
+            tracks_list.extend(
+                self.client.get_recenttracks_page(
+                    page, self.limit, window_from, window_to
+                )
+            )
+        return tracks_list
+
+    def _fetch_window_with_retries(self, window: tuple[int, int]) -> list:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return self.fetch_window(window)
+            except Exception:
+                if attempt == self.max_attempts:
+                    raise
+
+    def fetch_windows(self, windows: list[tuple[int, int]]) -> list[list]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._fetch_window_with_retries, window)
+                for window in windows
+            ]
+        windows_tracks = []
+        failed_windows = []
+        for window, future in zip(windows, futures):
+            if future.exception() is not None:
+                failed_windows.append(window)
+            else:
+                windows_tracks.append(future.result())
+        if failed_windows:
+            raise ValueError(f"Failed backfill windows: {failed_windows}")
+        return windows_tracks
+
+    def _track_key(self, track: dict) -> tuple:
+        artist = track["artist"].get("name", track["artist"].get("#text"))
+        return (track["date"]["uts"], artist, track["name"])
+
+    def merge_windows(self, windows_tracks: list[list]) -> list:
+        seen_keys = set()
+        tracks_list = []
+        for window_tracks in windows_tracks:
+            for track in window_tracks:
+                track_key = self._track_key(track)
+                if track_key not in seen_keys:
+                    seen_keys.add(track_key)
+                    tracks_list.append(track)
+        return tracks_list
+
+    def backfill(self, from_uts: int | None = None, to_uts: int | None = None) -> list:
+        if from_uts is None:
+            from_uts = self.client.get_registered_uts()
+        if to_uts is None:
+            to_uts = int(time.time())
+        windows = self.plan_windows(from_uts, to_uts)
+        return self.merge_windows(self.fetch_windows(windows))
@@ -0,0 +1,65 @@
+import csv
+import os
+import re
+
+import pandas as pd
+
+CLEANSING_FIELDS = ("artist", "album", "title")
+MATCH_TYPES = ("exact", "casefold", "regex")
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "cleansing_rules.csv")
+
+
+class CleansingRules:
+    def __init__(self, rules: list[dict], version=None):
+        self.version = version
+        # Las reglas se compilan en tablas de mapeo por campo
+        self.exact = {field: {} for field in CLEANSING_FIELDS}
+        self.casefold = {field: {} for field in CLEANSING_FIELDS}
+        self.regex = {field: [] for field in CLEANSING_FIELDS}
+        for rule in rules:
+            self._add_rule(rule)
+
+    def _add_rule(self, rule: dict):
+        field, match = rule["field"], rule["match"]
+        if field not in CLEANSING_FIELDS:
+            raise ValueError(f"field must be one of {CLEANSING_FIELDS}: {field}")
+        if match == "exact":
+            self.exact[field][rule["pattern"]] = rule["replacement"]
+        elif match == "casefold":
+            self.casefold[field][rule["pattern"].casefold()] = rule["replacement"]
+        elif match == "regex":
+            self.regex[field].append((re.compile(rule["pattern"]), rule["replacement"]))
+        else:
+            raise ValueError(f"match must be one of {MATCH_TYPES}: {match}")
+
+    @classmethod
+    def from_csv(cls, path=DEFAULT_RULES_PATH) -> "CleansingRules":
+        # Primera linea opcional "# version: N"; el resto de "#" son comentarios
+        version = None
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            lines = f.read().splitlines()
+        if lines and lines[0].startswith("# version:"):
+            version = lines[0].split(":", 1)[1].strip()
+        rules_lines = [line for line in lines if not line.startswith("#")]
+        return cls(list(csv.DictReader(rules_lines)), version=version)
+
+    def _clean_values(self, field: str, values: pd.Series) -> pd.Series:
+        if self.exact[field]:
+            values = values.replace(self.exact[field])
+        if self.casefold[field]:
+            casefold_values = values.str.casefold().map(self.casefold[field])
+            values = casefold_values.where(casefold_values.notna(), values)
+        for pattern, replacement in self.regex[field]:
+            values = values.str.replace(pattern, replacement, regex=True)
+        return values
+
+    def apply(self, scrobble_df: pd.DataFrame) -> pd.DataFrame:
+        scrobble_df = scrobble_df.copy()
+        for field in CLEANSING_FIELDS:
+            # Las reglas se aplican solo a los valores distintos y el
+            # resultado se expande con take: un artista repetido 10.000
+            # veces se limpia una sola vez
+            codes, uniques = pd.factorize(scrobble_df[field])
+            cleaned_uniques = self._clean_values(field, pd.Series(uniques))
+            scrobble_df[field] = cleaned_uniques.to_numpy()[codes]
+        return scrobble_df
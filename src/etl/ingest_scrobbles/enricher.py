@@ -1,24 +1,75 @@
 import pandas as pd
 
 from database.mysql_manager import MysqlManager
-from models.scrobble import Scrobble
+from etl.ingest_scrobbles.cleansing import CleansingRules
+from etl.ingest_scrobbles.song_index import SongIndex
+from instrumentation.metrics import metrics
+from models.scrobble import Scrobble, ScrobbleRecord
+
+# Artista y titulo tal como llegan de Last.fm, antes de la limpieza
+SOURCE_COLUMNS = {"source_artist": "artist", "source_title": "title"}
 
 
 class EnrichScrobble:
-    def __init__(self, scrobbles_list: list[Scrobble], database_manager=MysqlManager):
+    def __init__(
+        self,
+        scrobbles_list: list[Scrobble] | list[ScrobbleRecord] | pd.DataFrame,
+        database_manager=MysqlManager,
+        song_index: SongIndex | None = None,
+        cleansing_rules: CleansingRules | None = None,
+        timezone: str | None = None,
+    ):
         self.database_manager = database_manager
         self.scrobbles_list = scrobbles_list
+        self.song_index = song_index
+        self.cleansing_rules = cleansing_rules
+        self.timezone = timezone
 
-    def _create_dataframe(self, scrobbles_list: list[Scrobble]) -> pd.DataFrame:
+    def _create_dataframe(
+        self, scrobbles_list: list[Scrobble] | list[ScrobbleRecord] | pd.DataFrame
+    ) -> pd.DataFrame:
+        # TransformScrobble.transform_tracks_to_dataframe ya entrega columnas
+        if isinstance(scrobbles_list, pd.DataFrame):
+            return scrobbles_list.copy()
+        if scrobbles_list and isinstance(scrobbles_list[0], ScrobbleRecord):
+            return pd.DataFrame.from_records(
+                scrobbles_list, columns=ScrobbleRecord._fields
+            )
         scrobbles_dictionary_list = [
             scrobble.model_dump() for scrobble in scrobbles_list
         ]
         return pd.DataFrame(scrobbles_dictionary_list)
 
+    def _uts_to_fechahora(self, uts: pd.Series) -> pd.Series:
+        # fechahora es datetime64 sin zona: la hora local de self.timezone
+        # (logica de utslocal) o UTC si no se indica zona
+        fechahora = pd.to_datetime(uts, unit="s", utc=True)
+        if self.timezone is not None:
+            fechahora = fechahora.dt.tz_convert(self.timezone)
+        return fechahora.dt.tz_localize(None)
+
+    def _add_partition_keys(self, scrobble_df: pd.DataFrame) -> pd.DataFrame:
+        fechahora = scrobble_df["fechahora"].dt
+        scrobble_df["year"] = fechahora.year.astype("int64")
+        scrobble_df["month"] = fechahora.month.astype("int64")
+        # Semana ISO: los primeros dias de enero pueden caer en la semana 52/53
+        scrobble_df["week"] = fechahora.isocalendar().week.astype("int64")
+        return scrobble_df
+
+    @metrics.timed("enrich_seconds")
     def enrich_scrobble(self):
         scrobble_df = self._create_dataframe(self.scrobbles_list)
-        scrobble_df["fechahora"] = pd.to_datetime(
-            scrobble_df["uts"], unit="s"
-        ).dt.strftime("%Y-%m-%d %H:%M:%S")
+        scrobble_df["fechahora"] = self._uts_to_fechahora(scrobble_df["uts"])
+        scrobble_df = self._add_partition_keys(scrobble_df)
+        # Valores de origen para la clave natural: la limpieza no los toca y
+        # un reproceso los conserva
+        for column, source_column in SOURCE_COLUMNS.items():
+            if column not in scrobble_df.columns:
+                scrobble_df[column] = scrobble_df[source_column]
+        # Las correcciones se aplican antes de cargar, no como UPDATE despues
+        if self.cleansing_rules is not None:
+            scrobble_df = self.cleansing_rules.apply(scrobble_df)
         scrobble_df.loc[scrobble_df.album == "", "album"] = "[Desconocido]"
+        if self.song_index is not None:
+            scrobble_df["id_can"] = self.song_index.resolve(scrobble_df)
         return scrobble_df
@@ -0,0 +1,61 @@
+import time
+
+from database.state_store import StateStore
+
+
+class IncrementalIngest:
+    def __init__(self, client, state_store: StateStore, limit=200):
+        self.client = client
+        self.state_store = state_store
+        self.limit = limit
+        self.user = client.params["user"]
+
+    def _start_backfill(self) -> dict | None:
+        watermark = self.state_store.get_watermark(self.user)
+        from_uts = watermark + 1 if watermark is not None else None
+        # Fijar "to" mantiene estables los limites de pagina si el backfill
+        # se interrumpe y se reanuda mas tarde
+        to_uts = int(time.time())
+        total_pages = self.client.get_recenttracks_total_pages(
+            self.limit, from_uts, to_uts
+        )
+        if total_pages == 0:
+            return None
+        self.state_store.start_backfill(self.user, from_uts, to_uts, total_pages)
+        return self.state_store.get_backfill(self.user)
+
+    def get_pending_pages(self) -> list[int]:
+        backfill = self.state_store.get_backfill(self.user) or self._start_backfill()
+        if backfill is None:
+            return []
+        completed_pages = set(backfill["completed_pages"])
+        return [
+            page
+            for page in range(1, backfill["total_pages"] + 1)
+            if page not in completed_pages
+        ]
+
+    def fetch_page(self, page: int) -> list:
+        backfill = self.state_store.get_backfill(self.user)
+        return self.client.get_recenttracks_page(
+            page, self.limit, backfill["from"], backfill["to"]
+        )
+
+    def complete_page(self, page: int, tracks_list: list):
+        max_uts = max(
+            (int(track["date"]["uts"]) for track in tracks_list), default=None
+        )
+        self.state_store.complete_page(self.user, page, max_uts)
+
+    def finish(self):
+        if self.state_store.get_backfill(self.user) is not None:
+            self.state_store.finish_backfill(self.user)
+
+    def iter_pages(self):
+        # La pagina se marca como completada cuando se pide la siguiente,
+        # es decir, cuando el consumidor ya la ha procesado
+        for page in self.get_pending_pages():
+            tracks_list = self.fetch_page(page)
+            yield tracks_list
+            self.complete_page(page, tracks_list)
+        self.finish()
@@ -0,0 +1,138 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
+import time
+
+import pandas as pd
+
+from database.state_store import StateStore
+from etl.ingest_scrobbles.enricher import EnrichScrobble
+from etl.ingest_scrobbles.incremental_ingest import IncrementalIngest
+from etl.ingest_scrobbles.pipeline import ingest_enricher_kwargs
+from etl.ingest_scrobbles.transformer import TransformScrobble
+
+
+class MultiUserIngest:
+    def __init__(
+        self,
+        client,
+        users: list[str],
+        state_store: StateStore,
+        loader,
+        max_workers=4,
+        limit=200,
+        transformer: TransformScrobble | None = None,
+        enricher_kwargs: dict | None = None,
+    ):
+        if not users:
+            raise ValueError("users must not be empty")
+        # Un IncrementalIngest por usuario: cada uno con su watermark y su
+        # backfill en el StateStore, todos sobre la misma sesion y rate limiter
+        self.ingests = {
+            user: IncrementalIngest(client.for_user(user), state_store, limit)
+            for user in dict.fromkeys(users)
+        }
+        # loader(scrobble_df, user) carga la pagina enriquecida de un usuario
+        self.loader = loader
+        self.max_workers = max_workers
+        self.transformer = transformer or TransformScrobble()
+        self.enricher_kwargs = enricher_kwargs or {}
+        # El SongIndex no es thread-safe: con indice, enrich de uno en uno
+        self._enrich_lock = (
+            threading.Lock() if "song_index" in self.enricher_kwargs else None
+        )
+        # Un lock de carga por usuario: dos cargas del mismo usuario a la vez
+        # borrarian e insertarian los mismos rollups en transacciones
+        # concurrentes (deadlock en InnoDB). Las descargas si van en paralelo
+        self._load_locks = {user: threading.Lock() for user in self.ingests}
+
+    def _enrich(self, scrobble_df: pd.DataFrame) -> pd.DataFrame:
+        enricher = EnrichScrobble(scrobble_df, **self.enricher_kwargs)
+        if self._enrich_lock is None:
+            return enricher.enrich_scrobble()
+        with self._enrich_lock:
+            return enricher.enrich_scrobble()
+
+    def _process_page(self, user: str, page: int) -> int:
+        ingest = self.ingests[user]
+        tracks_list = ingest.fetch_page(page)
+        scrobble_df = self.transformer.transform_tracks_to_dataframe(tracks_list)
+        if not scrobble_df.empty:
+            enriched_df = self._enrich(scrobble_df)
+            with self._load_locks[user]:
+                self.loader(enriched_df, user)
+        ingest.complete_page(page, tracks_list)
+        return len(scrobble_df)
+
+    def _pending_pages(self, report: dict) -> dict:
+        pending = {}
+        for user, ingest in self.ingests.items():
+            try:
+                pending[user] = deque(ingest.get_pending_pages())
+            except Exception as error:
+                report[user]["error"] = str(error)
+        return pending
+
+    def run(self) -> dict:
+        start = time.perf_counter()
+        report = {user: {"pages": 0, "rows": 0, "error": None} for user in self.ingests}
+        pending = self._pending_pages(report)
+        # Turno rotatorio: cada usuario con paginas pendientes envia una y
+        # vuelve al final de la cola, asi un backfill de miles de paginas no
+        # deja esperando a la ingesta diaria de los demas
+        turns = deque(user for user, pages in pending.items() if pages)
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while turns or in_flight:
+                while turns and len(in_flight) < self.max_workers:
+                    user = turns.popleft()
+                    page = pending[user].popleft()
+                    future = executor.submit(self._process_page, user, page)
+                    in_flight[future] = user
+                    if pending[user]:
+                        turns.append(user)
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    user = in_flight.pop(future)
+                    try:
+                        rows = future.result()
+                    except Exception as error:
+                        # El error solo detiene a ese usuario; sus paginas
+                        # completadas quedan guardadas para reanudar
+                        report[user]["error"] = str(error)
+                        pending[user].clear()
+                        if user in turns:
+                            turns.remove(user)
+                        continue
+                    report[user]["pages"] += 1
+                    report[user]["rows"] += rows
+
+        for user, ingest in self.ingests.items():
+            if report[user]["error"] is None:
+                ingest.finish()
+        return {"seconds": time.perf_counter() - start, "users": report}
+
+
+def ingest_users(
+    client,
+    users,
+    state_store,
+    database_manager,
+    limit=200,
+    enricher_kwargs=None,
+    **ingest_kwargs,
+) -> dict:
+    def loader(scrobble_df: pd.DataFrame, user: str):
+        database_manager.save_scrobbles(
+            scrobble_df, user=user, mode="upsert", update_rollups=True
+        )
+
+    return MultiUserIngest(
+        client,
+        users,
+        state_store,
+        loader,
+        limit=limit,
+        enricher_kwargs=ingest_enricher_kwargs(database_manager, enricher_kwargs),
+        **ingest_kwargs,
+    ).run()
@@ -0,0 +1,204 @@
+import queue
+import threading
+import time
+
+import pandas as pd
+
+from etl.ingest_scrobbles.cleansing import CleansingRules
+from etl.ingest_scrobbles.enricher import EnrichScrobble
+from etl.ingest_scrobbles.incremental_ingest import IncrementalIngest
+from etl.ingest_scrobbles.song_index import SongIndex
+from etl.ingest_scrobbles.transformer import TransformScrobble
+
+STAGES = ("fetch", "transform", "enrich", "load")
+DEFAULT_WORKERS = {"fetch": 4, "transform": 1, "enrich": 1, "load": 1}
+
+# Marca de fin de datos que cada etapa pasa a la siguiente
+_STOP = object()
+
+
+class IngestPipeline:
+    def __init__(
+        self,
+        ingest: IncrementalIngest,
+        loader,
+        transformer: TransformScrobble | None = None,
+        enricher_kwargs: dict | None = None,
+        workers: dict | None = None,
+        queue_size=4,
+        poll_seconds=0.1,
+    ):
+        self.ingest = ingest
+        # loader(scrobble_df) carga un lote enriquecido, p.ej. save_scrobbles
+        self.loader = loader
+        self.transformer = transformer or TransformScrobble()
+        # El enricher con SongIndex no es thread-safe: enrich con 1 worker
+        self.enricher_kwargs = enricher_kwargs or {}
+        self.workers = {**DEFAULT_WORKERS, **(workers or {})}
+        unknown_stages = set(self.workers) - set(STAGES)
+        if unknown_stages:
+            raise ValueError(f"unknown pipeline stages: {sorted(unknown_stages)}")
+        self.queue_size = queue_size
+        self.poll_seconds = poll_seconds
+        self._stop_event = threading.Event()
+        self._errors = []
+        self._metrics_lock = threading.Lock()
+        self._stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self._rows = 0
+        self._pages = 0
+
+    def _fetch(self, item):
+        page, _, _ = item
+        tracks_list = self.ingest.fetch_page(page)
+        return page, tracks_list, tracks_list
+
+    def _transform(self, item):
+        page, tracks_list, _ = item
+        return (
+            page,
+            tracks_list,
+            self.transformer.transform_tracks_to_dataframe(tracks_list),
+        )
+
+    def _enrich(self, item):
+        page, tracks_list, scrobble_df = item
+        if not scrobble_df.empty:
+            scrobble_df = EnrichScrobble(
+                scrobble_df, **self.enricher_kwargs
+            ).enrich_scrobble()
+        return page, tracks_list, scrobble_df
+
+    def _load(self, item):
+        page, tracks_list, scrobble_df = item
+        if not scrobble_df.empty:
+            self.loader(scrobble_df)
+        # La pagina solo cuenta como completada cuando ya esta cargada
+        self.ingest.complete_page(page, tracks_list)
+        with self._metrics_lock:
+            self._rows += len(scrobble_df)
+            self._pages += 1
+        return None
+
+    def _put(self, output_queue: queue.Queue, item) -> bool:
+        # put con timeout: si otra etapa falla no se queda bloqueado para siempre
+        while not self._stop_event.is_set():
+            try:
+                output_queue.put(item, timeout=self.poll_seconds)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, input_queue: queue.Queue):
+        while not self._stop_event.is_set():
+            try:
+                return input_queue.get(timeout=self.poll_seconds)
+            except queue.Empty:
+                continue
+        return _STOP
+
+    def _worker(self, stage, function, input_queue, output_queue):
+        while True:
+            item = self._get(input_queue)
+            if item is _STOP:
+                return
+            start = time.perf_counter()
+            try:
+                result = function(item)
+            except Exception as error:
+                with self._metrics_lock:
+                    self._errors.append((stage, error))
+                self._stop_event.set()
+                return
+            with self._metrics_lock:
+                self._stage_seconds[stage] += time.perf_counter() - start
+            if output_queue is not None and not self._put(output_queue, result):
+                return
+
+    def run(self) -> dict:
+        start = time.perf_counter()
+        pages = self.ingest.get_pending_pages()
+        functions = {
+            "fetch": self._fetch,
+            "transform": self._transform,
+            "enrich": self._enrich,
+            "load": self._load,
+        }
+        # La cola de paginas se llena de inicio; las demas estan acotadas y
+        # frenan a la etapa anterior si la siguiente va mas lenta
+        queues = [queue.Queue()] + [
+            queue.Queue(maxsize=self.queue_size) for _ in STAGES[1:]
+        ]
+        for page in pages:
+            queues[0].put((page, None, None))
+        for _ in range(self.workers["fetch"]):
+            queues[0].put(_STOP)
+
+        stage_threads = []
+        for index, stage in enumerate(STAGES):
+            output_queue = queues[index + 1] if index + 1 < len(STAGES) else None
+            threads = [
+                threading.Thread(
+                    target=self._worker,
+                    args=(stage, functions[stage], queues[index], output_queue),
+                    name=f"ingest-{stage}-{number}",
+                    daemon=True,
+                )
+                for number in range(self.workers[stage])
+            ]
+            for thread in threads:
+                thread.start()
+            stage_threads.append(threads)
+
+        # Cuando todos los workers de una etapa terminan se avisa a la siguiente
+        for index, threads in enumerate(stage_threads):
+            for thread in threads:
+                thread.join()
+            if index + 1 < len(STAGES):
+                for _ in range(self.workers[STAGES[index + 1]]):
+                    if not self._put(queues[index + 1], _STOP):
+                        break
+
+        if self._errors:
+            stage, error = self._errors[0]
+            raise ValueError(f"ingest pipeline failed in {stage}: {error}") from error
+        self.ingest.finish()
+        return {
+            "pages": self._pages,
+            "rows": self._rows,
+            "seconds": time.perf_counter() - start,
+            "stage_seconds": dict(self._stage_seconds),
+        }
+
+
+def ingest_enricher_kwargs(database_manager, enricher_kwargs=None) -> dict:
+    # La ingesta real limpia con cleansing_rules.csv y resuelve el id_can de
+    # cada scrobble contra la tabla songs
+    return {
+        "song_index": SongIndex(database_manager),
+        "cleansing_rules": CleansingRules.from_csv(),
+        **(enricher_kwargs or {}),
+    }
+
+
+def ingest_scrobbles(
+    client,
+    state_store,
+    database_manager,
+    limit=200,
+    enricher_kwargs=None,
+    **pipeline_kwargs,
+) -> dict:
+    ingest = IncrementalIngest(client, state_store, limit)
+
+    def loader(scrobble_df: pd.DataFrame):
+        database_manager.save_scrobbles(
+            scrobble_df, user=ingest.user, mode="upsert", update_rollups=True
+        )
+
+    return IngestPipeline(
+        ingest,
+        loader,
+        enricher_kwargs=ingest_enricher_kwargs(database_manager, enricher_kwargs),
+        **pipeline_kwargs,
+    ).run()
@@ -0,0 +1,132 @@
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from database.parquet_sink import ParquetSink
+from etl.ingest_scrobbles.enricher import SOURCE_COLUMNS, EnrichScrobble
+from etl.ingest_scrobbles.song_index import SongIndex
+from etl.ingest_scrobbles.transformer import SCROBBLE_COLUMNS, TransformScrobble
+
+
+def _to_ipc(scrobble_df: pd.DataFrame) -> bytes:
+    # Arrow IPC: el proceso padre recibe un bloque de bytes contiguo en lugar
+    # de una lista de objetos que pickle tendria que recorrer uno a uno
+    table = pa.Table.from_pandas(scrobble_df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _from_ipc(buffer: bytes) -> pa.Table:
+    return pa.ipc.open_stream(buffer).read_all()
+
+
+def _drop_now_playing(tracks_list: list) -> list:
+    return [track for track in tracks_list if "@attr" not in track]
+
+
+def _reprocess_pages(pages: list[list], enricher_kwargs: dict) -> bytes:
+    tracks_list = [track for page in pages for track in _drop_now_playing(page)]
+    scrobble_df = TransformScrobble().transform_tracks_to_dataframe(tracks_list)
+    enriched_df = EnrichScrobble(scrobble_df, **enricher_kwargs).enrich_scrobble()
+    return _to_ipc(enriched_df)
+
+
+def _reprocess_row_group(
+    path: str, row_group: int, partition: dict, enricher_kwargs: dict
+) -> bytes:
+    # Solo las columnas en bruto y los valores de origen, si el fichero los
+    # tiene: lo derivado se vuelve a calcular
+    parquet_file = pq.ParquetFile(path)
+    columns = SCROBBLE_COLUMNS + [
+        column for column in SOURCE_COLUMNS if column in parquet_file.schema_arrow.names
+    ]
+    scrobble_df = parquet_file.read_row_group(row_group, columns=columns).to_pandas()
+    enriched_df = EnrichScrobble(scrobble_df, **enricher_kwargs).enrich_scrobble()
+    return _to_ipc(enriched_df.assign(user=partition["user"]))
+
+
+class Reprocessor:
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        enricher_kwargs: dict | None = None,
+        song_index: SongIndex | None = None,
+        pages_per_task=50,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Se envian a cada proceso: deben poder serializarse con pickle
+        self.enricher_kwargs = enricher_kwargs or {}
+        if "song_index" in self.enricher_kwargs:
+            raise ValueError("pass song_index to Reprocessor, not to the workers")
+        # El id_can se resuelve en el proceso padre contra un unico indice
+        self.song_index = song_index
+        self.pages_per_task = pages_per_task
+
+    def _split_pages(self, pages) -> list[list[list]]:
+        tasks, task = [], []
+        for page in pages:
+            task.append(page)
+            if len(task) == self.pages_per_task:
+                tasks.append(task)
+                task = []
+        if task:
+            tasks.append(task)
+        return tasks
+
+    def _row_group_tasks(self, sink: ParquetSink, filter=None) -> list[tuple]:
+        tasks = []
+        for fragment in sink.dataset().get_fragments(filter=filter):
+            partition = ds.get_partition_keys(fragment.partition_expression)
+            for row_group in range(fragment.metadata.num_row_groups):
+                tasks.append((fragment.path, row_group, partition))
+        return tasks
+
+    def _resolve_id_can(self, table: pa.Table) -> pa.Table:
+        if self.song_index is None or table.num_rows == 0:
+            return table
+        id_can = self.song_index.resolve(table.to_pandas())
+        return table.append_column("id_can", pa.array(id_can, type=pa.int64()))
+
+    def _run(self, function, tasks: list[tuple]):
+        # forkserver: hacer fork de un proceso con hilos (pyarrow, pools de
+        # conexiones) puede dejar locks tomados en el hijo
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+        ) as executor:
+            # map conserva el orden de las particiones
+            for buffer in executor.map(function, *zip(*tasks)):
+                yield self._resolve_id_can(_from_ipc(buffer))
+
+    def iter_pages(self, pages) -> Iterator[pa.Table]:
+        tasks = [(task, self.enricher_kwargs) for task in self._split_pages(pages)]
+        if tasks:
+            yield from self._run(_reprocess_pages, tasks)
+
+    def iter_parquet(self, sink: ParquetSink, filter=None) -> Iterator[pa.Table]:
+        tasks = [
+            (path, row_group, partition, self.enricher_kwargs)
+            for path, row_group, partition in self._row_group_tasks(sink, filter)
+        ]
+        if tasks:
+            yield from self._run(_reprocess_row_group, tasks)
+
+    def reprocess_pages(self, pages) -> pa.Table:
+        return _concat(list(self.iter_pages(pages)))
+
+    def reprocess_parquet(self, sink: ParquetSink, filter=None) -> pa.Table:
+        return _concat(list(self.iter_parquet(sink, filter)))
+
+
+def _concat(tables: list[pa.Table]) -> pa.Table:
+    if not tables:
+        return pa.table({})
+    return pa.concat_tables(tables, promote_options="default")
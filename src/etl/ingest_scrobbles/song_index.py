@@ -0,0 +1,67 @@
+import pandas as pd
+
+from database.mysql_manager import MysqlManager
+
+KEY_SEPARATOR = "\x1f"
+SONG_COLUMNS = ["artist", "album", "title", "track_mbid"]
+
+
+class SongIndex:
+    def __init__(self, database_manager: MysqlManager):
+        self.database_manager = database_manager
+        self.max_id_can = 0
+        # Dos tablas hash en memoria: clave normalizada -> id_can y mbid -> id_can
+        self.key_index = pd.Series(dtype="int64")
+        self.mbid_index = pd.Series(dtype="int64")
+
+    def _normalize_keys(self, songs_df: pd.DataFrame) -> pd.Series:
+        return (
+            songs_df["artist"].str.strip().str.casefold()
+            + KEY_SEPARATOR
+            + songs_df["album"].str.strip().str.casefold()
+            + KEY_SEPARATOR
+            + songs_df["title"].str.strip().str.casefold()
+        )
+
+    def _append_to_index(self, index: pd.Series, keys, id_cans) -> pd.Series:
+        new_entries = pd.Series(id_cans, index=keys, dtype="int64")
+        index = pd.concat([index, new_entries])
+        # Ante claves repetidas manda la cancion mas antigua
+        return index[~index.index.duplicated(keep="first")]
+
+    def refresh(self):
+        new_songs = self.database_manager.get_songs(self.max_id_can)
+        if new_songs.empty:
+            return
+        self.key_index = self._append_to_index(
+            self.key_index,
+            self._normalize_keys(new_songs).to_numpy(),
+            new_songs["id_can"].to_numpy(),
+        )
+        with_mbid = new_songs[new_songs["track_mbid"] != ""]
+        self.mbid_index = self._append_to_index(
+            self.mbid_index,
+            with_mbid["track_mbid"].to_numpy(),
+            with_mbid["id_can"].to_numpy(),
+        )
+        self.max_id_can = int(new_songs["id_can"].max())
+
+    def _lookup(self, scrobble_df: pd.DataFrame, keys: pd.Series) -> pd.Series:
+        # El mbid es la clave preferida; si no hay, la clave normalizada
+        id_can = scrobble_df["track_mbid"].map(self.mbid_index)
+        return id_can.fillna(keys.map(self.key_index))
+
+    def resolve(self, scrobble_df: pd.DataFrame) -> pd.Series:
+        # Incremental: un indice recien creado carga antes la dimension
+        # completa y uno ya cargado solo lo que hayan insertado otros
+        self.refresh()
+        keys = self._normalize_keys(scrobble_df)
+        id_can = self._lookup(scrobble_df, keys)
+        unresolved = id_can.isna()
+        if unresolved.any():
+            new_songs = scrobble_df.loc[unresolved, SONG_COLUMNS]
+            new_songs = new_songs[~keys[unresolved].duplicated()]
+            self.database_manager.insert_songs(new_songs)
+            self.refresh()
+            id_can[unresolved] = self._lookup(scrobble_df[unresolved], keys[unresolved])
+        return id_can.astype("int64")
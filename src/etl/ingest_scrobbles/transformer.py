@@ -1,4 +1,10 @@
-from models.scrobble import Scrobble
+import pandas as pd
+
+from instrumentation.metrics import metrics
+from models.scrobble import Scrobble, ScrobbleRecord
+
+SCROBBLE_COLUMNS = list(Scrobble.model_fields)
+STRING_COLUMNS = [column for column in SCROBBLE_COLUMNS if column != "uts"]
 
 
 class TransformScrobble:
@@ -18,9 +24,58 @@ class TransformScrobble:
             }
         )
 
+    @metrics.timed("transform_seconds", path="scrobbles")
     def transform_tracks_list(self, tracks_list) -> list[Scrobble]:
         transformed_tracks_list = []
         for element in tracks_list:
             transformed_element = self._extract_scrobble_data(element)
             transformed_tracks_list.append(transformed_element)
         return transformed_tracks_list
+
+    @metrics.timed("transform_seconds", path="records")
+    def transform_tracks_to_records(self, tracks_list) -> list[ScrobbleRecord]:
+        # Sin pydantic: los datos ya tienen la forma correcta tras aplanarlos
+        return [
+            ScrobbleRecord(
+                int(track["date"]["uts"]),
+                track["artist"]["name"],
+                track["artist"]["mbid"],
+                track["album"]["#text"],
+                track["album"]["mbid"],
+                track["name"],
+                track["mbid"],
+            )
+            for track in tracks_list
+        ]
+
+    @metrics.timed("transform_seconds", path="dataframe")
+    def transform_tracks_to_dataframe(self, tracks_list) -> pd.DataFrame:
+        # Aplana el json directamente en columnas, sin crear un Scrobble por fila
+        scrobble_df = pd.DataFrame(
+            {
+                "uts": [track["date"]["uts"] for track in tracks_list],
+                "artist": [track["artist"]["name"] for track in tracks_list],
+                "artist_mbid": [track["artist"]["mbid"] for track in tracks_list],
+                "album": [track["album"]["#text"] for track in tracks_list],
+                "album_mbid": [track["album"]["mbid"] for track in tracks_list],
+                "title": [track["name"] for track in tracks_list],
+                "track_mbid": [track["mbid"] for track in tracks_list],
+            },
+            columns=SCROBBLE_COLUMNS,
+        )
+        return self._validate_columns(scrobble_df)
+
+    def _validate_columns(self, scrobble_df: pd.DataFrame) -> pd.DataFrame:
+        # Misma validacion que el modelo Scrobble, pero una vez por columna
+        if scrobble_df.empty:
+            return scrobble_df.astype(
+                {"uts": "int64"} | {column: str for column in STRING_COLUMNS}
+            )
+        uts = pd.to_numeric(scrobble_df["uts"], errors="raise")
+        if not pd.api.types.is_integer_dtype(uts):
+            raise ValueError("Column uts must contain integers")
+        scrobble_df["uts"] = uts.astype("int64")
+        for column in STRING_COLUMNS:
+            if pd.api.types.infer_dtype(scrobble_df[column], skipna=False) != "string":
+                raise ValueError(f"Column {column} must contain strings")
+        return scrobble_df
@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+
+@contextmanager
+def profile_run(mode=None, output_dir=".", top=30):
+    # mode=None no hace nada: el perfilado es siempre opcional
+    if mode is None:
+        yield None
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"mode must be one of {PROFILE_MODES}")
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, f"{mode}-{time.strftime('%Y%m%d-%H%M%S')}")
+    report = {"mode": mode}
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield report
+        finally:
+            profiler.disable()
+            report.update(_dump_cprofile(profiler, prefix, top))
+    else:
+        tracemalloc.start()
+        try:
+            yield report
+        finally:
+            report.update(_dump_tracemalloc(prefix, top))
+            tracemalloc.stop()
+
+
+def _dump_cprofile(profiler: cProfile.Profile, prefix: str, top: int) -> dict:
+    # .prof para snakeviz/pstats y un resumen en texto por tiempo acumulado
+    profiler.dump_stats(f"{prefix}.prof")
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+    with open(f"{prefix}.txt", "w", encoding="utf-8") as f:
+        f.write(stream.getvalue())
+    return {"stats_path": f"{prefix}.prof", "report_path": f"{prefix}.txt"}
+
+
+def _dump_tracemalloc(prefix: str, top: int) -> dict:
+    current, peak = tracemalloc.get_traced_memory()
+    statistics = tracemalloc.take_snapshot().statistics("lineno")[:top]
+    with open(f"{prefix}.txt", "w", encoding="utf-8") as f:
+        f.write(f"current: {current / 1024 / 1024:.1f} MB\n")
+        f.write(f"peak: {peak / 1024 / 1024:.1f} MB\n")
+        for statistic in statistics:
+            f.write(f"{statistic}\n")
+    return {"report_path": f"{prefix}.txt", "peak_bytes": peak}
@@ -1,3 +1,5 @@
+from typing import NamedTuple
+
 from pydantic import BaseModel
 
 
@@ -10,3 +12,30 @@ class Scrobble(BaseModel):
     album_mbid: str
     title: str
     track_mbid: str
+
+
+class ScrobbleRecord(NamedTuple):
+    # Registro ligero respaldado por una tupla, sin __dict__ por instancia
+
+    uts: int
+    artist: str
+    artist_mbid: str
+    album: str
+    album_mbid: str
+    title: str
+    track_mbid: str
+
+    @classmethod
+    def from_scrobble(cls, scrobble: Scrobble) -> "ScrobbleRecord":
+        return cls(
+            scrobble.uts,
+            scrobble.artist,
+            scrobble.artist_mbid,
+            scrobble.album,
+            scrobble.album_mbid,
+            scrobble.title,
+            scrobble.track_mbid,
+        )
+
+    def to_scrobble(self) -> Scrobble:
+        return Scrobble(**self._asdict())
@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+
+from analytics.charts import Charts
+from database.parquet_sink import ParquetSink
+from src.database.parquet_sink import ParquetSink as SrcParquetSink
+
+
+class TestCharts:
+
+    @pytest.fixture(autouse=True)
+    def setup_charts(self, create_enriched_df):
+        fechahoras, artists, albums, titles = zip(
+            ("2025-12-01 10:00:00", "Extremoduro", "Deltoya", "Papel Secante"),
+            ("2025-12-01 10:05:00", "Extremoduro", "Deltoya", "Ama, Ama, Ama"),
+            ("2025-12-02 22:00:00", "Robe", "Mayéutica", "Un Instante"),
+            ("2025-12-03 10:00:00", "Extremoduro", "Deltoya", "Papel Secante"),
+            ("2025-12-08 10:00:00", "Robe", "Mayéutica", "Un Instante"),
+            ("2026-01-05 09:00:00", "Robe", "Mayéutica", "Un Instante"),
+        )
+        self.scrobble_df = create_enriched_df(
+            fechahoras, artist=artists, album=albums, title=titles
+        )
+        self.charts = Charts(self.scrobble_df)
+
+    def test_top_artists_counts_plays(self):
+        result = self.charts.top_artists()
+
+        assert result.to_dict("records") == [
+            {"artist": "Extremoduro", "plays": 3},
+            {"artist": "Robe", "plays": 3},
+        ]
+
+    def test_top_tracks_respects_n_and_time_range(self):
+        result = self.charts.top_tracks(
+            n=1, from_uts=self.uts("2025-12-01"), to_uts=self.uts("2025-12-31")
+        )
+
+        assert result.to_dict("records") == [
+            {"artist": "Extremoduro", "title": "Papel Secante", "plays": 2}
+        ]
+
+    def test_top_albums_per_period(self):
+        result = self.charts.top_albums(n=1, period="month")
+
+        assert result["period"].astype(str).tolist() == ["2025-12", "2026-01"]
+        assert result["album"].tolist() == ["Deltoya", "Mayéutica"]
+
+    def test_top_rejects_unknown_chart_and_period(self):
+        with pytest.raises(ValueError):
+            self.charts.top("genre")
+        with pytest.raises(ValueError):
+            self.charts.top("artist", period="decade")
+
+    def test_streaks_finds_consecutive_listening_days(self):
+        result = self.charts.streaks(n=1)
+
+        assert result.to_dict("records") == [
+            {
+                "start": pd.Timestamp("2025-12-01"),
+                "end": pd.Timestamp("2025-12-03"),
+                "days": 3,
+            }
+        ]
+
+    def test_hour_of_week_heatmap_is_7_by_24(self):
+        result = self.charts.hour_of_week_heatmap()
+
+        assert result.shape == (7, 24)
+        assert result.loc[0, 10] == 3
+        assert result.loc[1, 22] == 1
+        assert result.to_numpy().sum() == 6
+
+    def test_first_listens_per_artist(self):
+        result = self.charts.first_listens("artist")
+
+        assert result["artist"].tolist() == ["Extremoduro", "Robe"]
+        assert result["fechahora"].tolist() == [
+            pd.Timestamp("2025-12-01 10:00:00"),
+            pd.Timestamp("2025-12-02 22:00:00"),
+        ]
+
+    def test_charts_read_from_parquet_sink(self, tmp_path):
+        sink = ParquetSink(tmp_path / "scrobbles")
+        sink.write(self.scrobble_df)
+        charts = Charts(sink)
+
+        result = charts.top_artists(from_uts=self.uts("2026-01-01"))
+
+        assert result.to_dict("records") == [{"artist": "Robe", "plays": 1}]
+
+    def test_charts_accept_sink_imported_through_src_package(self, tmp_path):
+        sink = SrcParquetSink(tmp_path / "scrobbles")
+        sink.write(self.scrobble_df)
+
+        result = Charts(sink).top_artists(from_uts=self.uts("2026-01-01"))
+
+        assert result.to_dict("records") == [{"artist": "Robe", "plays": 1}]
+
+    def test_parquet_year_pruning_matches_dataframe_in_local_time(
+        self, tmp_path, create_enriched_df
+    ):
+        # 2025-01-01 02:00 UTC es 2024-12-31 21:00 en Nueva York: particion 2024
+        scrobble_df = create_enriched_df(
+            ["2025-01-01 02:00:00"],
+            artist="Robe",
+            album="Mayéutica",
+            title="Un Instante",
+        ).assign(fechahora=pd.Timestamp("2024-12-31 21:00:00"))
+        sink = ParquetSink(tmp_path / "scrobbles")
+        sink.write(scrobble_df)
+        from_uts, to_uts = self.uts("2025-01-01"), self.uts("2025-01-01 12:00:00")
+
+        from_sink = Charts(sink).top_artists(from_uts=from_uts, to_uts=to_uts)
+        from_df = Charts(scrobble_df).top_artists(from_uts=from_uts, to_uts=to_uts)
+
+        assert from_sink.to_dict("records") == from_df.to_dict("records")
+        assert from_sink.to_dict("records") == [{"artist": "Robe", "plays": 1}]
+
+    def uts(self, fechahora):
+        return int(pd.Timestamp(fechahora).timestamp())
@@ -0,0 +1,125 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from benchmarks.fake_lastfm_server import FakeLastfmServer
+from src.clients.lastfm_client import LastfmClient
+from src.clients.rate_limiter import RateLimiter
+
+
+class TestFakeLastfmServer:
+    @pytest.fixture
+    def create_server(self):
+        servers = []
+
+        def create_server(**kwargs):
+            server = FakeLastfmServer(
+                history_size=450, start_uts=1000, interval_seconds=10, **kwargs
+            )
+            servers.append(server)
+            return server
+
+        yield create_server
+        for server in servers:
+            server._server.server_close()
+
+    def test_recenttracks_splits_history_in_pages_newest_first(self, create_server):
+        server = create_server(now_playing=False)
+
+        pages = [
+            server.recenttracks({"limit": "200", "page": str(page)})
+            for page in (1, 2, 3)
+        ]
+
+        tracks = [page["recenttracks"]["track"] for page in pages]
+        assert [len(page_tracks) for page_tracks in tracks] == [200, 200, 50]
+        assert tracks[0][0]["date"]["uts"] == str(1000 + 449 * 10)
+        assert tracks[2][-1]["date"]["uts"] == "1000"
+        assert pages[0]["recenttracks"]["@attr"]["totalPages"] == "3"
+        assert pages[0]["recenttracks"]["@attr"]["total"] == "450"
+
+    def test_recenttracks_caps_limit_at_200(self, create_server):
+        server = create_server(now_playing=False)
+
+        response = server.recenttracks({"limit": "1000"})
+
+        assert len(response["recenttracks"]["track"]) == 200
+        assert response["recenttracks"]["@attr"]["perPage"] == "200"
+
+    def test_recenttracks_adds_now_playing_only_on_first_page(self, create_server):
+        server = create_server()
+
+        first_page = server.recenttracks({"limit": "200", "page": "1"})
+        second_page = server.recenttracks({"limit": "200", "page": "2"})
+
+        now_playing = first_page["recenttracks"]["track"][0]
+        assert now_playing["@attr"] == {"nowplaying": "true"}
+        assert "date" not in now_playing
+        assert len(first_page["recenttracks"]["track"]) == 201
+        assert all(
+            "@attr" not in track for track in second_page["recenttracks"]["track"]
+        )
+
+    def test_recenttracks_window_includes_from_and_to(self, create_server):
+        server = create_server(now_playing=False)
+
+        response = server.recenttracks({"limit": "200", "from": "1095", "to": "1150"})
+
+        uts = [track["date"]["uts"] for track in response["recenttracks"]["track"]]
+        assert uts == ["1150", "1140", "1130", "1120", "1110", "1100"]
+        assert response["recenttracks"]["@attr"]["totalPages"] == "1"
+
+    def test_recenttracks_empty_window_has_zero_pages(self, create_server):
+        server = create_server(now_playing=False)
+
+        response = server.recenttracks({"from": "100000"})
+
+        assert response["recenttracks"]["track"] == []
+        assert response["recenttracks"]["@attr"]["totalPages"] == "0"
+
+    @patch("benchmarks.fake_lastfm_server.time.monotonic")
+    def test_throttled_refills_tokens_at_rate_limit(
+        self, mock_monotonic, create_server
+    ):
+        mock_monotonic.return_value = 0.0
+        server = create_server(rate_limit=2)
+
+        burst = [server._throttled() for _ in range(3)]
+        mock_monotonic.return_value = 0.5
+        after_refill = [server._throttled() for _ in range(2)]
+
+        assert burst == [False, False, True]
+        assert after_refill == [False, True]
+
+    def test_throttled_is_disabled_without_rate_limit(self, create_server):
+        server = create_server()
+
+        assert not any(server._throttled() for _ in range(100))
+
+    @patch("benchmarks.fake_lastfm_server.time.monotonic", return_value=0.0)
+    def test_handle_answers_error_29_when_throttled(
+        self, mock_monotonic, create_server
+    ):
+        server = create_server(rate_limit=1)
+
+        first = server.handle({"method": "user.getinfo"})
+        second = server.handle({"method": "user.getinfo"})
+
+        assert first[0] == 200
+        assert second == (429, {"error": 29, "message": "Rate Limit Exceeded"})
+        assert server.stats == {"requests": 2, "errors": 0, "throttled": 1}
+
+    def test_lastfm_client_reads_every_page_over_http(self):
+        config = MagicMock()
+        config.get_credentials.return_value = "fake_key"
+        with FakeLastfmServer(history_size=450) as server:
+            client = LastfmClient(
+                config,
+                uri=server.uri,
+                rate_limiter=RateLimiter(rate=1000, capacity=1000),
+            )
+            tracks_list = client.get_recenttracks(limit=200)
+            client.session.close()
+
+        assert len(tracks_list) == 450
+        assert all("@attr" not in track for track in tracks_list)
@@ -0,0 +1,90 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from benchmarks.suite import (
+    append_history,
+    compare_runs,
+    read_history,
+    run_suite,
+)
+
+
+class TestBenchmarkSuite:
+    def setup_method(self, method):
+        self.baseline = self.create_run(rows_per_sec=1000.0, peak_rss_mb=100.0)
+
+    def test_compare_runs_flags_lower_throughput_beyond_threshold(self):
+        current = self.create_run(rows_per_sec=850.0, peak_rss_mb=100.0)
+
+        regressions = compare_runs(self.baseline, current, threshold=0.1)
+
+        assert [regression["metric"] for regression in regressions] == [
+            "1000.enrich.rows_per_sec"
+        ]
+        assert regressions[0]["change"] == -0.15
+
+    def test_compare_runs_flags_higher_memory_beyond_threshold(self):
+        current = self.create_run(rows_per_sec=1000.0, peak_rss_mb=120.0)
+
+        regressions = compare_runs(self.baseline, current, threshold=0.1)
+
+        assert [regression["metric"] for regression in regressions] == [
+            "1000.peak_rss_mb"
+        ]
+
+    def test_compare_runs_ignores_improvements_and_changes_within_threshold(self):
+        faster = self.create_run(rows_per_sec=2000.0, peak_rss_mb=50.0)
+        noisy = self.create_run(rows_per_sec=950.0, peak_rss_mb=105.0)
+
+        assert compare_runs(self.baseline, faster, threshold=0.1) == []
+        assert compare_runs(self.baseline, noisy, threshold=0.1) == []
+
+    def test_compare_runs_skips_metrics_missing_from_baseline(self):
+        current = self.create_run(rows_per_sec=1000.0, peak_rss_mb=100.0)
+        current["results"]["1000"]["load"] = {"rows_per_sec": 1.0}
+
+        assert compare_runs(self.baseline, current, threshold=0.1) == []
+
+    @patch("benchmarks.suite.git_commit", return_value="abc1234")
+    def test_append_history_keeps_previous_runs(self, mock_git_commit, tmp_path):
+        path = tmp_path / "history.json"
+
+        append_history(path, self.baseline["results"])
+        run = append_history(path, {"1000": {"peak_rss_mb": 90.0}})
+
+        history = read_history(path)
+        assert len(history) == 2
+        assert history[-1] == run
+        assert history[0]["commit"] == "abc1234"
+        assert list(tmp_path.iterdir()) == [path]
+
+    @patch("benchmarks.suite.subprocess.run")
+    def test_run_suite_measures_each_size_in_its_own_process(self, mock_run):
+        mock_run.side_effect = lambda command, **kwargs: MagicMock(
+            stdout=json.dumps({"peak_rss_mb": float(command[4])}) + "\n"
+        )
+
+        results = run_suite([1000, 5000], stages=["enrich"])
+
+        assert results == {
+            "1000": {"peak_rss_mb": 1000.0},
+            "5000": {"peak_rss_mb": 5000.0},
+        }
+        assert mock_run.call_count == 2
+        assert mock_run.call_args.args[0][2:] == [
+            "benchmarks.suite",
+            "size",
+            "5000",
+            "--stages",
+            "enrich",
+        ]
+
+    def create_run(self, rows_per_sec, peak_rss_mb):
+        return {
+            "results": {
+                "1000": {
+                    "enrich": {"rows_per_sec": rows_per_sec},
+                    "peak_rss_mb": peak_rss_mb,
+                }
+            }
+        }
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from src.clients.json_decoders import (
+    MsgspecDecoder,
+    OrjsonDecoder,
+    StdlibDecoder,
+    get_json_decoder,
+)
+
+msgspec = pytest.importorskip("msgspec")
+orjson = pytest.importorskip("orjson")
+
+
+class TestJsonDecoders:
+
+    def setup_method(self, method):
+        with open("tests/clients/test_rt_1page.json", "rb") as f:
+            self.page_content = f.read()
+        self.page = json.loads(self.page_content)
+
+    def test_stdlib_and_orjson_return_full_response(self):
+        assert StdlibDecoder().decode(self.page_content) == self.page
+        assert OrjsonDecoder().decode(self.page_content) == self.page
+
+    def test_msgspec_keeps_only_fields_needed_by_transform(self):
+        result = MsgspecDecoder().decode(self.page_content, "user.getrecenttracks")
+
+        track = result["recenttracks"]["track"][0]
+        expected_track = self.page["recenttracks"]["track"][0]
+        assert track == {
+            "artist": expected_track["artist"],
+            "album": expected_track["album"],
+            "name": expected_track["name"],
+            "mbid": expected_track["mbid"],
+            "date": {"uts": expected_track["date"]["uts"]},
+        }
+        assert (
+            result["recenttracks"]["@attr"]["totalPages"]
+            == self.page["recenttracks"]["@attr"]["totalPages"]
+        )
+
+    def test_msgspec_keeps_now_playing_attr_and_extended_artist(self):
+        content = json.dumps(
+            {
+                "recenttracks": {
+                    "track": [
+                        {
+                            "artist": {"name": "Extremoduro", "mbid": "", "url": ""},
+                            "album": {"mbid": "", "#text": "Deltoya"},
+                            "name": "Papel Secante",
+                            "mbid": "",
+                            "loved": "0",
+                            "@attr": {"nowplaying": "true"},
+                        }
+                    ],
+                    "@attr": {"totalPages": "1", "page": "1"},
+                }
+            }
+        ).encode()
+
+        result = MsgspecDecoder().decode(content, "user.getrecenttracks")
+
+        assert result["recenttracks"]["track"][0] == {
+            "artist": {"name": "Extremoduro", "mbid": ""},
+            "album": {"#text": "Deltoya", "mbid": ""},
+            "name": "Papel Secante",
+            "mbid": "",
+            "@attr": {"nowplaying": "true"},
+        }
+
+    def test_msgspec_decodes_error_responses(self):
+        content = b'{"error": 29, "message": "Rate Limit Exceeded"}'
+
+        result = MsgspecDecoder().decode(content, "user.getrecenttracks")
+
+        assert result == {"error": 29, "message": "Rate Limit Exceeded"}
+
+    def test_msgspec_decodes_other_methods_without_schema(self):
+        content = b'{"user": {"registered": {"unixtime": "1100000000"}}}'
+
+        assert MsgspecDecoder().decode(content, "user.getinfo") == json.loads(content)
+
+    @pytest.mark.parametrize(
+        "decoder_class", [StdlibDecoder, OrjsonDecoder, MsgspecDecoder]
+    )
+    def test_invalid_json_raises_value_error(self, decoder_class):
+        with pytest.raises(ValueError):
+            decoder_class().decode(
+                b"<html>502 Bad Gateway</html>", "user.getrecenttracks"
+            )
+
+    def test_get_json_decoder_by_name(self):
+        assert get_json_decoder("stdlib").name == "stdlib"
+        assert get_json_decoder("orjson").name == "orjson"
+        assert get_json_decoder("auto").name == "msgspec"
+        with pytest.raises(ValueError):
+            get_json_decoder("simdjson")
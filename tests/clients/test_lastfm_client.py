@@ -2,16 +2,22 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 import json
+import time
 
+import requests
+
+from instrumentation.metrics import metrics
 from src.clients.lastfm_client import LastfmClient
+from src.clients.rate_limiter import RateLimiter
+from src.clients.response_cache import ResponseCache
 from src.config.config import Config
 
 
 class TestLastfmClient:
     def setup_method(self, method):
-        mock_config = MagicMock(spec=Config)
-        mock_config.get_credentials.return_value = "fake_lastfam_key"
-        self.client = LastfmClient(mock_config)
+        self.client = LastfmClient(
+            self.client_config(), rate_limiter=RateLimiter(rate=1000, capacity=1000)
+        )
         self.mock_response = MagicMock()
         self.mock_response.status_code = 200
         self.mock_response.json.return_value = {}
@@ -22,14 +28,19 @@ class TestLastfmClient:
     def test_lastfm_client_has_uri(self):
         assert self.client.uri == "http://ws.audioscrobbler.com/2.0/"
 
-    @patch("src.clients.lastfm_client.requests.get")
+    def test_lastfm_client_accepts_custom_uri(self):
+        client = LastfmClient(self.client_config(), uri="http://127.0.0.1:8080/2.0/")
+
+        assert client.uri == "http://127.0.0.1:8080/2.0/"
+
+    @patch("src.clients.lastfm_client.requests.Session.get")
     def test_make_requests_api_gets_called(self, mock_requests_get):
         mock_requests_get.return_value = self.mock_response
         self.client._make_request("")
 
         mock_requests_get.assert_called_once()
 
-    @patch("src.clients.lastfm_client.requests.get")
+    @patch("src.clients.lastfm_client.requests.Session.get")
     def test_make_requests_api_gets_called_with_correct_params(self, mock_requests_get):
         mock_requests_get.return_value = self.mock_response
 
@@ -43,7 +54,121 @@ class TestLastfmClient:
         }
         self.client._make_request("test_method", limit=0)
 
-        mock_requests_get.assert_called_once_with(self.client.uri, expected_params)
+        mock_requests_get.assert_called_once_with(
+            self.client.uri, params=expected_params, timeout=self.client.timeout
+        )
+
+    @patch("src.clients.lastfm_client.requests.Session.get", autospec=True)
+    def test_make_requests_calls_session_get_with_its_real_signature(
+        self, mock_requests_get
+    ):
+        # autospec: una llamada que requests.Session.get no acepta falla aqui
+        mock_requests_get.return_value = self.mock_response
+
+        self.client._make_request("test_method")
+
+        session, uri = mock_requests_get.call_args.args
+        assert session is self.client.session
+        assert uri == self.client.uri
+        assert mock_requests_get.call_args.kwargs["params"]["method"] == "test_method"
+
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_records_metrics_when_enabled(self, mock_requests_get):
+        mock_requests_get.return_value = self.mock_response
+        metrics.reset()
+        metrics.enable()
+        try:
+            self.client._make_request("test_method")
+            snapshot = metrics.snapshot()
+        finally:
+            metrics.disable()
+            metrics.reset()
+
+        assert snapshot["counters"] == [
+            {
+                "name": "lastfm_responses_total",
+                "labels": {"method": "test_method", "status": 200},
+                "value": 1,
+            }
+        ]
+        assert {histogram["name"] for histogram in snapshot["histograms"]} == {
+            "lastfm_http_seconds",
+            "lastfm_json_decode_seconds",
+            "lastfm_request_seconds",
+        }
+
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_uses_configured_json_decoder(self, mock_requests_get):
+        self.mock_response.content = b'{"user": {"name": "sinatxester"}}'
+        mock_requests_get.return_value = self.mock_response
+        client = LastfmClient(
+            self.client_config(),
+            rate_limiter=RateLimiter(rate=1000, capacity=1000),
+            json_decoder="stdlib",
+        )
+
+        result = client._make_request("user.getinfo")
+
+        assert result == {"user": {"name": "sinatxester"}}
+        self.mock_response.json.assert_not_called()
+
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_handles_invalid_json_with_configured_decoder(
+        self, mock_requests_get
+    ):
+        self.mock_response.status_code = 501
+        self.mock_response.content = b"<html>Not Implemented</html>"
+        self.mock_response.text = "<html>Not Implemented</html>"
+        mock_requests_get.return_value = self.mock_response
+        client = LastfmClient(
+            self.client_config(),
+            rate_limiter=RateLimiter(rate=1000, capacity=1000),
+            json_decoder="stdlib",
+        )
+
+        with pytest.raises(ValueError, match="Not Implemented"):
+            client._make_request("user.getinfo")
+
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_raises_and_does_not_cache_undecodable_200(
+        self, mock_requests_get, tmp_path
+    ):
+        # track como objeto en lugar de lista: msgspec lo rechaza al validar
+        self.mock_response.content = json.dumps(
+            {
+                "recenttracks": {
+                    "track": {"name": "x"},
+                    "@attr": {"totalPages": "1"},
+                }
+            }
+        ).encode()
+        self.mock_response.text = self.mock_response.content.decode()
+        mock_requests_get.return_value = self.mock_response
+        client = LastfmClient(
+            self.client_config(),
+            rate_limiter=RateLimiter(rate=1000, capacity=1000),
+            cache=ResponseCache(tmp_path),
+            json_decoder="msgspec",
+        )
+
+        with pytest.raises(ValueError, match="status_code: 200"):
+            client._make_request("user.getrecenttracks", page=1)
+
+        assert client.cache.get({**client.params, "page": 1}) is None
+        assert list(tmp_path.rglob("*.json")) == []
+
+    def test_lastfm_client_accepts_user(self):
+        client = LastfmClient(self.client_config(), user="otro_usuario")
+
+        assert client.params["user"] == "otro_usuario"
+
+    def test_for_user_shares_session_and_rate_limiter(self):
+        client = self.client.for_user("otro_usuario")
+
+        assert client.params["user"] == "otro_usuario"
+        assert self.client.params["user"] == "sinatxester"
+        assert client.session is self.client.session
+        assert client.rate_limiter is self.client.rate_limiter
 
     # def test_make_request_builds_correct_url(self):
     #     # este test no tiene sentido porque no nos interesa saber como funciona request.get por dentro, solo como la usamos nosotros en producción
@@ -55,7 +180,7 @@ class TestLastfmClient:
 
     #     assert r.url == expected_url
 
-    @patch("src.clients.lastfm_client.requests.get")
+    @patch("src.clients.lastfm_client.requests.Session.get")
     def tests_make_request_returns_json_if_status_code_is_200(self, mock_requests_get):
         mock_requests_get.return_value = self.mock_response
 
@@ -67,7 +192,7 @@ class TestLastfmClient:
         "status_code, message",
         [(201, "message201"), (404, "message404 "), (501, "message501")],
     )
-    @patch("src.clients.lastfm_client.requests.get")
+    @patch("src.clients.lastfm_client.requests.Session.get")
     def tests_make_request_raises_error_if_status_code_is_not_200(
         self, mock_requests_get, status_code, message
     ):
@@ -79,6 +204,134 @@ class TestLastfmClient:
         with pytest.raises(ValueError, match=expected_message):
             self.client._make_request("")
 
+    def test_lastfm_client_owns_pooled_session(self):
+        client = LastfmClient(self.client_config(), pool_size=4)
+
+        adapter = client.session.get_adapter(client.uri)
+
+        assert adapter._pool_maxsize == 4
+
+    def test_lastfm_clients_share_rate_limiter_per_api_key(self):
+        client_1 = LastfmClient(self.client_config())
+        client_2 = LastfmClient(self.client_config())
+
+        assert client_1.rate_limiter is client_2.rate_limiter
+
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_acquires_rate_limiter_before_each_request(
+        self, mock_requests_get
+    ):
+        mock_requests_get.return_value = self.mock_response
+        self.client.rate_limiter = MagicMock()
+
+        self.client._make_request("")
+
+        self.client.rate_limiter.acquire.assert_called_once()
+
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_returns_cached_response_without_calling_api(
+        self, mock_requests_get, tmp_path
+    ):
+        mock_requests_get.return_value = self.mock_response
+        self.mock_response.json.return_value = {"recenttracks": {}}
+        self.client.cache = ResponseCache(tmp_path)
+
+        first_result = self.client._make_request("user.getrecenttracks", page=1)
+        second_result = self.client._make_request("user.getrecenttracks", page=1)
+
+        assert first_result == second_result == {"recenttracks": {}}
+        mock_requests_get.assert_called_once()
+
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_does_not_cache_errors(self, mock_requests_get, tmp_path):
+        self.mock_response.status_code = 404
+        self.mock_response.json.return_value = {"message": "not found"}
+        mock_requests_get.return_value = self.mock_response
+        self.client.cache = ResponseCache(tmp_path)
+
+        with pytest.raises(ValueError):
+            self.client._make_request("user.getrecenttracks")
+
+        assert self.client.cache.get(self.client.params) is None
+
+    @pytest.mark.parametrize("status_code", [429, 500, 502, 503, 504])
+    @patch("src.clients.lastfm_client.time.sleep")
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_retries_transient_status_codes(
+        self, mock_requests_get, mock_sleep, status_code
+    ):
+        error_response = MagicMock()
+        error_response.status_code = status_code
+        error_response.json.return_value = {"message": "transient"}
+        mock_requests_get.side_effect = [error_response, self.mock_response]
+
+        result = self.client._make_request("")
+
+        assert result == {}
+        assert mock_requests_get.call_count == 2
+        mock_sleep.assert_called_once()
+
+    @pytest.mark.parametrize("error_code", [11, 16, 29])
+    @patch("src.clients.lastfm_client.time.sleep")
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_retries_lastfm_transient_error_codes(
+        self, mock_requests_get, mock_sleep, error_code
+    ):
+        error_response = MagicMock()
+        error_response.status_code = 200
+        error_response.json.return_value = {"error": error_code, "message": "retry"}
+        mock_requests_get.side_effect = [error_response, self.mock_response]
+
+        result = self.client._make_request("")
+
+        assert result == {}
+        assert mock_requests_get.call_count == 2
+
+    @patch("src.clients.lastfm_client.time.sleep")
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_raises_error_when_retries_are_exhausted(
+        self, mock_requests_get, mock_sleep
+    ):
+        self.mock_response.status_code = 503
+        self.mock_response.json.return_value = {"message": "unavailable"}
+        mock_requests_get.return_value = self.mock_response
+
+        with pytest.raises(ValueError, match="status_code: 503, message: unavailable"):
+            self.client._make_request("")
+
+        assert mock_requests_get.call_count == self.client.max_retries + 1
+        assert mock_sleep.call_count == self.client.max_retries
+
+    @patch("src.clients.lastfm_client.time.sleep")
+    @patch("src.clients.lastfm_client.requests.Session.get")
+    def test_make_request_retries_connection_errors(
+        self, mock_requests_get, mock_sleep
+    ):
+        mock_requests_get.side_effect = [
+            requests.ConnectionError("connection reset"),
+            self.mock_response,
+        ]
+
+        result = self.client._make_request("")
+
+        assert result == {}
+
+    @patch("src.clients.lastfm_client.random.uniform")
+    @patch("src.clients.lastfm_client.time.sleep")
+    def test_wait_before_retry_uses_exponential_backoff_with_jitter(
+        self, mock_sleep, mock_uniform
+    ):
+        mock_uniform.side_effect = lambda low, high: high
+
+        for attempt in range(3):
+            self.client._wait_before_retry(attempt)
+
+        assert [call.args for call in mock_uniform.call_args_list] == [
+            (0, 0.5),
+            (0, 1.0),
+            (0, 2.0),
+        ]
+
     @patch("src.clients.lastfm_client.LastfmClient._make_request")
     def test_should_failed_if_get_recenttracks_calls_make_request_with_invalid_method(
         self, mock_make_request
@@ -220,7 +473,7 @@ class TestLastfmClient:
 
         assert result == expected
 
-    @patch("src.clients.lastfm_client.requests.get")
+    @patch("src.clients.lastfm_client.requests.Session.get")
     def test_make_request_acept_new_parameters(self, mock_requests_get):
         mock_requests_get.return_value = self.mock_response
         fake_method = "fake_method"
@@ -239,7 +492,9 @@ class TestLastfmClient:
             limit=list_limit,
             **{"from": fake_from_uts, "to": fake_to_uts},
         )
-        mock_requests_get.assert_called_once_with(self.client.uri, expected_params)
+        mock_requests_get.assert_called_once_with(
+            self.client.uri, params=expected_params, timeout=self.client.timeout
+        )
 
     @patch("src.clients.lastfm_client.LastfmClient._make_request")
     def test_make_requests_works_in_get_recenttracks_with_new_parameters(
@@ -255,6 +510,143 @@ class TestLastfmClient:
             **{"from": "123456789", "to": "1111111111"},
         )
 
+    @patch("src.clients.lastfm_client.LastfmClient._make_request")
+    def test_get_recenttracks_concurrently_returns_same_list_as_sequential(
+        self, mock_make_request
+    ):
+        mock_make_request.side_effect = [
+            self.read_json_test("tests/clients/test_rt_2_pages_1.json"),
+            self.read_json_test("tests/clients/test_rt_2_pages_2.json"),
+        ]
+        expected = self.build_list_2_pages()
+
+        result = self.client.get_recenttracks(max_workers=4)
+
+        assert result == expected
+
+    @patch("src.clients.lastfm_client.LastfmClient._make_request")
+    def test_get_recenttracks_concurrently_does_not_request_first_page_twice(
+        self, mock_make_request
+    ):
+        mock_make_request.side_effect = [
+            self.read_json_test("tests/clients/test_rt_2_pages_1.json"),
+            self.read_json_test("tests/clients/test_rt_2_pages_2.json"),
+        ]
+
+        self.client.get_recenttracks(max_workers=4)
+
+        assert mock_make_request.call_count == 2
+        mock_make_request.assert_called_with(
+            "user.getrecenttracks", page=2, limit=200, **{"from": None, "to": None}
+        )
+
+    @patch("src.clients.lastfm_client.LastfmClient._make_request")
+    def test_get_recenttracks_concurrently_keeps_page_order(self, mock_make_request):
+        def make_request_side_effect(method, page=1, **kwargs):
+            # las paginas altas responden antes que las bajas
+            time.sleep(0.01 * (5 - page))
+            return {
+                "recenttracks": {
+                    "@attr": {"totalPages": "4"},
+                    "track": [{"page": page}],
+                }
+            }
+
+        mock_make_request.side_effect = make_request_side_effect
+        expected = [{"page": 1}, {"page": 2}, {"page": 3}, {"page": 4}]
+
+        result = self.client.get_recenttracks(max_workers=4)
+
+        assert result == expected
+
+    @patch("src.clients.lastfm_client.LastfmClient._make_request")
+    def test_iter_recenttracks_yields_tracks_page_by_page(self, mock_make_request):
+        mock_make_request.side_effect = [
+            self.read_json_test("tests/clients/test_rt_2_pages_1.json"),
+            self.read_json_test("tests/clients/test_rt_2_pages_1.json"),
+            self.read_json_test("tests/clients/test_rt_2_pages_2.json"),
+        ]
+        expected = self.build_list_2_pages()
+
+        result = list(self.client.iter_recenttracks())
+
+        assert len(result) == 2
+        assert result[0] + result[1] == expected
+
+    @patch("src.clients.lastfm_client.LastfmClient._make_request")
+    def test_iter_recenttracks_does_not_request_pages_until_consumed(
+        self, mock_make_request
+    ):
+        self.client.iter_recenttracks()
+
+        mock_make_request.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "batch_size, expected_batches_len", [(1, [1, 1, 1]), (2, [2, 1]), (5, [3])]
+    )
+    @patch("src.clients.lastfm_client.LastfmClient._make_request")
+    def test_iter_recenttracks_yields_fixed_size_batches(
+        self, mock_make_request, batch_size, expected_batches_len
+    ):
+        mock_make_request.side_effect = [
+            {"recenttracks": {"@attr": {"totalPages": "2"}}},
+            {"recenttracks": {"track": [{"track": "track_1"}, {"track": "track_2"}]}},
+            {"recenttracks": {"track": [{"track": "track_3"}]}},
+        ]
+
+        result = list(self.client.iter_recenttracks(batch_size=batch_size))
+
+        assert [len(batch) for batch in result] == expected_batches_len
+        assert sum(result, []) == [
+            {"track": "track_1"},
+            {"track": "track_2"},
+            {"track": "track_3"},
+        ]
+
+    @patch("src.clients.lastfm_client.LastfmClient._make_request")
+    def test_get_registered_uts_reads_user_getinfo(self, mock_make_request):
+        mock_make_request.return_value = {
+            "user": {"registered": {"unixtime": "1104534000", "#text": 1104534000}}
+        }
+
+        result = self.client.get_registered_uts()
+
+        assert result == 1104534000
+        mock_make_request.assert_called_once_with("user.getinfo")
+
+    @patch("src.clients.lastfm_client.LastfmClient._make_request")
+    def test_get_recenttracks_total_pages_returns_zero_without_raising(
+        self, mock_make_request
+    ):
+        mock_make_request.return_value = {
+            "recenttracks": {"@attr": {"totalPages": "0"}}
+        }
+
+        result = self.client.get_recenttracks_total_pages(from_uts=1765549946)
+
+        assert result == 0
+        mock_make_request.assert_called_once_with(
+            "user.getrecenttracks", limit=200, **{"from": 1765549946, "to": None}
+        )
+
+    @patch("src.clients.lastfm_client.LastfmClient._make_request")
+    def test_get_recenttracks_page_requests_one_page(self, mock_make_request):
+        mock_make_request.return_value = {
+            "recenttracks": {"track": [{"@attr": "track_1"}, {"track": "track_2"}]}
+        }
+
+        result = self.client.get_recenttracks_page(3, 200, 1, 2)
+
+        assert result == [{"track": "track_2"}]
+        mock_make_request.assert_called_once_with(
+            "user.getrecenttracks", page=3, limit=200, **{"from": 1, "to": 2}
+        )
+
+    def client_config(self):
+        mock_config = MagicMock(spec=Config)
+        mock_config.get_credentials.return_value = "fake_lastfam_key"
+        return mock_config
+
     def read_json_test(self, path):
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
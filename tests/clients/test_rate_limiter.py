@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from src.clients.rate_limiter import RateLimiter, get_rate_limiter
+
+
+class TestRateLimiter:
+    @patch("src.clients.rate_limiter.time.sleep")
+    def test_acquire_does_not_wait_while_there_are_tokens(self, mock_sleep):
+        rate_limiter = RateLimiter(rate=1, capacity=3)
+
+        for _ in range(3):
+            rate_limiter.acquire()
+
+        mock_sleep.assert_not_called()
+
+    @patch("src.clients.rate_limiter.time.monotonic")
+    @patch("src.clients.rate_limiter.time.sleep")
+    def test_acquire_waits_when_bucket_is_empty(self, mock_sleep, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        rate_limiter = RateLimiter(rate=2, capacity=1)
+
+        rate_limiter.acquire()
+        rate_limiter.acquire()
+        rate_limiter.acquire()
+
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [0.5, 1.0]
+
+    @patch("src.clients.rate_limiter.time.monotonic")
+    def test_bucket_refills_with_time(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        rate_limiter = RateLimiter(rate=2, capacity=1)
+        rate_limiter.acquire()
+
+        mock_monotonic.return_value = 100.5
+
+        assert rate_limiter._reserve() == 0
+
+    def test_rate_limiter_is_shared_across_threads(self):
+        rate_limiter = RateLimiter(rate=1000, capacity=1)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: rate_limiter.acquire(), range(50)))
+
+        assert rate_limiter.queue_depth == 0
+        assert rate_limiter.throughput == pytest.approx(50 / 60)
+
+    def test_acquire_async_waits_without_blocking_event_loop(self):
+        rate_limiter = RateLimiter(rate=100, capacity=1)
+
+        async def acquire_many():
+            await asyncio.gather(*(rate_limiter.acquire_async() for _ in range(5)))
+
+        asyncio.run(acquire_many())
+
+        assert rate_limiter.queue_depth == 0
+        assert rate_limiter.throughput == pytest.approx(5 / 60)
+
+    @patch("src.clients.rate_limiter.time.monotonic")
+    def test_queue_depth_counts_callers_waiting_for_a_token(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        rate_limiter = RateLimiter(rate=1, capacity=1)
+
+        rate_limiter._reserve()
+        rate_limiter._reserve()
+        rate_limiter._reserve()
+
+        assert rate_limiter.queue_depth == 2
+
+    def test_get_rate_limiter_returns_same_instance_per_api_key(self):
+        assert get_rate_limiter("key_1") is get_rate_limiter("key_1")
+        assert get_rate_limiter("key_1") is not get_rate_limiter("key_2")
@@ -0,0 +1,84 @@
+import os
+from unittest.mock import patch
+
+from src.clients.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    def setup_method(self, method):
+        self.params = {
+            "user": "fake_user",
+            "api_key": "fake_lastfam_key",
+            "method": "user.getrecenttracks",
+            "page": 1,
+            "limit": 200,
+            "from": None,
+            "to": None,
+        }
+        self.response = {"recenttracks": {"track": [{"name": "Standby"}]}}
+
+    def test_get_returns_none_if_response_is_not_cached(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+
+        assert cache.get(self.params) is None
+
+    def test_get_returns_cached_response(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+        cache.set(self.params, self.response)
+
+        assert cache.get(self.params) == self.response
+
+    def test_make_key_normalizes_params(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+        same_params = {
+            "limit": "200",
+            "page": "1",
+            "method": "user.getrecenttracks",
+            "user": "fake_user",
+            "api_key": "another_key",
+        }
+
+        assert cache.make_key(self.params) == cache.make_key(same_params)
+
+    def test_make_key_changes_with_params(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+
+        assert cache.make_key(self.params) != cache.make_key(self.params | {"page": 2})
+
+    @patch("src.clients.response_cache.time.time")
+    def test_expired_response_is_not_returned(self, mock_time, tmp_path):
+        cache = ResponseCache(tmp_path, ttl=60)
+        mock_time.return_value = 1765549946
+        cache.set(self.params, self.response)
+
+        mock_time.return_value = 1765549946 + 61
+
+        assert cache.get(self.params) is None
+        assert os.listdir(tmp_path) == []
+
+    @patch("src.clients.response_cache.time.time")
+    def test_closed_time_window_never_expires(self, mock_time, tmp_path):
+        cache = ResponseCache(tmp_path, ttl=60, immutable_after=3600)
+        params = self.params | {"from": 1765000000, "to": 1765500000}
+        mock_time.return_value = 1765549946
+        cache.set(params, self.response)
+
+        mock_time.return_value = 1765549946 + 10 * 365 * 24 * 3600
+
+        assert cache.get(params) == self.response
+
+    def test_size_cap_evicts_least_recently_used(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+        cache.set(self.params | {"page": 1}, self.response)
+        cache.set(self.params | {"page": 2}, self.response)
+        cache.max_bytes = cache._size + 5
+        page_1_path = cache._path(cache.make_key(self.params | {"page": 1}))
+        page_2_path = cache._path(cache.make_key(self.params | {"page": 2}))
+        os.utime(page_2_path, (0, 0))
+        os.utime(page_1_path, (1, 1))
+
+        cache.set(self.params | {"page": 3}, self.response)
+
+        assert cache.get(self.params | {"page": 1}) == self.response
+        assert cache.get(self.params | {"page": 2}) is None
+        assert cache.get(self.params | {"page": 3}) == self.response
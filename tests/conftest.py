@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def create_enriched_df():
+    # Scrobbles ya enriquecidos, una fila por fechahora. Sin uts, el de cada
+    # fechahora leida como UTC; con uts, consecutivos desde ese valor. Las
+    # demas columnas se cambian con un valor o una lista por fila
+    def create_enriched_df(fechahoras, uts=None, **columns):
+        fechahoras = pd.to_datetime(pd.Series(fechahoras))
+        if uts is None:
+            uts_list = [int(fechahora.timestamp()) for fechahora in fechahoras]
+        else:
+            uts_list = [uts + i for i in range(len(fechahoras))]
+        scrobbles_df = pd.DataFrame(
+            {
+                "user": "sinatxester",
+                "uts": uts_list,
+                "artist": "Extremoduro",
+                "artist_mbid": "",
+                "album": "Deltoya",
+                "album_mbid": "",
+                "title": "Papel Secante",
+                "track_mbid": "",
+                "fechahora": fechahoras,
+            }
+        )
+        return scrobbles_df.assign(**columns)
+
+    return create_enriched_df
@@ -1,11 +1,40 @@
+import datetime
+import functools
 from unittest.mock import MagicMock, patch
 
+import pandas as pd
+import pyarrow as pa
+import pytest
+import sqlalchemy
+from sqlalchemy.dialects import mysql
+
 from src.config.config import Config
 from src.database.mysql_manager import MysqlManager
 
+# Un segundo entre scrobbles; la primera fila lleva comillas y coma en el
+# artista para probar el escapado del CSV
+FECHAHORAS = ["2025-12-12 14:32:26", "2025-12-12 14:32:27", "2025-12-12 14:32:28"]
+ARTISTS = ['Extremoduro, "Robe"', "Extremoduro", "Extremoduro"]
+
 
 class TestMysqlManager:
+    @pytest.fixture(autouse=True)
+    def setup_scrobbles(self, create_enriched_df):
+        self.create_enriched_df = lambda n_rows: create_enriched_df(
+            FECHAHORAS[:n_rows],
+            uts=1765549946,
+            user="fake_user",
+            artist=ARTISTS[:n_rows],
+            title="Standby",
+        )
+
     def setup_method(self, method):
+        self.mysql_manager = MysqlManager(self.mysql_manager_config())
+
+    def teardown_method(self, method):
+        self.mysql_manager.dispose()
+
+    def mysql_manager_config(self):
         mock_config = MagicMock(spec=Config)
 
         def get_credentials_side_effect(key):
@@ -19,7 +48,7 @@ class TestMysqlManager:
             return credentials[key]
 
         mock_config.get_credentials.side_effect = get_credentials_side_effect
-        self.mysql_manager = MysqlManager(mock_config)
+        return mock_config
 
     def test_mysql_manager_gets_mysql_password(self):
         assert self.mysql_manager.PASSWORD == "fake_password"
@@ -60,7 +89,14 @@ class TestMysqlManager:
 
         self.mysql_manager.create_mysql_engine()
 
-        mock_sqlalchemy_create_engine.assert_called_once_with("fake_uri")
+        mock_sqlalchemy_create_engine.assert_called_once_with(
+            "fake_uri",
+            pool_size=5,
+            max_overflow=10,
+            pool_timeout=30,
+            pool_recycle=3600,
+            pool_pre_ping=True,
+        )
 
     @patch("src.database.mysql_manager.MysqlManager._create_mysql_uri")
     @patch("src.database.mysql_manager.sqlalchemy")
@@ -74,3 +110,469 @@ class TestMysqlManager:
         engine = self.mysql_manager.create_mysql_engine()
 
         assert engine == mock_engine
+
+    @patch("src.database.mysql_manager.MysqlManager.create_mysql_engine")
+    def test_get_engine_creates_engine_only_once(self, mock_create_mysql_engine):
+        self.mysql_manager.get_engine()
+        self.mysql_manager.get_engine()
+
+        mock_create_mysql_engine.assert_called_once_with()
+
+    @patch("src.database.mysql_manager.MysqlManager.create_mysql_engine")
+    def test_get_engine_enables_local_infile_when_requested(
+        self, mock_create_mysql_engine
+    ):
+        self.mysql_manager.local_infile = True
+
+        self.mysql_manager.get_engine()
+
+        mock_create_mysql_engine.assert_called_once_with(
+            connect_args={"local_infile": True}
+        )
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+    def test_save_scrobbles_inserts_all_rows_in_chunks(self, tmp_path, chunk_size):
+        self.use_sqlite_engine(tmp_path)
+        scrobbles_df = self.create_enriched_df(3)
+
+        report = self.mysql_manager.save_scrobbles(scrobbles_df, chunk_size=chunk_size)
+
+        assert report["rows"] == 3
+        assert report["rows_per_sec"] > 0
+        assert self.read_scrobbles()["uts"].tolist() == [
+            1765549946,
+            1765549947,
+            1765549948,
+        ]
+
+    def test_save_scrobbles_stores_fechahora_as_datetime(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+
+        # fechahora como texto: save_scrobbles la convierte a datetime
+        self.mysql_manager.save_scrobbles(
+            self.create_enriched_df(1).assign(fechahora="2025-12-12 14:32:26")
+        )
+
+        with self.mysql_manager.get_engine().connect() as connection:
+            fechahora = connection.execute(
+                sqlalchemy.select(sqlalchemy.column("fechahora")).select_from(
+                    sqlalchemy.table("scrobbles")
+                )
+            ).scalar_one()
+        assert fechahora == "2025-12-12 14:32:26.000000"
+
+    def test_save_scrobbles_binds_native_datetime_and_skips_partition_keys(
+        self, tmp_path
+    ):
+        self.use_sqlite_engine(tmp_path)
+        scrobbles_df = self.create_enriched_df(1)
+        scrobbles_df = scrobbles_df.assign(year=2025, month=12, week=50)
+
+        self.mysql_manager.save_scrobbles(scrobbles_df)
+
+        with self.mysql_manager.get_engine().connect() as connection:
+            fechahora = connection.execute(
+                sqlalchemy.select(sqlalchemy.column("fechahora")).select_from(
+                    sqlalchemy.table("scrobbles")
+                )
+            ).scalar_one()
+        assert fechahora == "2025-12-12 14:32:26.000000"
+
+    def test_save_scrobbles_accepts_arrow_table(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        scrobbles_table = pa.Table.from_pandas(self.create_enriched_df(2))
+
+        report = self.mysql_manager.save_scrobbles(scrobbles_table)
+
+        assert report["rows"] == 2
+        assert len(self.read_scrobbles()) == 2
+
+    def test_save_scrobbles_rejects_unknown_method(self):
+        with pytest.raises(ValueError, match="method must be one of"):
+            self.mysql_manager.save_scrobbles(self.create_enriched_df(1), method="fake")
+
+    def test_load_data_infile_requires_local_infile(self):
+        with pytest.raises(ValueError, match="local_infile=True"):
+            self.mysql_manager.save_scrobbles(
+                self.create_enriched_df(1), method="load_data_infile"
+            )
+
+    def test_load_data_infile_streams_csv_and_loads_it(self):
+        self.mysql_manager.local_infile = True
+        mock_connection = MagicMock()
+        self.mysql_manager.engine = MagicMock()
+        self.mysql_manager.engine.begin.return_value.__enter__.return_value = (
+            mock_connection
+        )
+        loaded_csv = []
+
+        def read_csv_file(statement, params):
+            with open(params["path"], encoding="utf-8") as f:
+                loaded_csv.append(f.read())
+
+        mock_connection.execute.side_effect = read_csv_file
+
+        self.mysql_manager.save_scrobbles(
+            self.create_enriched_df(2), chunk_size=1, method="load_data_infile"
+        )
+
+        statement = str(mock_connection.execute.call_args.args[0])
+        assert statement.startswith("LOAD DATA LOCAL INFILE :path INTO TABLE scrobbles")
+        assert loaded_csv == [
+            'fake_user,1765549946,"Extremoduro, ""Robe""",,Deltoya,,Standby,,'
+            '2025-12-12 14:32:26,"Extremoduro, ""Robe""",Standby\n'
+            "fake_user,1765549947,Extremoduro,,Deltoya,,Standby,,"
+            "2025-12-12 14:32:27,Extremoduro,Standby\n"
+        ]
+
+    def test_save_scrobbles_adds_user_argument_as_column(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        scrobbles_df = self.create_enriched_df(1).drop(columns="user")
+
+        self.mysql_manager.save_scrobbles(scrobbles_df, user="another_user")
+
+        assert self.read_scrobbles()["user"].tolist() == ["another_user"]
+
+    def test_save_scrobbles_requires_user(self):
+        scrobbles_df = self.create_enriched_df(1).drop(columns="user")
+
+        with pytest.raises(ValueError, match="user"):
+            self.mysql_manager.save_scrobbles(scrobbles_df)
+
+    def test_insert_mode_rejects_duplicated_scrobbles(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        self.mysql_manager.save_scrobbles(self.create_enriched_df(2))
+
+        with pytest.raises(sqlalchemy.exc.IntegrityError):
+            self.mysql_manager.save_scrobbles(self.create_enriched_df(2))
+
+    def test_upsert_mode_reloads_window_without_duplicates(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        self.mysql_manager.save_scrobbles(self.create_enriched_df(2), mode="upsert")
+
+        self.mysql_manager.save_scrobbles(
+            self.create_enriched_df(3), chunk_size=2, mode="upsert"
+        )
+
+        assert len(self.read_scrobbles()) == 3
+
+    def test_upsert_mode_updates_non_key_columns(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        self.mysql_manager.save_scrobbles(self.create_enriched_df(1), mode="upsert")
+        fixed_df = self.create_enriched_df(1).assign(album="Deltoya (Remaster)")
+
+        self.mysql_manager.save_scrobbles(fixed_df, mode="upsert")
+
+        assert self.read_scrobbles()["album"].tolist() == ["Deltoya (Remaster)"]
+
+    def test_upsert_statement_uses_on_duplicate_key_update_in_mysql(self):
+        self.mysql_manager.engine = MagicMock()
+        self.mysql_manager.engine.dialect = mysql.dialect()
+
+        statement = self.mysql_manager._insert_statement(
+            ["user", "uts", "artist", "album", "title"], "upsert"
+        )
+
+        compiled = str(statement.compile(dialect=self.mysql_manager.engine.dialect))
+        assert compiled.endswith(
+            "ON DUPLICATE KEY UPDATE artist = VALUES(artist), "
+            "album = VALUES(album), title = VALUES(title)"
+        )
+
+    def test_load_data_infile_upsert_merges_from_staging_table(self):
+        self.mysql_manager.local_infile = True
+        mock_connection = MagicMock()
+        self.mysql_manager.engine = MagicMock()
+        self.mysql_manager.engine.begin.return_value.__enter__.return_value = (
+            mock_connection
+        )
+
+        self.mysql_manager.save_scrobbles(
+            self.create_enriched_df(2), method="load_data_infile", mode="upsert"
+        )
+
+        statements = [
+            str(call.args[0]) for call in mock_connection.execute.call_args_list
+        ]
+        assert statements[0] == (
+            "CREATE TEMPORARY TABLE scrobbles_staging LIKE scrobbles"
+        )
+        assert statements[1].startswith(
+            "LOAD DATA LOCAL INFILE :path INTO TABLE scrobbles_staging"
+        )
+        assert statements[2].startswith(
+            "INSERT INTO scrobbles (`user`, `uts`, `artist`, `artist_mbid`"
+        )
+        assert statements[2].endswith(
+            "ON DUPLICATE KEY UPDATE `artist` = VALUES(`artist`), "
+            "`artist_mbid` = VALUES(`artist_mbid`), "
+            "`album` = VALUES(`album`), `album_mbid` = VALUES(`album_mbid`), "
+            "`title` = VALUES(`title`), `track_mbid` = VALUES(`track_mbid`), "
+            "`fechahora` = VALUES(`fechahora`)"
+        )
+        assert statements[3] == "DROP TEMPORARY TABLE scrobbles_staging"
+
+    def test_upsert_mode_reloads_cleansed_spelling_without_duplicates(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        self.mysql_manager.save_scrobbles(self.create_enriched_df(2), mode="upsert")
+        source_df = self.create_enriched_df(2)
+        cleansed_df = source_df.assign(
+            source_artist=source_df["artist"],
+            source_title=source_df["title"],
+            artist="Extremoduro",
+            title="Stand By",
+        )
+
+        self.mysql_manager.save_scrobbles(cleansed_df, mode="upsert")
+
+        scrobbles = self.read_scrobbles()
+        assert len(scrobbles) == 2
+        assert set(scrobbles["artist"]) == {"Extremoduro"}
+        assert set(scrobbles["title"]) == {"Stand By"}
+
+    def test_upsert_mode_keeps_different_tracks_with_same_uts(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        scrobbles_df = self.create_enriched_df(2).assign(uts=1765549946)
+
+        self.mysql_manager.save_scrobbles(scrobbles_df, mode="upsert")
+
+        assert sorted(self.read_scrobbles()["artist"]) == [
+            "Extremoduro",
+            'Extremoduro, "Robe"',
+        ]
+
+    def test_upsert_mode_updates_track_mbid_filled_in_later(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        self.mysql_manager.save_scrobbles(self.create_enriched_df(2), mode="upsert")
+
+        self.mysql_manager.save_scrobbles(
+            self.create_enriched_df(2).assign(track_mbid="mbid-1"), mode="upsert"
+        )
+
+        assert self.read_scrobbles()["track_mbid"].tolist() == ["mbid-1", "mbid-1"]
+
+    def test_create_natural_key_index_adds_unique_index(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        with self.mysql_manager.get_engine().begin() as connection:
+            connection.execute(
+                sqlalchemy.text("DROP INDEX uq_scrobbles_user_uts_source_track")
+            )
+
+        self.mysql_manager.create_natural_key_index()
+
+        indexes = sqlalchemy.inspect(self.mysql_manager.get_engine()).get_indexes(
+            "scrobbles"
+        )
+        indexes = {index["name"]: index for index in indexes}
+        assert indexes["uq_scrobbles_user_uts_source_track"]["unique"]
+        assert indexes["uq_scrobbles_user_uts_source_track"]["column_names"] == [
+            "user",
+            "uts",
+            "source_artist",
+            "source_title",
+        ]
+
+    def test_create_natural_key_index_migrates_legacy_table(self, tmp_path):
+        self.mysql_manager.engine = sqlalchemy.create_engine(
+            f"sqlite:///{tmp_path / 'scrobbles.db'}"
+        )
+        with self.mysql_manager.get_engine().begin() as connection:
+            connection.execute(
+                sqlalchemy.text(
+                    "CREATE TABLE scrobbles (id INTEGER PRIMARY KEY, "
+                    "user VARCHAR(64) NOT NULL, uts BIGINT NOT NULL, "
+                    "artist VARCHAR(255) NOT NULL, title VARCHAR(255) NOT NULL)"
+                )
+            )
+            connection.execute(
+                sqlalchemy.text(
+                    "CREATE UNIQUE INDEX uq_scrobbles_user_uts_track "
+                    "ON scrobbles (user, uts, artist, title)"
+                )
+            )
+            connection.execute(
+                sqlalchemy.text(
+                    "INSERT INTO scrobbles (user, uts, artist, title) "
+                    "VALUES ('fake_user', 1, 'Extremoduro', 'Standby')"
+                )
+            )
+
+        self.mysql_manager.create_natural_key_index()
+
+        scrobbles = self.read_scrobbles()
+        assert scrobbles[["source_artist", "source_title"]].values.tolist() == [
+            ["Extremoduro", "Standby"]
+        ]
+        names = {
+            index["name"]
+            for index in sqlalchemy.inspect(
+                self.mysql_manager.get_engine()
+            ).get_indexes("scrobbles")
+        }
+        assert names == {"uq_scrobbles_user_uts_source_track"}
+
+    def test_create_rollup_index_adds_user_fechahora_index(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        with self.mysql_manager.get_engine().begin() as connection:
+            connection.execute(
+                sqlalchemy.text("DROP INDEX ix_scrobbles_user_fechahora")
+            )
+
+        self.mysql_manager.create_rollup_index()
+
+        indexes = sqlalchemy.inspect(self.mysql_manager.get_engine()).get_indexes(
+            "scrobbles"
+        )
+        indexes = {index["name"]: index["column_names"] for index in indexes}
+        assert indexes["ix_scrobbles_user_fechahora"] == ["user", "fechahora"]
+
+    def test_rollup_source_searches_the_month_by_index(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        statement = sqlalchemy.select(sqlalchemy.func.count()).where(
+            self.mysql_manager._rollup_source(
+                "fake_user",
+                datetime.datetime(2025, 12, 1),
+                datetime.datetime(2026, 1, 1),
+            )
+        )
+        compiled = statement.compile(
+            self.mysql_manager.get_engine(), compile_kwargs={"literal_binds": True}
+        )
+
+        with self.mysql_manager.get_engine().begin() as connection:
+            plan = connection.execute(
+                sqlalchemy.text(f"EXPLAIN QUERY PLAN {compiled}")
+            ).fetchall()
+
+        assert (
+            "ix_scrobbles_user_fechahora (user=? AND fechahora>? AND fechahora<?)"
+            in (plan[0][-1])
+        )
+
+    @patch("src.database.mysql_manager.MysqlManager.create_mysql_engine")
+    def test_managers_with_same_settings_share_engine_in_process(
+        self, mock_create_mysql_engine
+    ):
+        another_manager = MysqlManager(self.mysql_manager_config())
+
+        engine = self.mysql_manager.get_engine()
+
+        assert another_manager.get_engine() is engine
+        mock_create_mysql_engine.assert_called_once()
+
+    @patch("src.database.mysql_manager.os.getpid")
+    @patch("src.database.mysql_manager.MysqlManager.create_mysql_engine")
+    def test_get_engine_creates_new_engine_after_fork(
+        self, mock_create_mysql_engine, mock_getpid
+    ):
+        parent_engine = MagicMock()
+        child_engine = MagicMock()
+        mock_create_mysql_engine.side_effect = [parent_engine, child_engine]
+        mock_getpid.return_value = 1000
+        self.mysql_manager.get_engine()
+
+        mock_getpid.return_value = 1001
+        engine = self.mysql_manager.get_engine()
+
+        assert engine is child_engine
+        parent_engine.dispose.assert_called_once_with(close=False)
+
+    @patch("src.database.mysql_manager.MysqlManager.create_mysql_engine")
+    def test_context_manager_disposes_engine(self, mock_create_mysql_engine):
+        with MysqlManager(self.mysql_manager_config()) as mysql_manager:
+            engine = mysql_manager.get_engine()
+
+        engine.dispose.assert_called_once_with(close=True)
+        assert mysql_manager.get_engine() is not None
+        assert mock_create_mysql_engine.call_count == 2
+
+    def test_get_pool_metrics_counts_checkouts_and_waits(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+
+        self.mysql_manager.save_scrobbles(self.create_enriched_df(2))
+        self.mysql_manager.save_scrobbles(self.create_enriched_df(3), mode="upsert")
+        pool_metrics = self.mysql_manager.get_pool_metrics()
+
+        assert pool_metrics["checkouts"] >= 2
+        assert pool_metrics["checkins"] == pool_metrics["checkouts"]
+        assert pool_metrics["checkedout"] == 0
+        assert pool_metrics["wait_seconds_total"] >= pool_metrics["wait_seconds_max"]
+
+    def test_get_songs_returns_only_songs_after_since_id_can(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+        songs_df = pd.DataFrame(
+            [
+                {
+                    "artist": "Extremoduro",
+                    "album": "Deltoya",
+                    "title": f"Title {i}",
+                    "track_mbid": "",
+                }
+                for i in range(3)
+            ]
+        )
+        self.mysql_manager.insert_songs(songs_df, chunk_size=2)
+
+        result = self.mysql_manager.get_songs(since_id_can=1)
+
+        assert result["id_can"].tolist() == [2, 3]
+        assert result["title"].tolist() == ["Title 1", "Title 2"]
+
+    def test_save_scrobbles_updates_daily_and_monthly_rollups(self, tmp_path):
+        self.use_sqlite_engine(tmp_path)
+
+        self.mysql_manager.save_scrobbles(
+            self.create_enriched_df(3), mode="upsert", update_rollups=True
+        )
+
+        daily_plays = self.mysql_manager.get_daily_plays(
+            "fake_user", datetime.date(2025, 12, 1), datetime.date(2025, 12, 31)
+        )
+        monthly_plays = self.mysql_manager.get_monthly_plays("fake_user", 2025, 12)
+        assert sorted(zip(daily_plays["artist"], daily_plays["plays"])) == [
+            ("Extremoduro", 2),
+            ('Extremoduro, "Robe"', 1),
+        ]
+        assert daily_plays["day"].tolist() == [datetime.date(2025, 12, 12)] * 2
+        assert monthly_plays["plays"].sum() == 3
+
+    def test_update_rollups_is_idempotent_and_only_touches_the_batch_days(
+        self, tmp_path
+    ):
+        self.use_sqlite_engine(tmp_path)
+        older_df = self.create_enriched_df(1).assign(
+            uts=1765000000, fechahora="2025-12-06 05:46:40"
+        )
+        self.mysql_manager.save_scrobbles(older_df, update_rollups=True)
+        scrobbles_df = self.create_enriched_df(3)
+
+        self.mysql_manager.save_scrobbles(
+            scrobbles_df, mode="upsert", update_rollups=True
+        )
+        result = self.mysql_manager.save_scrobbles(
+            scrobbles_df, mode="upsert", update_rollups=True
+        )
+
+        daily_plays = self.mysql_manager.get_daily_plays(
+            "fake_user", datetime.date(2025, 12, 1), datetime.date(2025, 12, 31)
+        )
+        monthly_plays = self.mysql_manager.get_monthly_plays("fake_user", 2025)
+        assert result["rows"] == 3
+        assert daily_plays.groupby("day")["plays"].sum().to_dict() == {
+            datetime.date(2025, 12, 6): 1,
+            datetime.date(2025, 12, 12): 3,
+        }
+        assert monthly_plays["plays"].sum() == 4
+        assert self.mysql_manager.update_rollups(scrobbles_df) == {
+            "months": 1,
+            "days": 1,
+        }
+
+    def use_sqlite_engine(self, tmp_path):
+        self.mysql_manager.engine = sqlalchemy.create_engine(
+            f"sqlite:///{tmp_path / 'scrobbles.db'}"
+        )
+        self.mysql_manager.create_tables()
+
+    def read_scrobbles(self):
+        return pd.read_sql_table("scrobbles", self.mysql_manager.get_engine())
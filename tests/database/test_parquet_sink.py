@@ -0,0 +1,117 @@
+import functools
+import os
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+from src.database.parquet_sink import ParquetSink
+
+
+class TestParquetSink:
+    @pytest.fixture(autouse=True)
+    def setup_scrobbles(self, create_enriched_df):
+        self.create_enriched_df = functools.partial(create_enriched_df, uts=1764583200)
+
+    @pytest.fixture
+    def sink(self, tmp_path):
+        return ParquetSink(tmp_path / "scrobbles")
+
+    def test_write_partitions_by_user_year_and_month(self, sink):
+        sink.write(
+            self.create_enriched_df(["2025-11-30 23:00:00", "2025-12-01 10:00:00"])
+        )
+
+        partitions = sorted(
+            os.path.relpath(directory, sink.directory)
+            for directory, _ in sink._partition_directories()
+        )
+
+        assert partitions == [
+            os.path.join("user=sinatxester", "year=2025", "month=11"),
+            os.path.join("user=sinatxester", "year=2025", "month=12"),
+        ]
+
+    def test_write_requires_user(self, sink):
+        scrobbles_df = self.create_enriched_df(["2025-12-01 10:00:00"]).drop(
+            columns="user"
+        )
+
+        with pytest.raises(ValueError):
+            sink.write(scrobbles_df)
+
+        assert sink.write(scrobbles_df, user="otro")["rows"] == 1
+
+    def test_write_appends_batches_and_reads_them_back(self, sink):
+        sink.write(self.create_enriched_df(["2025-12-01 10:00:00"]))
+        sink.write(self.create_enriched_df(["2025-12-02 10:00:00"], uts=1764669600))
+
+        table = sink.read()
+
+        assert sorted(table["uts"].to_pylist()) == [1764583200, 1764669600]
+        assert set(table["user"].to_pylist()) == {"sinatxester"}
+
+    def test_write_dictionary_encodes_strings_and_keeps_statistics(self, sink):
+        result = sink.write(self.create_enriched_df(["2025-12-01 10:00:00"]))
+
+        metadata = pq.ParquetFile(result["files"][0]).metadata
+        artist = metadata.row_group(0).column(1)
+
+        assert artist.path_in_schema == "artist"
+        assert any("DICT" in encoding for encoding in artist.encodings)
+        assert artist.statistics.min == "Extremoduro"
+
+    def test_read_pushes_down_filters(self, sink):
+        sink.write(
+            self.create_enriched_df(["2025-11-30 10:00:00", "2025-12-01 10:00:00"])
+        )
+
+        table = sink.read(columns=["uts", "month"], filter=ds.field("month") == 12)
+
+        assert table.to_pydict() == {"uts": [1764583201], "month": [12]}
+
+    def test_compact_merges_small_files_per_partition(self, sink):
+        for day in range(1, 4):
+            sink.write(
+                self.create_enriched_df(
+                    [f"2025-12-0{day} 10:00:00"], uts=1764583200 + day
+                )
+            )
+
+        compacted = sink.compact()
+
+        assert compacted == {
+            os.path.join("user=sinatxester", "year=2025", "month=12"): 3
+        }
+        assert [len(files) for _, files in sink._partition_directories()] == [1]
+        assert sink.read()["uts"].to_pylist() == [1764583201, 1764583202, 1764583203]
+
+    def test_compact_temporary_file_is_invisible_to_readers(self, sink, monkeypatch):
+        for day in range(1, 3):
+            sink.write(
+                self.create_enriched_df(
+                    [f"2025-12-0{day} 10:00:00"], uts=1764583200 + day
+                )
+            )
+        # Otro sink sobre el mismo directorio: no comparte el lock
+        reader = ParquetSink(sink.directory)
+        replace = os.replace
+        rows_during_compact = []
+
+        def read_then_replace(source, target):
+            assert os.path.basename(source).startswith("_")
+            rows_during_compact.append(reader.read().num_rows)
+            replace(source, target)
+
+        monkeypatch.setattr("src.database.parquet_sink.os.replace", read_then_replace)
+
+        sink.compact()
+
+        assert rows_during_compact == [2]
+        assert reader.read().num_rows == 2
+
+    def test_compact_skips_partitions_with_a_single_file(self, sink):
+        sink.write(self.create_enriched_df(["2025-12-01 10:00:00"]))
+
+        assert sink.compact() == {}
@@ -0,0 +1,52 @@
+import json
+
+from src.database.state_store import StateStore
+
+
+class TestStateStore:
+    def setup_method(self, method):
+        self.user = "fake_user"
+
+    def test_watermark_is_none_for_new_user(self, tmp_path):
+        state_store = StateStore(tmp_path / "state.json")
+
+        assert state_store.get_watermark(self.user) is None
+
+    def test_state_is_persisted_between_instances(self, tmp_path):
+        path = tmp_path / "state.json"
+        StateStore(path).set_watermark(self.user, 1765549946)
+
+        assert StateStore(path).get_watermark(self.user) == 1765549946
+
+    def test_complete_page_saves_progress(self, tmp_path):
+        path = tmp_path / "state.json"
+        state_store = StateStore(path)
+        state_store.start_backfill(self.user, None, 1765554377, 3)
+
+        state_store.complete_page(self.user, 1, 1765554377)
+        state_store.complete_page(self.user, 2, 1765549946)
+
+        backfill = json.loads(path.read_text())[self.user]["backfill"]
+        assert backfill["completed_pages"] == [1, 2]
+        assert backfill["max_uts"] == 1765554377
+
+    def test_finish_backfill_moves_watermark_to_max_uts(self, tmp_path):
+        state_store = StateStore(tmp_path / "state.json")
+        state_store.set_watermark(self.user, 1765549000)
+        state_store.start_backfill(self.user, 1765549001, 1765554377, 1)
+        state_store.complete_page(self.user, 1, 1765554377)
+
+        state_store.finish_backfill(self.user)
+
+        assert state_store.get_watermark(self.user) == 1765554377
+        assert state_store.get_backfill(self.user) is None
+
+    def test_finish_backfill_without_tracks_keeps_watermark(self, tmp_path):
+        state_store = StateStore(tmp_path / "state.json")
+        state_store.set_watermark(self.user, 1765549000)
+        state_store.start_backfill(self.user, 1765549001, 1765554377, 1)
+        state_store.complete_page(self.user, 1, None)
+
+        state_store.finish_backfill(self.user)
+
+        assert state_store.get_watermark(self.user) == 1765549000
@@ -0,0 +1,39 @@
+from unittest.mock import MagicMock
+
+import pytest
+import sqlalchemy
+
+from database.mysql_manager import MysqlManager
+from database.state_store import StateStore
+
+
+@pytest.fixture
+def create_raw_track():
+    # Track de user.getrecenttracks con extended=1, como lo devuelve el cliente
+    def create_raw_track(uts, artist="Extremoduro"):
+        return {
+            "artist": {"mbid": "", "#text": artist, "name": artist},
+            "mbid": "",
+            "album": {"mbid": "", "#text": "Deltoya"},
+            "name": "Papel Secante",
+            "date": {"uts": str(uts), "#text": ""},
+        }
+
+    return create_raw_track
+
+
+@pytest.fixture
+def state_store(tmp_path):
+    return StateStore(tmp_path / "state.json")
+
+
+@pytest.fixture
+def database_manager(tmp_path):
+    mock_config = MagicMock()
+    mock_config.get_credentials.return_value = "fake_value"
+    database_manager = MysqlManager(mock_config)
+    database_manager.engine = sqlalchemy.create_engine(
+        f"sqlite:///{tmp_path / 'scrobbles.db'}"
+    )
+    database_manager.create_tables()
+    return database_manager
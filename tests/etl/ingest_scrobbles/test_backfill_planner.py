@@ -0,0 +1,104 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from etl.ingest_scrobbles.backfill_planner import BackfillPlanner
+
+
+class TestBackfillPlanner:
+    def setup_method(self, method):
+        self.client = MagicMock()
+        self.planner = BackfillPlanner(self.client, window_seconds=100, max_workers=2)
+
+    def test_plan_windows_covers_range_without_gaps(self):
+        result = self.planner.plan_windows(1000, 1250)
+
+        assert result == [(1150, 1250), (1050, 1150), (1000, 1050)]
+
+    def test_plan_windows_is_empty_for_empty_range(self):
+        assert self.planner.plan_windows(1000, 1000) == []
+
+    def test_fetch_window_requests_every_page_of_the_window(self):
+        self.client.get_recenttracks_total_pages.return_value = 2
+        self.client.get_recenttracks_page.side_effect = [
+            [self.track(1200)],
+            [self.track(1160)],
+        ]
+
+        result = self.planner.fetch_window((1150, 1250))
+
+        assert result == [self.track(1200), self.track(1160)]
+        self.client.get_recenttracks_total_pages.assert_called_once_with(
+            200, 1150, 1250
+        )
+        self.client.get_recenttracks_page.assert_called_with(2, 200, 1150, 1250)
+
+    def test_merge_windows_drops_duplicates_in_window_boundaries(self):
+        windows_tracks = [
+            [self.track(1200), self.track(1150)],
+            [self.track(1150), self.track(1100)],
+        ]
+
+        result = self.planner.merge_windows(windows_tracks)
+
+        assert result == [self.track(1200), self.track(1150), self.track(1100)]
+
+    def test_backfill_fetches_windows_in_parallel_and_keeps_order(self):
+        self.client.get_recenttracks_total_pages.return_value = 1
+        self.client.get_recenttracks_page.side_effect = (
+            lambda page, limit, window_from, window_to: [
+                self.track(window_to),
+                self.track(window_from),
+            ]
+        )
+
+        result = self.planner.backfill(1000, 1250)
+
+        assert [track["date"]["uts"] for track in result] == [
+            "1250",
+            "1150",
+            "1050",
+            "1000",
+        ]
+
+    def test_backfill_starts_at_registration_date_by_default(self):
+        self.client.get_registered_uts.return_value = 1000
+        self.client.get_recenttracks_total_pages.return_value = 0
+
+        self.planner.backfill(to_uts=1100)
+
+        self.client.get_recenttracks_total_pages.assert_called_once_with(
+            200, 1000, 1100
+        )
+
+    def test_failed_window_is_retried_independently(self):
+        self.client.get_recenttracks_total_pages.side_effect = [
+            ValueError("status_code: 500"),
+            1,
+        ]
+        self.client.get_recenttracks_page.return_value = [self.track(1200)]
+
+        result = self.planner.fetch_windows([(1150, 1250)])
+
+        assert result == [[self.track(1200)]]
+
+    def test_fetch_windows_raises_error_with_failed_windows(self):
+        self.client.get_recenttracks_total_pages.side_effect = (
+            lambda limit, window_from, window_to: (
+                1 if window_from == 1150 else self.raise_error()
+            )
+        )
+        self.client.get_recenttracks_page.return_value = [self.track(1200)]
+
+        with pytest.raises(ValueError, match=r"\[\(1000, 1150\)\]"):
+            self.planner.fetch_windows([(1150, 1250), (1000, 1150)])
+
+    def raise_error(self):
+        raise ValueError("status_code: 500")
+
+    def track(self, uts):
+        return {
+            "artist": {"name": "Extremoduro"},
+            "name": f"Track {uts}",
+            "date": {"uts": str(uts)},
+        }
@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from etl.ingest_scrobbles.cleansing import DEFAULT_RULES_PATH, CleansingRules
+
+
+class TestCleansingRules:
+
+    def setup_method(self, method):
+        self.cleansing_rules = CleansingRules(
+            [
+                self.rule("artist", "exact", "Extremoduro ", "Extremoduro"),
+                self.rule("artist", "casefold", "ROBE", "Robe"),
+                self.rule("title", "regex", r"\s+-\s+Remaster(ed)?.*$", ""),
+            ],
+            version="1",
+        )
+
+    def test_apply_rewrites_exact_casefold_and_regex(self):
+        scrobble_df = self.create_scrobble_df(
+            [
+                ("Extremoduro ", "Standby - Remastered 2011"),
+                ("robe", "Un Instante"),
+                ("Extremoduro", "Papel Secante"),
+            ]
+        )
+
+        result = self.cleansing_rules.apply(scrobble_df)
+
+        assert result["artist"].tolist() == ["Extremoduro", "Robe", "Extremoduro"]
+        assert result["title"].tolist() == ["Standby", "Un Instante", "Papel Secante"]
+
+    def test_apply_does_not_modify_input(self):
+        scrobble_df = self.create_scrobble_df([("robe", "Un Instante")])
+
+        self.cleansing_rules.apply(scrobble_df)
+
+        assert scrobble_df["artist"].tolist() == ["robe"]
+
+    def test_apply_keeps_repeated_values_aligned(self):
+        rows = [("robe", "Un Instante"), ("Extremoduro", "Standby")] * 500
+        scrobble_df = self.create_scrobble_df(rows)
+
+        result = self.cleansing_rules.apply(scrobble_df)
+
+        assert result["artist"].tolist() == ["Robe", "Extremoduro"] * 500
+
+    def test_unknown_match_raises_value_error(self):
+        with pytest.raises(ValueError):
+            CleansingRules([self.rule("artist", "fuzzy", "a", "b")])
+
+    def test_unknown_field_raises_value_error(self):
+        with pytest.raises(ValueError):
+            CleansingRules([self.rule("user", "exact", "a", "b")])
+
+    def test_from_csv_reads_version_and_rules(self, tmp_path):
+        rules_path = tmp_path / "rules.csv"
+        rules_path.write_text(
+            "# version: 3\n"
+            "# comentario\n"
+            "field,match,pattern,replacement\n"
+            "album,casefold,deltoya,Deltoya\n",
+            encoding="utf-8",
+        )
+
+        cleansing_rules = CleansingRules.from_csv(rules_path)
+
+        assert cleansing_rules.version == "3"
+        assert cleansing_rules.casefold["album"] == {"deltoya": "Deltoya"}
+
+    def test_from_csv_loads_default_rules_file(self):
+        cleansing_rules = CleansingRules.from_csv(DEFAULT_RULES_PATH)
+
+        assert cleansing_rules.version == "1"
+
+    def rule(self, field, match, pattern, replacement):
+        return {
+            "field": field,
+            "match": match,
+            "pattern": pattern,
+            "replacement": replacement,
+        }
+
+    def create_scrobble_df(self, rows):
+        return pd.DataFrame(
+            [{"artist": artist, "album": "", "title": title} for artist, title in rows]
+        )
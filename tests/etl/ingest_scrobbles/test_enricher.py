@@ -5,7 +5,8 @@ import pytest
 from pandas.testing import assert_frame_equal
 import pandas as pd
 
-from models.scrobble import Scrobble
+from models.scrobble import Scrobble, ScrobbleRecord
+from etl.ingest_scrobbles.cleansing import CleansingRules
 from src.etl.ingest_scrobbles.enricher import EnrichScrobble
 
 
@@ -48,16 +49,37 @@ class TestEnrichScrobble:
     def test_enrich_scrobbles_adds_fechahora_column(self):
 
         expected = pd.DataFrame(
-            [
-                {"uts": 1765549946, "fechahora": "2025-12-12 14:32:26"},
-                {"uts": 1765554377, "fechahora": "2025-12-12 15:46:17"},
-            ]
+            {
+                "uts": [1765549946, 1765554377],
+                "fechahora": pd.to_datetime(
+                    ["2025-12-12 14:32:26", "2025-12-12 15:46:17"]
+                ).astype("datetime64[s]"),
+            }
         )
 
         result = self.enricher.enrich_scrobble()
 
         assert_frame_equal(result[["uts", "fechahora"]], expected)
 
+    def test_enrich_scrobbles_converts_fechahora_to_timezone(self):
+        enricher = EnrichScrobble(
+            self.create_scrobbles_list(), MagicMock(), timezone="Europe/Madrid"
+        )
+
+        result = enricher.enrich_scrobble()
+
+        assert result["fechahora"].astype(str).tolist() == [
+            "2025-12-12 15:32:26",
+            "2025-12-12 16:46:17",
+        ]
+
+    def test_enrich_scrobbles_adds_partition_keys(self):
+        result = self.enricher.enrich_scrobble()
+
+        assert result["year"].tolist() == [2025, 2025]
+        assert result["month"].tolist() == [12, 12]
+        assert result["week"].tolist() == [50, 50]
+
     def test_enrich_transform_empty_string_into_desconocido_in_album(self):
         database_manager = MagicMock()
         scrobble_list = [
@@ -80,6 +102,79 @@ class TestEnrichScrobble:
 
         assert_frame_equal(result[["uts", "album"]], expected)
 
+    def test_create_dataframe_accepts_columnar_dataframe(self):
+        scrobbles_df = self.enricher._create_dataframe(self.create_scrobbles_list())
+
+        result = self.enricher._create_dataframe(scrobbles_df)
+
+        assert_frame_equal(result, scrobbles_df)
+        assert result is not scrobbles_df
+
+    def test_create_dataframe_accepts_scrobble_records(self):
+        scrobbles_list = self.create_scrobbles_list()
+        records_list = [ScrobbleRecord.from_scrobble(s) for s in scrobbles_list]
+        expected = self.enricher._create_dataframe(scrobbles_list)
+
+        result = self.enricher._create_dataframe(records_list)
+
+        assert_frame_equal(result, expected)
+
+    def test_enrich_scrobble_adds_id_can_from_song_index(self):
+        song_index = MagicMock()
+        song_index.resolve.return_value = pd.Series([7, 8])
+        enricher = EnrichScrobble(
+            self.create_scrobbles_list(), MagicMock(), song_index=song_index
+        )
+
+        result = enricher.enrich_scrobble()
+
+        assert result["id_can"].tolist() == [7, 8]
+        song_index.resolve.assert_called_once()
+
+    def test_enrich_scrobble_applies_cleansing_rules(self):
+        cleansing_rules = CleansingRules(
+            [
+                {
+                    "field": "album",
+                    "match": "exact",
+                    "pattern": "Deltoya",
+                    "replacement": "",
+                }
+            ]
+        )
+        enricher = EnrichScrobble(
+            self.create_scrobbles_list(),
+            MagicMock(),
+            cleansing_rules=cleansing_rules,
+        )
+
+        result = enricher.enrich_scrobble()
+
+        assert result["album"].tolist() == ["Yo, Minoría Absoluta", "[Desconocido]"]
+
+    def test_enrich_scrobble_keeps_source_values_before_cleansing(self):
+        cleansing_rules = CleansingRules(
+            [
+                {
+                    "field": "title",
+                    "match": "exact",
+                    "pattern": "Standby",
+                    "replacement": "Stand By",
+                }
+            ]
+        )
+        enricher = EnrichScrobble(
+            self.create_scrobbles_list(),
+            MagicMock(),
+            cleansing_rules=cleansing_rules,
+        )
+
+        result = enricher.enrich_scrobble()
+
+        assert result["title"].tolist()[0] == "Stand By"
+        assert result["source_title"].tolist()[0] == "Standby"
+        assert result["source_artist"].tolist() == result["artist"].tolist()
+
     def create_scrobbles_list(self):
         return [
             Scrobble(
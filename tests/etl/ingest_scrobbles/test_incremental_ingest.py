@@ -0,0 +1,88 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from database.state_store import StateStore
+from etl.ingest_scrobbles.incremental_ingest import IncrementalIngest
+
+
+class TestIncrementalIngest:
+    @pytest.fixture
+    def client(self):
+        client = MagicMock()
+        client.params = {"user": "fake_user"}
+        client.get_recenttracks_total_pages.return_value = 2
+        client.get_recenttracks_page.side_effect = lambda page, *args: [
+            {"date": {"uts": str(1765550000 - page)}}
+        ]
+        return client
+
+    @pytest.fixture
+    def state_store(self, tmp_path):
+        return StateStore(tmp_path / "state.json")
+
+    @patch("etl.ingest_scrobbles.incremental_ingest.time.time")
+    def test_first_run_requests_full_history_until_now(
+        self, mock_time, client, state_store
+    ):
+        mock_time.return_value = 1765560000
+
+        list(IncrementalIngest(client, state_store).iter_pages())
+
+        client.get_recenttracks_total_pages.assert_called_once_with(
+            200, None, 1765560000
+        )
+        client.get_recenttracks_page.assert_any_call(2, 200, None, 1765560000)
+
+    @patch("etl.ingest_scrobbles.incremental_ingest.time.time")
+    def test_next_run_requests_from_watermark_plus_one(
+        self, mock_time, client, state_store
+    ):
+        mock_time.return_value = 1765560000
+        list(IncrementalIngest(client, state_store).iter_pages())
+        client.get_recenttracks_total_pages.reset_mock()
+
+        mock_time.return_value = 1765570000
+        list(IncrementalIngest(client, state_store).iter_pages())
+
+        client.get_recenttracks_total_pages.assert_called_once_with(
+            200, 1765549999 + 1, 1765570000
+        )
+
+    def test_iter_pages_yields_tracks_of_every_page(self, client, state_store):
+        result = list(IncrementalIngest(client, state_store).iter_pages())
+
+        assert result == [
+            [{"date": {"uts": "1765549999"}}],
+            [{"date": {"uts": "1765549998"}}],
+        ]
+        assert state_store.get_watermark("fake_user") == 1765549999
+
+    def test_failed_backfill_resumes_from_last_completed_page(
+        self, client, state_store
+    ):
+        pages = IncrementalIngest(client, state_store).iter_pages()
+        next(pages)
+        next(pages)  # la pagina 1 queda completada, la 2 falla al procesarse
+        client.get_recenttracks_page.reset_mock()
+
+        result = list(IncrementalIngest(client, state_store).iter_pages())
+
+        assert result == [[{"date": {"uts": "1765549998"}}]]
+        client.get_recenttracks_page.assert_called_once()
+        assert state_store.get_watermark("fake_user") == 1765549999
+
+    def test_watermark_does_not_move_until_backfill_finishes(self, client, state_store):
+        pages = IncrementalIngest(client, state_store).iter_pages()
+        next(pages)
+        next(pages)
+
+        assert state_store.get_watermark("fake_user") is None
+
+    def test_no_new_scrobbles_yields_nothing(self, client, state_store):
+        client.get_recenttracks_total_pages.return_value = 0
+
+        result = list(IncrementalIngest(client, state_store).iter_pages())
+
+        assert result == []
+        client.get_recenttracks_page.assert_not_called()
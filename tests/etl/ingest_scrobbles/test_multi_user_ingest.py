@@ -0,0 +1,166 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from etl.ingest_scrobbles.multi_user_ingest import MultiUserIngest, ingest_users
+
+
+class TestMultiUserIngest:
+    @pytest.fixture
+    def client(self, create_raw_track):
+        self.create_raw_track = create_raw_track
+        self.total_pages = {"ana": 4, "luis": 2}
+        self.fetched = []
+        client = MagicMock()
+        client.for_user.side_effect = self.create_user_client
+        return client
+
+    def create_user_client(self, user):
+        user_client = MagicMock()
+        user_client.params = {"user": user}
+        user_client.get_recenttracks_total_pages.side_effect = (
+            lambda *args: self.total_pages[user]
+        )
+
+        def get_page(page, *args):
+            self.fetched.append((user, page))
+            return [self.create_raw_track(1765550000 - page)]
+
+        user_client.get_recenttracks_page.side_effect = get_page
+        return user_client
+
+    def test_run_loads_every_user_with_its_own_watermark(self, client, state_store):
+        loaded = []
+
+        result = MultiUserIngest(
+            client, ["ana", "luis"], state_store, lambda df, user: loaded.append(user)
+        ).run()
+
+        assert sorted(loaded) == ["ana"] * 4 + ["luis"] * 2
+        assert result["users"]["ana"] == {"pages": 4, "rows": 4, "error": None}
+        assert result["users"]["luis"] == {"pages": 2, "rows": 2, "error": None}
+        assert state_store.get_watermark("ana") == 1765549999
+        assert state_store.get_watermark("luis") == 1765549999
+
+    def test_scheduler_takes_turns_between_users(self, client, state_store):
+        MultiUserIngest(
+            client, ["ana", "luis"], state_store, MagicMock(), max_workers=1
+        ).run()
+
+        assert self.fetched == [
+            ("ana", 1),
+            ("luis", 1),
+            ("ana", 2),
+            ("luis", 2),
+            ("ana", 3),
+            ("ana", 4),
+        ]
+
+    def test_fetches_pages_of_one_user_in_parallel(self, client, state_store):
+        # Las 4 paginas de ana solo pasan la barrera si se piden a la vez
+        barrier = threading.Barrier(4, timeout=5)
+        create_user_client = self.create_user_client
+
+        def create_blocking_client(user):
+            user_client = create_user_client(user)
+            get_page = user_client.get_recenttracks_page.side_effect
+
+            def get_page_together(page, *args):
+                barrier.wait()
+                return get_page(page, *args)
+
+            user_client.get_recenttracks_page.side_effect = get_page_together
+            return user_client
+
+        client.for_user.side_effect = create_blocking_client
+
+        result = MultiUserIngest(
+            client, ["ana"], state_store, MagicMock(), max_workers=4
+        ).run()
+
+        assert result["users"]["ana"] == {"pages": 4, "rows": 4, "error": None}
+
+    def test_each_user_has_at_most_one_load_in_flight(self, client, state_store):
+        lock = threading.Lock()
+        in_flight = {"ana": 0, "luis": 0}
+        max_in_flight = {"ana": 0, "luis": 0}
+
+        def loader(scrobble_df, user):
+            with lock:
+                in_flight[user] += 1
+                max_in_flight[user] = max(max_in_flight[user], in_flight[user])
+            time.sleep(0.01)
+            with lock:
+                in_flight[user] -= 1
+
+        result = MultiUserIngest(
+            client, ["ana", "luis"], state_store, loader, max_workers=4
+        ).run()
+
+        assert result["users"]["ana"]["pages"] == 4
+        assert max_in_flight == {"ana": 1, "luis": 1}
+
+    def test_failed_user_does_not_stop_the_others(self, client, state_store):
+        def loader(scrobble_df, user):
+            if user == "luis":
+                raise ConnectionError("mysql is down")
+
+        result = MultiUserIngest(
+            client, ["ana", "luis"], state_store, loader, max_workers=1
+        ).run()
+
+        assert result["users"]["ana"]["pages"] == 4
+        assert result["users"]["luis"]["error"] == "mysql is down"
+        assert state_store.get_watermark("ana") == 1765549999
+        assert state_store.get_watermark("luis") is None
+        assert ("luis", 2) not in self.fetched
+
+    def test_failed_planning_is_isolated_per_user(self, client, state_store):
+        ana_client = self.create_user_client("ana")
+        luis_client = self.create_user_client("luis")
+        luis_client.get_recenttracks_total_pages.side_effect = ValueError(
+            "status_code: 404, message: User not found"
+        )
+        client.for_user.side_effect = {"ana": ana_client, "luis": luis_client}.get
+
+        result = MultiUserIngest(
+            client, ["ana", "luis"], state_store, MagicMock()
+        ).run()
+
+        assert result["users"]["ana"]["pages"] == 4
+        assert "User not found" in result["users"]["luis"]["error"]
+
+    def test_empty_users_raises_value_error(self, client, state_store):
+        with pytest.raises(ValueError):
+            MultiUserIngest(client, [], state_store, MagicMock())
+
+    def test_ingest_users_upserts_each_user(self, client, state_store):
+        database_manager = MagicMock()
+
+        ingest_users(
+            client,
+            ["ana", "luis"],
+            state_store,
+            database_manager,
+            enricher_kwargs={"song_index": None},
+        )
+
+        users = sorted(
+            call.kwargs["user"]
+            for call in database_manager.save_scrobbles.call_args_list
+        )
+        assert users == ["ana"] * 4 + ["luis"] * 2
+
+    def test_ingest_users_resolves_id_can_once_for_all_users(
+        self, client, state_store, database_manager
+    ):
+        ingest_users(client, ["ana", "luis"], state_store, database_manager)
+
+        with database_manager.begin() as connection:
+            scrobbles = pd.read_sql("select user, id_can from scrobbles", connection)
+        assert len(scrobbles) == 6
+        assert set(scrobbles["id_can"]) == {1}
+        assert len(database_manager.get_songs()) == 1
@@ -0,0 +1,161 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from etl.ingest_scrobbles.incremental_ingest import IncrementalIngest
+from etl.ingest_scrobbles.cleansing import CleansingRules
+from etl.ingest_scrobbles.pipeline import (
+    IngestPipeline,
+    ingest_enricher_kwargs,
+    ingest_scrobbles,
+)
+from etl.ingest_scrobbles.song_index import SongIndex
+
+
+class TestIngestPipeline:
+    @pytest.fixture
+    def client(self, create_raw_track):
+        client = MagicMock()
+        client.params = {"user": "fake_user"}
+        client.get_recenttracks_total_pages.return_value = 3
+        client.get_recenttracks_page.side_effect = lambda page, *args: [
+            create_raw_track(1765550000 - page)
+        ]
+        return client
+
+    def test_run_loads_every_page_and_moves_watermark(self, client, state_store):
+        loaded = []
+        pipeline = IngestPipeline(IncrementalIngest(client, state_store), loaded.append)
+
+        result = pipeline.run()
+
+        assert sorted(uts for df in loaded for uts in df["uts"]) == [
+            1765549997,
+            1765549998,
+            1765549999,
+        ]
+        assert "fechahora" in loaded[0].columns
+        assert result["pages"] == 3
+        assert result["rows"] == 3
+        assert set(result["stage_seconds"]) == {"fetch", "transform", "enrich", "load"}
+        assert state_store.get_watermark("fake_user") == 1765549999
+
+    def test_failed_load_stops_pipeline_and_resumes_pending_pages(
+        self, client, state_store
+    ):
+        def failing_loader(scrobble_df):
+            if scrobble_df["uts"].iloc[0] == 1765549998:
+                raise ConnectionError("mysql is down")
+
+        with pytest.raises(ValueError, match="load"):
+            IngestPipeline(
+                IncrementalIngest(client, state_store),
+                failing_loader,
+                workers={"fetch": 1},
+            ).run()
+
+        assert state_store.get_watermark("fake_user") is None
+        assert 2 in IncrementalIngest(client, state_store).get_pending_pages()
+
+        loaded = []
+        IngestPipeline(IncrementalIngest(client, state_store), loaded.append).run()
+
+        assert 1765549998 in [uts for df in loaded for uts in df["uts"]]
+        assert state_store.get_watermark("fake_user") == 1765549999
+
+    def test_bounded_queues_apply_backpressure_on_fetch(
+        self, client, state_store, create_raw_track
+    ):
+        client.get_recenttracks_total_pages.return_value = 20
+        counters = {"fetched": 0, "loaded": 0, "max_in_flight": 0}
+        lock = threading.Lock()
+
+        def fetch_page(page, *args):
+            with lock:
+                counters["fetched"] += 1
+                counters["max_in_flight"] = max(
+                    counters["max_in_flight"],
+                    counters["fetched"] - counters["loaded"],
+                )
+            return [create_raw_track(1765550000 - page)]
+
+        def slow_loader(scrobble_df):
+            time.sleep(0.01)
+            with lock:
+                counters["loaded"] += 1
+
+        client.get_recenttracks_page.side_effect = fetch_page
+        IngestPipeline(
+            IncrementalIngest(client, state_store),
+            slow_loader,
+            workers={"fetch": 1},
+            queue_size=1,
+        ).run()
+
+        assert counters["loaded"] == 20
+        assert counters["max_in_flight"] <= 7
+
+    def test_unknown_stage_raises_value_error(self, client, state_store):
+        with pytest.raises(ValueError):
+            IngestPipeline(
+                IncrementalIngest(client, state_store),
+                MagicMock(),
+                workers={"download": 2},
+            )
+
+    def test_ingest_scrobbles_upserts_into_database(self, client, state_store):
+        database_manager = MagicMock()
+
+        result = ingest_scrobbles(
+            client,
+            state_store,
+            database_manager,
+            enricher_kwargs={"song_index": None},
+        )
+
+        assert result["rows"] == 3
+        _, kwargs = database_manager.save_scrobbles.call_args
+        assert kwargs == {"user": "fake_user", "mode": "upsert", "update_rollups": True}
+
+    def test_ingest_enricher_kwargs_cleanse_and_resolve_id_can(self):
+        enricher_kwargs = ingest_enricher_kwargs(MagicMock())
+
+        assert isinstance(enricher_kwargs["song_index"], SongIndex)
+        assert isinstance(enricher_kwargs["cleansing_rules"], CleansingRules)
+        assert enricher_kwargs["cleansing_rules"].version is not None
+
+    def test_ingest_scrobbles_applies_cleansing_rules(
+        self, client, state_store, database_manager
+    ):
+        cleansing_rules = CleansingRules(
+            [
+                {
+                    "field": "title",
+                    "match": "casefold",
+                    "pattern": "papel secante",
+                    "replacement": "Papel secante",
+                }
+            ]
+        )
+
+        ingest_scrobbles(
+            client,
+            state_store,
+            database_manager,
+            enricher_kwargs={"cleansing_rules": cleansing_rules},
+        )
+
+        assert database_manager.get_songs()["title"].tolist() == ["Papel secante"]
+
+    def test_ingest_scrobbles_resolves_id_can(
+        self, client, state_store, database_manager
+    ):
+        ingest_scrobbles(client, state_store, database_manager)
+
+        with database_manager.begin() as connection:
+            scrobbles = pd.read_sql("select id_can from scrobbles", connection)
+        assert scrobbles["id_can"].tolist() == [1, 1, 1]
+        assert len(database_manager.get_songs()) == 1
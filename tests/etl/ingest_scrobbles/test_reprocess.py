@@ -0,0 +1,126 @@
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pytest
+
+from database.parquet_sink import ParquetSink
+from etl.ingest_scrobbles.cleansing import CleansingRules
+from etl.ingest_scrobbles.enricher import EnrichScrobble
+from etl.ingest_scrobbles.reprocess import Reprocessor, _from_ipc, _to_ipc
+from etl.ingest_scrobbles.transformer import TransformScrobble
+
+
+class TestReprocessor:
+    @pytest.fixture
+    def pages(self, create_raw_track):
+        pages = [
+            [
+                create_raw_track(1765550000 - page * 10 - i, artist="extremoduro")
+                for i in range(3)
+            ]
+            for page in range(5)
+        ]
+        pages[0].insert(0, {**create_raw_track(0), "@attr": {}})
+        return pages
+
+    def test_ipc_round_trip_keeps_columns_and_types(self):
+        scrobble_df = pd.DataFrame(
+            {"uts": [1, 2], "fechahora": pd.to_datetime([1, 2], unit="s")}
+        )
+
+        table = _from_ipc(_to_ipc(scrobble_df))
+
+        pd.testing.assert_frame_equal(table.to_pandas(), scrobble_df)
+
+    def test_reprocess_pages_matches_serial_transform_and_enrich(self, pages):
+        reprocessor = Reprocessor(max_workers=2, pages_per_task=2)
+
+        result = reprocessor.reprocess_pages(pages).to_pandas()
+
+        tracks_list = [
+            track for page in pages for track in page if "@attr" not in track
+        ]
+        expected = EnrichScrobble(
+            TransformScrobble().transform_tracks_to_dataframe(tracks_list)
+        ).enrich_scrobble()
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_reprocess_pages_applies_cleansing_rules_in_workers(self, pages):
+        cleansing_rules = CleansingRules(
+            [
+                {
+                    "field": "artist",
+                    "match": "casefold",
+                    "pattern": "EXTREMODURO",
+                    "replacement": "Extremoduro",
+                }
+            ]
+        )
+        reprocessor = Reprocessor(
+            max_workers=2, enricher_kwargs={"cleansing_rules": cleansing_rules}
+        )
+
+        result = reprocessor.reprocess_pages(pages)
+
+        assert set(result["artist"].to_pylist()) == {"Extremoduro"}
+
+    def test_reprocess_pages_resolves_id_can_in_parent(self, pages):
+        song_index = MagicMock()
+        song_index.resolve.side_effect = lambda df: pd.Series([7] * len(df))
+
+        result = Reprocessor(max_workers=2, song_index=song_index).reprocess_pages(
+            pages
+        )
+
+        assert set(result["id_can"].to_pylist()) == {7}
+
+    def test_song_index_cannot_be_sent_to_workers(self):
+        with pytest.raises(ValueError):
+            Reprocessor(enricher_kwargs={"song_index": MagicMock()})
+
+    def test_reprocess_parquet_reads_row_groups_with_their_user(self, pages, tmp_path):
+        sink = ParquetSink(tmp_path / "scrobbles", row_group_size=4)
+        scrobble_df = EnrichScrobble(
+            TransformScrobble().transform_tracks_to_dataframe(
+                [track for page in pages[1:] for track in page]
+            )
+        ).enrich_scrobble()
+        sink.write(scrobble_df, user="sinatxester")
+
+        result = Reprocessor(max_workers=2).reprocess_parquet(
+            sink, filter=ds.field("user") == "sinatxester"
+        )
+
+        assert sorted(result["uts"].to_pylist()) == sorted(scrobble_df["uts"])
+        assert set(result["user"].to_pylist()) == {"sinatxester"}
+
+    def test_reprocess_parquet_keeps_source_values_for_the_natural_key(
+        self, pages, tmp_path
+    ):
+        cleansing_rules = CleansingRules(
+            [
+                {
+                    "field": "artist",
+                    "match": "exact",
+                    "pattern": "extremoduro",
+                    "replacement": "Extremoduro",
+                }
+            ]
+        )
+        sink = ParquetSink(tmp_path / "scrobbles")
+        sink.write(
+            EnrichScrobble(
+                TransformScrobble().transform_tracks_to_dataframe(pages[1]),
+                cleansing_rules=cleansing_rules,
+            ).enrich_scrobble(),
+            user="sinatxester",
+        )
+
+        result = Reprocessor(max_workers=2).reprocess_parquet(sink)
+
+        assert set(result["artist"].to_pylist()) == {"Extremoduro"}
+        assert set(result["source_artist"].to_pylist()) == {"extremoduro"}
+
+    def test_reprocess_without_input_returns_empty_table(self, tmp_path):
+        assert Reprocessor(max_workers=2).reprocess_pages([]).num_rows == 0
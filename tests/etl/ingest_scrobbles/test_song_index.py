@@ -0,0 +1,103 @@
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+import sqlalchemy
+
+from database.mysql_manager import MysqlManager
+from etl.ingest_scrobbles.song_index import SongIndex
+
+
+class TestSongIndex:
+    @pytest.fixture
+    def database_manager(self, tmp_path):
+        mock_config = MagicMock()
+        mock_config.get_credentials.return_value = "fake_value"
+        database_manager = MysqlManager(mock_config)
+        database_manager.engine = sqlalchemy.create_engine(
+            f"sqlite:///{tmp_path / 'songs.db'}"
+        )
+        database_manager.create_tables()
+        database_manager.insert_songs(
+            pd.DataFrame(
+                [
+                    self.song("Extremoduro", "Deltoya", "Papel Secante", "mbid-1"),
+                    self.song("Extremoduro", "Yo, Minoría Absoluta", "Standby", ""),
+                ]
+            )
+        )
+        return database_manager
+
+    @pytest.fixture
+    def song_index(self, database_manager):
+        song_index = SongIndex(database_manager)
+        song_index.refresh()
+        return song_index
+
+    def test_refresh_loads_song_dimension(self, song_index):
+        assert song_index.max_id_can == 2
+        assert len(song_index.key_index) == 2
+        assert song_index.mbid_index.to_dict() == {"mbid-1": 1}
+
+    def test_resolve_uses_normalized_artist_album_title(self, song_index):
+        scrobble_df = pd.DataFrame(
+            [self.song(" EXTREMODURO", "yo, minoría absoluta ", "standby", "")]
+        )
+
+        result = song_index.resolve(scrobble_df)
+
+        assert result.tolist() == [2]
+
+    def test_resolve_prefers_mbid(self, song_index):
+        scrobble_df = pd.DataFrame(
+            [self.song("Extremoduro", "Grandes Éxitos", "Papel secante", "mbid-1")]
+        )
+
+        result = song_index.resolve(scrobble_df)
+
+        assert result.tolist() == [1]
+
+    def test_resolve_inserts_unresolved_songs_once(self, song_index, database_manager):
+        scrobble_df = pd.DataFrame(
+            [
+                self.song("Robe", "Mayéutica", "Un Instante", ""),
+                self.song("Extremoduro", "Deltoya", "Papel Secante", "mbid-1"),
+                self.song("Robe", "Mayéutica", "Un instante", ""),
+            ]
+        )
+
+        result = song_index.resolve(scrobble_df)
+
+        assert result.tolist() == [3, 1, 3]
+        assert len(database_manager.get_songs()) == 3
+
+    def test_resolve_loads_existing_songs_without_explicit_refresh(
+        self, database_manager
+    ):
+        scrobble_df = pd.DataFrame(
+            [self.song("Extremoduro", "Deltoya", "Papel Secante", "mbid-1")]
+        )
+
+        first = SongIndex(database_manager).resolve(scrobble_df)
+        second = SongIndex(database_manager).resolve(scrobble_df)
+
+        assert first.tolist() == second.tolist() == [1]
+        assert len(database_manager.get_songs()) == 2
+
+    def test_refresh_only_reads_new_songs(self, song_index):
+        song_index.database_manager = MagicMock()
+        song_index.database_manager.get_songs.return_value = pd.DataFrame(
+            columns=["id_can", "artist", "album", "title", "track_mbid"]
+        )
+
+        song_index.refresh()
+
+        song_index.database_manager.get_songs.assert_called_once_with(2)
+
+    def song(self, artist, album, title, track_mbid):
+        return {
+            "artist": artist,
+            "album": album,
+            "title": title,
+            "track_mbid": track_mbid,
+        }
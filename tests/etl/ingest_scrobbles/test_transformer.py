@@ -1,5 +1,7 @@
+from etl.ingest_scrobbles.enricher import EnrichScrobble
 from etl.ingest_scrobbles.transformer import TransformScrobble
-from models.scrobble import Scrobble
+from models.scrobble import Scrobble, ScrobbleRecord
+from pandas.testing import assert_frame_equal
 import pytest
 
 
@@ -39,6 +41,44 @@ class TestTransformScrobble:
 
         assert result == expected_output
 
+    def test_transform_tracks_to_records_returns_scrobble_records(
+        self, raw_scrobble, expected_raw_output
+    ):
+        result = TransformScrobble().transform_tracks_to_records([raw_scrobble])
+
+        assert result == [ScrobbleRecord(**expected_raw_output)]
+
+    def test_transform_tracks_to_dataframe_matches_per_object_path(
+        self, tracks_list_len_two
+    ):
+        scrobbles_list = TransformScrobble().transform_tracks_list(tracks_list_len_two)
+        expected = EnrichScrobble(scrobbles_list)._create_dataframe(scrobbles_list)
+
+        result = TransformScrobble().transform_tracks_to_dataframe(tracks_list_len_two)
+
+        assert_frame_equal(result, expected)
+
+    def test_transform_tracks_to_dataframe_works_for_empty_list(self):
+        result = TransformScrobble().transform_tracks_to_dataframe([])
+
+        assert list(result.columns) == list(Scrobble.model_fields)
+        assert result.empty
+
+    @pytest.mark.parametrize("invalid_uts", ["", "uts", "12.5"])
+    def test_transform_tracks_to_dataframe_validates_uts_column(
+        self, raw_scrobble, invalid_uts
+    ):
+        raw_scrobble["date"]["uts"] = invalid_uts
+
+        with pytest.raises(ValueError):
+            TransformScrobble().transform_tracks_to_dataframe([raw_scrobble])
+
+    def test_transform_tracks_to_dataframe_validates_string_columns(self, raw_scrobble):
+        raw_scrobble["artist"]["mbid"] = None
+
+        with pytest.raises(ValueError, match="artist_mbid"):
+            TransformScrobble().transform_tracks_to_dataframe([raw_scrobble])
+
     @pytest.fixture
     def raw_scrobble(self):
         return {
@@ -0,0 +1,102 @@
+import json
+import time
+
+import pytest
+
+from instrumentation.metrics import Metrics
+
+
+class TestMetrics:
+
+    def setup_method(self, method):
+        self.metrics = Metrics(enabled=True, buckets=(0.1, 1.0, float("inf")))
+
+    def test_disabled_metrics_record_nothing(self):
+        metrics = Metrics()
+
+        @metrics.timed("stage_seconds")
+        def stage():
+            return "resultado"
+
+        metrics.inc("rows_total", 10)
+        with metrics.timer("load_seconds"):
+            pass
+
+        assert stage() == "resultado"
+        assert metrics.snapshot() == {"counters": [], "histograms": []}
+
+    def test_inc_sums_counters_per_labels(self):
+        self.metrics.inc("responses_total", status=200)
+        self.metrics.inc("responses_total", status=200)
+        self.metrics.inc("responses_total", 3, status=503)
+
+        counters = self.metrics.snapshot()["counters"]
+
+        assert [(c["labels"], c["value"]) for c in counters] == [
+            ({"status": 200}, 2),
+            ({"status": 503}, 3),
+        ]
+
+    def test_observe_fills_cumulative_buckets(self):
+        for value in (0.05, 0.5, 5):
+            self.metrics.observe("request_seconds", value)
+
+        histogram = self.metrics.snapshot()["histograms"][0]
+
+        assert histogram["count"] == 3
+        assert histogram["sum"] == pytest.approx(5.55)
+        assert histogram["buckets"] == {"0.1": 1, "1.0": 2, "+Inf": 3}
+
+    def test_timed_records_duration_even_if_function_raises(self):
+        @self.metrics.timed("stage_seconds", stage="load")
+        def failing_stage():
+            time.sleep(0.01)
+            raise ConnectionError("mysql is down")
+
+        with pytest.raises(ConnectionError):
+            failing_stage()
+
+        histogram = self.metrics.snapshot()["histograms"][0]
+        assert histogram["labels"] == {"stage": "load"}
+        assert histogram["count"] == 1
+        assert histogram["sum"] >= 0.01
+
+    def test_write_json_log_appends_one_line_per_run(self, tmp_path):
+        log_path = tmp_path / "metrics.jsonl"
+        self.metrics.inc("rows_total", 5)
+
+        self.metrics.write_json_log(log_path, run="primera")
+        self.metrics.write_json_log(log_path, run="segunda")
+
+        records = [json.loads(line) for line in log_path.read_text().splitlines()]
+        assert [record["run"] for record in records] == ["primera", "segunda"]
+        assert records[0]["counters"][0]["value"] == 5
+
+    def test_to_prometheus_uses_text_format(self):
+        self.metrics.inc("lastfm_responses_total", method="user.getinfo", status=200)
+        self.metrics.observe("load_seconds", 0.5, mode="upsert")
+
+        text = self.metrics.to_prometheus()
+
+        assert "# TYPE classmusic_lastfm_responses_total counter" in text
+        assert (
+            'classmusic_lastfm_responses_total{method="user.getinfo",status="200"} 1'
+            in text
+        )
+        assert "# TYPE classmusic_load_seconds histogram" in text
+        assert 'classmusic_load_seconds_bucket{mode="upsert",le="0.1"} 0' in text
+        assert 'classmusic_load_seconds_bucket{mode="upsert",le="+Inf"} 1' in text
+        assert 'classmusic_load_seconds_count{mode="upsert"} 1' in text
+
+    def test_to_prometheus_escapes_label_values(self):
+        self.metrics.inc("plays_total", artist='Extremoduro, "Robe"')
+
+        assert 'artist="Extremoduro, \\"Robe\\""' in self.metrics.to_prometheus()
+
+    def test_write_prometheus_writes_file(self, tmp_path):
+        prom_path = tmp_path / "classmusic.prom"
+        self.metrics.inc("rows_total")
+
+        self.metrics.write_prometheus(prom_path)
+
+        assert prom_path.read_text() == self.metrics.to_prometheus()
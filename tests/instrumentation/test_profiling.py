@@ -0,0 +1,38 @@
+import os
+import pstats
+
+import pytest
+
+from instrumentation.profiling import profile_run
+
+
+class TestProfileRun:
+
+    def test_no_mode_does_nothing(self, tmp_path):
+        with profile_run(None, tmp_path) as report:
+            sum(range(100))
+
+        assert report is None
+        assert os.listdir(tmp_path) == []
+
+    def test_cprofile_dumps_stats_and_text_report(self, tmp_path):
+        with profile_run("cprofile", tmp_path) as report:
+            sorted(range(10_000), reverse=True)
+
+        assert pstats.Stats(report["stats_path"]).total_calls > 0
+        with open(report["report_path"], encoding="utf-8") as f:
+            assert "cumulative" in f.read()
+
+    def test_tracemalloc_reports_peak_memory(self, tmp_path):
+        with profile_run("tracemalloc", tmp_path) as report:
+            data = [str(i) for i in range(10_000)]
+
+        assert report["peak_bytes"] > 0
+        with open(report["report_path"], encoding="utf-8") as f:
+            assert f.readline().startswith("current:")
+        del data
+
+    def test_unknown_mode_raises_value_error(self, tmp_path):
+        with pytest.raises(ValueError):
+            with profile_run("perf", tmp_path):
+                pass
@@ -1,6 +1,6 @@
 from pydantic import ValidationError
 import pytest
-from src.models.scrobble import Scrobble
+from src.models.scrobble import Scrobble, ScrobbleRecord
 
 
 class TestScrobble:
@@ -51,3 +51,22 @@ class TestScrobble:
         valid_scrobble_copy["uts"] = "1234567890"
         scrobble = Scrobble(**valid_scrobble_copy)
         assert scrobble.uts == 1234567890
+
+    def test_scrobble_record_converts_from_and_to_scrobble(self, valid_scrobble):
+        scrobble = Scrobble(**valid_scrobble)
+
+        record = ScrobbleRecord.from_scrobble(scrobble)
+
+        assert record._asdict() == valid_scrobble
+        assert record.to_scrobble() == scrobble
+
+    def test_scrobble_record_has_no_instance_dict(self, valid_scrobble):
+        record = ScrobbleRecord(**valid_scrobble)
+
+        assert not hasattr(record, "__dict__")
+
+    def test_scrobble_record_to_scrobble_validates_fields(self, valid_scrobble):
+        record = ScrobbleRecord(**valid_scrobble | {"uts": "uts"})
+
+        with pytest.raises(ValidationError):
+            record.to_scrobble()